@@ -1,14 +1,94 @@
 # app.py
 from __future__ import annotations
 
+import time
+
+_T0 = time.perf_counter()  # app.py starts running (after interpreter start / bundle unpack)
+
+import argparse
+import importlib
 import inspect
+import os
+import sys
 import threading
 import tkinter as tk
 from datetime import datetime, date
 from pathlib import Path
 from tkinter import ttk, filedialog, messagebox
 
+# Only tkinter is imported before the window shows. The backend (controller ->
+# scraper, processor -> pandas/openpyxl) is imported on a background thread once
+# the window is up, while the dates are typed; Run waits for it if it is not done.
+# APP_PREWARM=0 turns that off (imported on the first Run instead).
+
 DATE_FMT = "%Y-%m-%d"  # input format: 2025-01-01
+STATUS_POLL_MS = 250  # status line refresh while a run is going
+
+APP_PREWARM = os.environ.get("APP_PREWARM", "1") == "1"
+PREWARM_MODULES = (
+    "controller",
+    "pandas",
+    "openpyxl",
+    "modules.loader",
+    "modules.summary",
+    "modules.excel_style",
+    "modules.sueldos",
+    "modules.gastos",
+    "modules.facturacion",
+    "modules.stock",
+)
+
+# startup marks, seconds since app.py started running
+_STARTUP: dict[str, float] = {"imports": time.perf_counter() - _T0}
+
+
+def _process_age() -> float | None:
+    '''Seconds since this process was created (includes onefile unpacking), None if unknown'''
+    try:
+        if sys.platform.startswith("linux"):
+            with open("/proc/self/stat") as f:
+                start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+            with open("/proc/uptime") as f:
+                uptime = float(f.read().split()[0])
+            return uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+        if sys.platform == "win32":
+            import ctypes
+            from ctypes import wintypes
+
+            created, exited, kernel, user, now = (wintypes.FILETIME() for _ in range(5))
+            ctypes.windll.kernel32.GetProcessTimes(
+                ctypes.windll.kernel32.GetCurrentProcess(),
+                ctypes.byref(created), ctypes.byref(exited), ctypes.byref(kernel), ctypes.byref(user),
+            )
+            ctypes.windll.kernel32.GetSystemTimeAsFileTime(ctypes.byref(now))
+
+            def ticks(ft):
+                return (ft.dwHighDateTime << 32) | ft.dwLowDateTime
+
+            return (ticks(now) - ticks(created)) / 1e7  # 100ns units
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    return None
+
+
+def print_startup_report(prewarm: list[tuple[str, float]] | None = None) -> None:
+    age = _process_age()
+    before = age - (time.perf_counter() - _T0) if age is not None else None
+
+    print("Startup:")
+    if before is not None:
+        print(f"  {'before app.py (unpack + python)':<34} {before:6.2f}s")
+    previous = 0.0
+    for mark, at in _STARTUP.items():
+        print(f"  {mark:<34} {at - previous:6.2f}s")
+        previous = at
+    total = previous + (before or 0.0)
+    print(f"  {'window shown after':<34} {total:6.2f}s")
+
+    if prewarm:
+        print("Pre-warm (background, cumulative like -X importtime):")
+        for name, secs in prewarm:
+            print(f"  {name:<34} {secs:6.2f}s")
 
 
 def parse_date(s: str) -> date:
@@ -16,7 +96,7 @@ def parse_date(s: str) -> date:
 
 
 class App(tk.Tk):
-    def __init__(self):
+    def __init__(self, prewarm: bool = APP_PREWARM, startup_report: bool = False):
         super().__init__()
         self.title("Financial Export Runner")
         self.geometry("560x260")
@@ -33,6 +113,36 @@ class App(tk.Tk):
         self.status_var = tk.StringVar(value="Ready.")
 
         self._build()
+        _STARTUP["window built"] = time.perf_counter() - _T0
+
+        self._prewarm = prewarm
+        self._startup_report = startup_report
+        self.bind("<Map>", self._on_first_map)
+
+    def _on_first_map(self, event):
+        if event.widget is not self:
+            return
+        self.unbind("<Map>")
+        _STARTUP["window mapped"] = time.perf_counter() - _T0
+
+        if self._prewarm:
+            threading.Thread(target=self._prewarm_imports, daemon=True).start()
+        elif self._startup_report:
+            print_startup_report()
+
+    def _prewarm_imports(self):
+        # background thread: imports only, never touches Tk
+        timings = []
+        for name in PREWARM_MODULES:
+            t0 = time.perf_counter()
+            try:
+                importlib.import_module(name)
+            except Exception as e:  # Run will report it properly
+                print(f"Pre-warm: {name} failed ({e})")
+                break
+            timings.append((name, time.perf_counter() - t0))
+        if self._startup_report:
+            print_startup_report(timings)
 
     def _build(self):
         root = ttk.Frame(self, padding=16)
@@ -109,6 +219,16 @@ class App(tk.Tk):
             target=self._run_background, args=(start, end, output_path), daemon=True
         )
         self._worker.start()
+        self.after(STATUS_POLL_MS, self._poll_status)
+
+    def _poll_status(self):
+        # the run says what stage it is in (modules.instrument), once the backend is loaded
+        if not self._running:
+            return
+        instrument = sys.modules.get("modules.instrument")
+        text = instrument.status() if instrument is not None else ""
+        self.status_var.set(f"Running… {text}" if text else "Running…")
+        self.after(STATUS_POLL_MS, self._poll_status)
 
     def _run_background(self, start: date, end: date, output_path: Path):
         try:
@@ -152,8 +272,18 @@ class App(tk.Tk):
         messagebox.showerror("Error", str(err))
 
 
-def main():
-    App().mainloop()
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(prog="app", description="Financial Export Runner")
+    parser.add_argument("--no-prewarm", action="store_true", help="import the backend on the first Run instead (APP_PREWARM=0)")
+    parser.add_argument("--startup-report", action="store_true", help="print how long the window took to show")
+    args = parser.parse_args(argv)
+
+    App(prewarm=APP_PREWARM and not args.no_prewarm, startup_report=args.startup_report).mainloop()
+
+    # scraper may keep a warm browser between runs (SCRAPE_KEEP_BROWSER=1)
+    scraper = sys.modules.get("scraper")
+    if scraper is not None:
+        scraper.close_warm_browser()
 
 
 if __name__ == "__main__":
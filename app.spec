@@ -0,0 +1,47 @@
+# PyInstaller profile for a fast-starting app:  pyinstaller app.spec
+#
+# onedir: dist/app/ holds the exe next to its libraries, so a launch starts
+# Python straight away instead of unpacking pandas/numpy/openpyxl/playwright
+# to a temp folder every time (what --onefile does). Ship the whole folder.
+# No UPX: compressed libraries are slower to load.
+
+# imported by name on the app's pre-warm thread (app.PREWARM_MODULES)
+hiddenimports = [
+    "controller",
+    "processor",
+    "scraper",
+    "modules.loader",
+    "modules.summary",
+    "modules.excel_style",
+    "modules.sueldos",
+    "modules.gastos",
+    "modules.facturacion",
+    "modules.stock",
+    "modules.store",
+]
+
+a = Analysis(
+    ["app.py"],
+    hiddenimports=hiddenimports,
+    # never used at runtime, only make the bundle bigger
+    excludes=["benchmarks", "matplotlib", "IPython", "pytest", "scipy", "tkinter.test", "pandas.tests", "numpy.tests"],
+    noarchive=False,
+)
+pyz = PYZ(a.pure)
+
+exe = EXE(
+    pyz,
+    a.scripts,
+    [],
+    exclude_binaries=True,
+    name="app",
+    console=False,
+    upx=False,
+)
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    upx=False,
+    name="app",
+)
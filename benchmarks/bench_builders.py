@@ -0,0 +1,142 @@
+"""
+Times and memory-profiles the table builders, the Resumen join chain and the
+sheet styling on synthetic exports (benchmarks/synthetic.py) at 1x, 10x and
+100x the volume.
+
+    python -m benchmarks.bench_builders --scales 1,10,100 --keep /tmp/bench_res
+
+"parse" is the first load of every export (no staged copy yet); the builders
+then run with the loader's cache warm, like they do inside one processor run.
+Time is the best of --repeat runs; peak memory is one extra run under
+tracemalloc (Python and numpy allocations, not openpyxl's C side).
+"""
+import argparse
+import contextlib
+import io
+import shutil
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from openpyxl import Workbook
+
+from benchmarks.synthetic import Volume, write_exports
+from modules import loader
+from modules.excel_style import style_financial_sheet, write_financial_sheet
+from modules.facturacion import build_facturas_por_cliente, build_facturas_total
+from modules.gastos import build_gastos_by_section
+from modules.helpers import join_pivots, add_totals_and_result
+from modules.loader import REPORTS, TENANTS
+from modules.stock import build_stock
+from modules.sueldos import build_sueldos_by_section
+
+
+def resumen_chain(res_dir: Path):
+    spendings = join_pivots(build_gastos_by_section(res_dir), build_sueldos_by_section(res_dir))
+    spendings = join_pivots(spendings, build_stock(res_dir), b_label="stock")
+    return add_totals_and_result(spendings, build_facturas_total(res_dir))
+
+
+def _styled(path: Path):
+    '''A pandas-written sheet (untimed setup) styled again from disk'''
+    def run(res_dir: Path):
+        style_financial_sheet(path, sheet_name="Facturas", freeze_panes_cell="B2")
+    return run
+
+
+def _written(table):
+    def run(res_dir: Path):
+        write_financial_sheet(table, None, sheet_name="Facturas", wb=Workbook())
+    return run
+
+
+def _parse(res_dir: Path):
+    shutil.rmtree(res_dir / loader.STAGING_DIR_NAME, ignore_errors=True)
+    shutil.rmtree(res_dir / loader.AGGREGATE_DIR_NAME, ignore_errors=True)
+    loader.clear_cache()
+    for report in REPORTS:
+        for tenant in TENANTS:
+            loader.load_report(report, tenant, res_dir)
+
+
+def measure(fn, res_dir: Path, repeat: int) -> tuple[float, float]:
+    '''(best seconds, peak MiB); builder chatter (unmapped names) is not printed'''
+    with contextlib.redirect_stdout(io.StringIO()):
+        best = float("inf")
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            fn(res_dir)
+            best = min(best, time.perf_counter() - t0)
+
+        tracemalloc.start()
+        fn(res_dir)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return best, peak / 2**20
+
+
+def bench_scale(res_dir: Path, repeat: int) -> list[tuple[str, float, float]]:
+    results = [("parse", *measure(_parse, res_dir, 1))]
+    rows = sum(len(loader.load_report(r, t, res_dir)) for r in REPORTS for t in TENANTS)
+    results[0] = (f"parse ({rows} rows)", *results[0][1:])
+
+    cases = {
+        "build_sueldos_by_section": build_sueldos_by_section,
+        "build_gastos_by_section": build_gastos_by_section,
+        "build_facturas_total": build_facturas_total,
+        "build_stock": build_stock,
+        "join_pivots+add_totals": resumen_chain,
+    }
+    for name, fn in cases.items():
+        results.append((name, *measure(fn, res_dir, repeat)))
+
+    # the widest sheet: one row per client
+    with contextlib.redirect_stdout(io.StringIO()):
+        table = build_facturas_por_cliente(res_dir)
+    sheet = res_dir / "styled.xlsx"
+    table.to_excel(sheet, sheet_name="Facturas", index=False)
+    results.append((f"style_financial_sheet ({len(table)} rows)", *measure(_styled(sheet), res_dir, repeat)))
+    results.append((f"write_financial_sheet ({len(table)} rows)", *measure(_written(table), res_dir, repeat)))
+    return results
+
+
+def _scales(value: str) -> list[float]:
+    return [float(v) for v in value.split(",") if v.strip()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=_scales, default=[1, 10, 100])
+    parser.add_argument("--years", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--incremental", action="store_true", help="builders read the per-month sums (loader.INCREMENTAL) instead of every row")
+    parser.add_argument("--keep", type=Path, default=None, help="keep the generated exports here (x{scale}/) and reuse them")
+    args = parser.parse_args()
+
+    loader.INCREMENTAL = args.incremental
+    tmp = None
+    root = args.keep
+    if root is None:
+        tmp = tempfile.TemporaryDirectory()
+        root = Path(tmp.name)
+
+    try:
+        for scale in args.scales:
+            res_dir = root / f"x{scale:g}"
+            if not all((res_dir / f"{r}-{t}.xlsx").exists() for r in REPORTS for t in TENANTS):
+                t0 = time.perf_counter()
+                counts = write_exports(res_dir, Volume(years=args.years), scale)
+                print(f"generated {sum(counts.values())} rows in {time.perf_counter() - t0:.1f}s")
+
+            print(f"\n== {scale:g}x")
+            for name, secs, peak in bench_scale(res_dir, args.repeat):
+                print(f"{name:<40} {secs * 1000:10.1f} ms  peak {peak:8.1f} MiB")
+            loader.clear_cache()
+    finally:
+        if tmp is not None:
+            tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Compares the Excel readers in modules/readers.py on a synthetic multi-year
+gastos export (benchmarks/synthetic.py: same header offset and columns as the
+real one, plus the extra columns SIPE adds that we never use).
+
+    python -m benchmarks.bench_readers --years 5 --rows-per-month 2000
+
+Time is the best of --repeat runs with nothing traced; peak memory is one extra
+run under tracemalloc, which slows the pure Python readers several times over
+but only sees Python allocations (calamine's Rust side is not counted).
+"""
+import argparse
+import tempfile
+import time
+import tracemalloc
+from datetime import date
+from pathlib import Path
+
+from benchmarks.synthetic import Volume, export_rows, write_export
+from modules import readers
+from modules.loader import REPORTS
+
+
+def write_gastos_export(path: Path, years: int, rows_per_month: int) -> int:
+    '''The gastos-sg export benchmarks/synthetic.py writes, for the last `years` years'''
+    this_year = date.today().year
+    rows = export_rows(
+        "gastos", "sg", date(this_year - years + 1, 1, 1), date(this_year, 12, 31),
+        Volume(years=years, rows_per_month=rows_per_month),
+    )
+    return write_export(path, "gastos", rows)
+
+
+def bench(name: str, path: Path, repeat: int) -> tuple[float, float]:
+    '''(best seconds, peak MiB)'''
+    spec = REPORTS["gastos"]
+
+    def read():
+        return readers.READERS[name](path, spec["header"], spec["columns"], spec["dtype"])
+
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        df = read()
+        best = min(best, time.perf_counter() - t0)
+    assert list(df.columns) == spec["columns"]
+
+    tracemalloc.start()
+    read()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak / 2**20
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--rows-per-month", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "gastos-sg.xlsx"
+        rows = write_gastos_export(path, args.years, args.rows_per_month)
+        print(f"{rows} rows, {path.stat().st_size / 2**20:.1f} MiB")
+
+        names = ["pandas", "stream"] + (["calamine"] if readers.HAS_CALAMINE else [])
+        for name in names:
+            secs, peak = bench(name, path, args.repeat)
+            print(f"{name:<9} {secs:7.2f}s  peak {peak:7.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
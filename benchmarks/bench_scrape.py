@@ -0,0 +1,117 @@
+"""
+End-to-end scrape timings against the local SIPE stand-in (benchmarks/fake_sipe.py):
+runs scraper.scrape_exports for both tenants and reports the time per tenant
+and per report, split by scrape step.
+
+    python -m benchmarks.bench_scrape --backend http --runs 3 --delay filtrar=0.5 --delay exportar=1
+    python -m benchmarks.bench_scrape --backend playwright --concurrent --max-pages 2 --fail sg/stock/exportar:1
+
+Runs in a temporary folder (the scraper clears and fills res/ there) so the
+real res/ is never touched. The Playwright backend needs Chrome installed, or
+SCRAPE_CHROME set to a Chrome/Chromium executable.
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+from benchmarks.fake_sipe import FakeSipe, add_server_arguments, config_from_args
+
+
+def _totals(timings: list[dict], key) -> dict:
+    out: dict = {}
+    for t in timings:
+        k = key(t)
+        out[k] = out.get(k, 0.0) + t["seconds"]
+    return out
+
+
+def run_once(scraper, start: date, end: date, concurrent: bool) -> dict:
+    t0 = time.perf_counter()
+    error = None
+    tenants = {}
+    try:
+        tenants = scraper.scrape_exports(start, end, concurrent=concurrent)
+    except Exception as e:
+        lines = str(e).strip().splitlines()  # playwright errors carry a whole call log
+        error = f"{type(e).__name__}: {lines[0] if lines else ''}"
+    return {
+        "seconds": time.perf_counter() - t0,
+        "tenants": tenants,
+        "steps": list(scraper.STEP_TIMINGS),
+        "error": error,
+    }
+
+
+def print_report(runs: list[dict]) -> None:
+    ok = [r for r in runs if r["error"] is None]
+    print(f"\n{len(ok)} of {len(runs)} runs ok")
+    for i, r in enumerate(runs, start=1):
+        if r["error"]:
+            print(f"  run {i} failed after {r['seconds']:.1f}s: {r['error']}")
+    if not ok:
+        return
+
+    print(f"\nwall (median)  {statistics.median(r['seconds'] for r in ok):7.2f}s")
+    for tenant in ok[0]["tenants"]:
+        print(f"  {tenant:<12} {statistics.median(r['tenants'][tenant] for r in ok):7.2f}s")
+
+    # per (tenant, report): median over runs of the summed step time, split by step
+    per_run = [_totals(r["steps"], lambda t: (t["tenant"], t["report"], t["step"])) for r in ok]
+    keys = sorted({k for totals in per_run for k in totals})
+    steps = sorted({k[2] for k in keys})
+    print(f"\n{'tenant':<7}{'report':<10}" + "".join(f"{s:>10}" for s in steps) + f"{'total':>10}")
+    for tenant, report in sorted({k[:2] for k in keys}):
+        cells = [statistics.median(t.get((tenant, report, s), 0.0) for t in per_run) for s in steps]
+        print(f"{tenant:<7}{report:<10}" + "".join(f"{c:10.2f}" for c in cells) + f"{sum(cells):10.2f}")
+    print("(step seconds add up per page: with several pages at once they overlap in wall time)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=["http", "playwright"], default="http")
+    parser.add_argument("--start", type=date.fromisoformat, default=date(date.today().year, 1, 1))
+    parser.add_argument("--end", type=date.fromisoformat, default=date.today())
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--concurrent", action="store_true", help="both tenants at the same time (SCRAPE_CONCURRENT)")
+    parser.add_argument("--max-pages", type=int, default=4, help="report pages per tenant at the same time (SCRAPE_MAX_PAGES)")
+    parser.add_argument("--cache", action="store_true", help="month-by-month downloads reused between runs (SCRAPE_CACHE)")
+    parser.add_argument("--json", type=Path, default=None, help="also write every run's step timings here")
+    add_server_arguments(parser)
+    args = parser.parse_args()
+    json_path = args.json.resolve() if args.json else None
+
+    with FakeSipe(config_from_args(args)) as sipe, tempfile.TemporaryDirectory() as work:
+        config = sipe.state.config
+        os.environ.update(SIPE_URL=sipe.url, APP_USER=config.user, APP_PASS=config.password)
+        cwd = os.getcwd()
+        os.chdir(work)
+        try:
+            import scraper  # reads SIPE_URL at import
+
+            scraper.SCRAPE_BACKEND = args.backend
+            scraper.SCRAPE_MAX_PAGES = args.max_pages
+            scraper.SCRAPE_CACHE = args.cache
+            scraper.SCRAPE_SESSION_CACHE = False
+
+            print(f"Fake SIPE on {sipe.url}, {args.backend} backend, {args.start}..{args.end}")
+            runs = [run_once(scraper, args.start, args.end, args.concurrent) for _ in range(args.runs)]
+            scraper.close_warm_browser()
+        finally:
+            os.chdir(cwd)
+
+        print_report(runs)
+        print(f"\nserver requests: {sipe.state.requests}")
+        if sipe.state.injected:
+            print(f"injected failures: {len(sipe.state.injected)}")
+
+    if json_path is not None:
+        json_path.write_text(json.dumps({"args": vars(args), "runs": runs}, indent=2, default=str), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Resumen table: old join_pivots/add_totals_and_result chain vs the single-pass
+modules.summary.summarize engine, on synthetic rows. tests/test_summary.py
+checks that both give exactly the same numbers.
+
+    python -m benchmarks.bench_summary --years 5 --rows-per-month 2000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from modules import gastos, sueldos
+from modules.helpers import pivot_by_period, join_pivots, add_totals_and_result, period_keys
+from modules.summary import stack_records, summarize
+
+
+def synthetic(n: int, years: int, secciones: list[str], seed: int) -> pd.DataFrame:
+    rnd = np.random.default_rng(seed)
+    start = pd.Timestamp(2025 - years + 1, 1, 1)
+    days = rnd.integers(0, 365 * years, n)
+    return pd.DataFrame({
+        "seccion": rnd.choice(secciones, n),
+        "fecha": start + pd.to_timedelta(days, unit="D"),
+        "total": rnd.uniform(1_000, 900_000, n),
+    })
+
+
+def old_chain(g, s, st, f, granularity: str = "monthly") -> pd.DataFrame:
+    g = g.assign(seccion=pd.Categorical(g["seccion"], categories=gastos.SECTION_ORDER, ordered=True))
+    g = pivot_by_period(g, "fecha", "seccion", "total", granularity=granularity)
+    s = s.assign(seccion=pd.Categorical(s["seccion"], categories=sueldos.SECTION_ORDER, ordered=True))
+    s = pivot_by_period(s, "fecha", "seccion", "total", granularity=granularity)
+    st = pivot_by_period(st, "fecha", [], "total", granularity=granularity)
+    f = pivot_by_period(f, "fecha", [], "total", granularity=granularity)
+
+    spendings = join_pivots(g, s)
+    spendings = join_pivots(spendings, st, b_label="stock")
+    return add_totals_and_result(spendings, f)
+
+
+SECTIONS = {"gastos": gastos.SECTION_ORDER, "sueldos": sueldos.SECTION_ORDER, "stock": ["stock"]}
+
+
+def records(g, s, st, f, granularity: str = "monthly") -> pd.DataFrame:
+    frames = {"gastos": g, "sueldos": s, "stock": st.assign(seccion="stock"), "facturacion": f.assign(seccion="facturacion")}
+    return stack_records({
+        name: df.assign(period=period_keys(df, "fecha", granularity)).rename(columns={"total": "amount"})
+        for name, df in frames.items()
+    })
+
+
+def engine(g, s, st, f, granularity: str = "monthly") -> pd.DataFrame:
+    return summarize(records(g, s, st, f, granularity), SECTIONS)
+
+
+def timed(fn, *args, repeat: int = 3):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return out, best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--rows-per-month", type=int, default=2000)
+    args = parser.parse_args()
+
+    n = args.years * 12 * args.rows_per_month
+    g = synthetic(n, args.years, gastos.SECTION_ORDER, 1)
+    s = synthetic(n // 10, args.years, sueldos.SECTION_ORDER, 2)
+    st = synthetic(n // 2, args.years, ["stock"], 3)
+    f = synthetic(n, args.years, ["facturacion"], 4)
+    print(f"{n} gastos rows over {args.years} years")
+
+    _, old_secs = timed(old_chain, g, s, st, f)
+    _, new_secs = timed(engine, g, s, st, f)
+
+    print(f"chain  {old_secs * 1000:8.1f} ms")
+    print(f"engine {new_secs * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
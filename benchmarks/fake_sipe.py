@@ -0,0 +1,416 @@
+"""
+Local stand-in for the SIPE web app, for timing scraper.py offline.
+
+Same shape as the real site where the scraper touches it: the ASP.NET login
+form (UsuarioTX/ClaveTX, Ingresar), the menu list items with their
+__doPostBack links, the Filtro_* date inputs, the Filtrar/Exportar buttons
+and the .xlsx download (benchmarks/synthetic.py data for the asked range).
+Every step can be slowed down and made to fail.
+
+    python -m benchmarks.fake_sipe --port 8765 --delay filtrar=1.5 --delay exportar=3 \\
+        --fail sg/stock/exportar:1
+    SIPE_URL=http://127.0.0.1:8765 APP_USER=bench APP_PASS=bench python controller.py
+
+Steps (for --delay/--fail): login, page (home and report pages), filtrar, exportar.
+"""
+import argparse
+import html
+import io
+import random
+import secrets
+import threading
+import time
+import urllib.parse
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.synthetic import Volume, export_rows, write_export
+
+# application path -> tenant, as in scraper.BASE_URL_*
+TENANT_APPS = {"Bolciti": "sg", "Bolciti2": "s2"}
+
+PREFIX = "ctl00$ContentPlaceHolder1$"
+USER_FIELD = PREFIX + "UsuarioTX"
+PASS_FIELD = PREFIX + "ClaveTX"
+LOGIN_BUTTON = PREFIX + "btnIngresar"
+FILTER_BUTTON = PREFIX + "btnFiltrar"
+EXPORT_BUTTON = PREFIX + "btnExportar"
+REPORT_FIELD = PREFIX + "hdnReporte"
+MENU_TARGET = "ctl00$Menu"
+
+# menu section -> [(link text, export, from filtro, to filtro)]; export None = page without data
+MENU = {
+    "Sueldos y Otros Empleados": [("Sueldos", "sueldos", 2, 3), ("Anticipos", None, 2, 3)],
+    "Ventas Grupos Clientes Notas": [("Facturas", "facturas", 4, 5), ("Notas de Credito", None, 4, 5)],
+    "Compras Proveedores Facturas": [("Facturas Gastos", "gastos", 2, 3), ("Facturas Mercaderia", "stock", 2, 3)],
+    "Tesoreria": [("Cheques en Cartera", None, 2, 3)],
+}
+LINKS = {f"{section}/{text}": (text, export, lo, hi) for section, links in MENU.items() for text, export, lo, hi in links}
+
+STEPS = ("login", "page", "filtrar", "exportar")
+XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+@dataclass
+class Failure:
+    '''Answer `times` requests of a step with a server error (tenant/report "*" = any)'''
+    tenant: str
+    report: str
+    step: str
+    times: int = 1
+
+    def matches(self, tenant: str, report: str, step: str) -> bool:
+        return (
+            self.times > 0
+            and self.step == step
+            and self.tenant in ("*", tenant)
+            and self.report in ("*", report)
+        )
+
+
+@dataclass
+class FakeSipeConfig:
+    user: str = "bench"
+    password: str = "bench"
+    delays: dict[str, float] = field(default_factory=dict)   # step -> seconds
+    jitter: float = 0.0                                       # +- share of each delay
+    fail_rate: float = 0.0                                    # random errors on filtrar/exportar
+    failures: list[Failure] = field(default_factory=list)
+    bytes_per_second: int | None = None                       # download speed (None = as fast as it goes)
+    volume: Volume = field(default_factory=Volume)
+    scale: float = 1
+    seed: int = 0
+
+
+class _State:
+    def __init__(self, config: FakeSipeConfig):
+        self.config = config
+        self.sessions: dict[str, str] = {}   # session id -> tenant
+        self.requests: dict[str, int] = {step: 0 for step in STEPS}
+        self.injected: list[dict] = []
+        self.lock = threading.Lock()
+        self.rnd = random.Random(config.seed)
+
+    def should_fail(self, tenant: str, report: str, step: str) -> bool:
+        with self.lock:
+            rule = next((f for f in self.config.failures if f.matches(tenant, report, step)), None)
+            if rule is not None:
+                rule.times -= 1
+            elif not (step in ("filtrar", "exportar") and self.rnd.random() < self.config.fail_rate):
+                return False
+            self.injected.append({"tenant": tenant, "report": report, "step": step})
+            return True
+
+    def delay(self, step: str) -> None:
+        '''Called once per request of a step: counts it and sleeps the configured delay'''
+        secs = self.config.delays.get(step, 0.0)
+        with self.lock:
+            self.requests[step] += 1
+            if secs and self.config.jitter:
+                secs *= 1 + self.rnd.uniform(-self.config.jitter, self.config.jitter)
+        if secs > 0:
+            time.sleep(secs)
+
+
+def _parse_date(text: str) -> date | None:
+    try:
+        return datetime.strptime(text.strip(), "%d/%m/%Y").date()
+    except ValueError:
+        return None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "Microsoft-IIS/10.0"
+    state: _State  # set per server
+
+    def log_message(self, format, *args):
+        pass
+
+    # -- request plumbing
+
+    def _app(self) -> tuple[str, str] | None:
+        parts = urllib.parse.urlsplit(self.path).path.strip("/").split("/")
+        if len(parts) == 2 and parts[0] in TENANT_APPS and parts[1].lower() == "default.aspx":
+            return parts[0], TENANT_APPS[parts[0]]
+        return None
+
+    def _session(self, app: str) -> str | None:
+        for part in self.headers.get("Cookie", "").split(";"):
+            name, _, value = part.strip().partition("=")
+            if name == "ASP.NET_SessionId" and self.state.sessions.get(value) == app:
+                return value
+        return None
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: dict | None = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+
+        speed = self.state.config.bytes_per_second
+        chunk = speed // 10 if speed else len(body) or 1
+        for i in range(0, len(body), chunk):
+            self.wfile.write(body[i:i + chunk])
+            if speed:
+                time.sleep(0.1)
+
+    def _html(self, text: str, status: int = 200, headers: dict | None = None) -> None:
+        self._send(status, text.encode("utf-8"), "text/html; charset=utf-8", headers)
+
+    def _error(self) -> None:
+        self._html("<html><body><h1>Server Error in '/' Application.</h1>"
+                   "<p>Runtime Error (injected by fake_sipe)</p></body></html>", status=500)
+
+    # -- pages
+
+    def _form(self, body: str, hidden: dict | None = None) -> str:
+        query = urllib.parse.urlsplit(self.path).query
+        fields = {
+            "__EVENTTARGET": "",
+            "__EVENTARGUMENT": "",
+            # real viewstates are a few KB that every postback carries back
+            "__VIEWSTATE": secrets.token_urlsafe(3000),
+            **(hidden or {}),
+        }
+        inputs = "".join(
+            f'<input type="hidden" name="{html.escape(k)}" id="{html.escape(k.replace("$", "_"))}" value="{html.escape(v)}">'
+            for k, v in fields.items()
+        )
+        return f"""<!DOCTYPE html>
+<html><head><title>SIPE</title>
+<script>
+function __doPostBack(target, argument) {{
+  var f = document.forms['aspnetForm'];
+  f.__EVENTTARGET.value = target; f.__EVENTARGUMENT.value = argument; f.submit();
+}}
+function toggleMenu(span) {{
+  var ul = span.parentNode.querySelector('ul');
+  ul.style.display = ul.style.display === 'none' ? 'block' : 'none';
+}}
+</script></head>
+<body><form method="post" action="./Default.aspx?{html.escape(query)}" id="aspnetForm" name="aspnetForm">
+{inputs}
+{body}
+</form></body></html>"""
+
+    def _login_page(self, message: str = "") -> str:
+        return self._form(f"""
+<div class="login">
+  <label>Usuario <input type="text" name="{USER_FIELD}" id="{USER_FIELD.replace("$", "_")}"></label>
+  <label>Clave <input type="password" name="{PASS_FIELD}" id="{PASS_FIELD.replace("$", "_")}"></label>
+  <input type="submit" name="{LOGIN_BUTTON}" value="Ingresar">
+  <span class="error">{html.escape(message)}</span>
+</div>""")
+
+    def _menu(self) -> str:
+        sections = []
+        for section, links in MENU.items():
+            items = "".join(
+                f"<li><a href=\"javascript:__doPostBack('{MENU_TARGET}','{html.escape(section)}/{html.escape(text)}')\">"
+                f"{html.escape(text)}</a></li>"
+                for text, *_ in links
+            )
+            sections.append(
+                f'<li><span onclick="toggleMenu(this)">{html.escape(section)}</span>'
+                f'<ul style="display:none">{items}</ul></li>'
+            )
+        return f'<ul id="menu">{"".join(sections)}</ul>'
+
+    def _home_page(self) -> str:
+        return self._form(f"{self._menu()}<div id='contenido'>Bienvenido</div>")
+
+    def _report_page(self, link: str, values: dict, result: str = "") -> str:
+        text, _, lo, hi = LINKS[link]
+        filtros = []
+        for n in range(1, 6):
+            name = f"{PREFIX}Filtro_{n}"
+            label = "Desde" if n == lo else "Hasta" if n == hi else f"Filtro {n}"
+            filtros.append(
+                f'<label>{label} <input type="text" name="{name}" id="{name.replace("$", "_")}" '
+                f'value="{html.escape(values.get(name, ""))}"></label>'
+            )
+        return self._form(f"""{self._menu()}
+<div id="contenido"><h2>{html.escape(text)}</h2>
+  {"".join(filtros)}
+  <input type="submit" name="{FILTER_BUTTON}" value="Filtrar">
+  <input type="submit" name="{EXPORT_BUTTON}" value="Exportar">
+  <div id="grilla">{result}</div>
+</div>""", hidden={REPORT_FIELD: link})
+
+    # -- verbs
+
+    def do_GET(self):
+        app = self._app()
+        if app is None:
+            return self._html("<h1>404</h1>", status=404)
+        self.state.delay("page")
+        if self._session(app[0]) is None:
+            return self._html(self._login_page())
+        self._html(self._home_page())
+
+    def do_POST(self):
+        app = self._app()
+        if app is None:
+            return self._html("<h1>404</h1>", status=404)
+        app_name, tenant = app
+        length = int(self.headers.get("Content-Length", 0))
+        form = {k: v[-1] for k, v in urllib.parse.parse_qs(self.rfile.read(length).decode(), keep_blank_values=True).items()}
+
+        if LOGIN_BUTTON in form:
+            return self._login(app_name, tenant, form)
+        if self._session(app_name) is None:
+            return self._html(self._login_page("Sesion expirada"))
+
+        link = form.get(REPORT_FIELD, "")
+        if form.get("__EVENTTARGET") == MENU_TARGET:
+            link = form.get("__EVENTARGUMENT", "")
+            if link not in LINKS:
+                return self._error()
+            self.state.delay("page")
+            return self._html(self._report_page(link, {}))
+
+        if link not in LINKS:
+            self.state.delay("page")
+            return self._html(self._home_page())
+
+        _, export, lo, hi = LINKS[link]
+        start = _parse_date(form.get(f"{PREFIX}Filtro_{lo}", ""))
+        end = _parse_date(form.get(f"{PREFIX}Filtro_{hi}", ""))
+        step = "exportar" if EXPORT_BUTTON in form else "filtrar" if FILTER_BUTTON in form else "page"
+
+        if step != "page" and self.state.should_fail(tenant, export or "-", step):
+            self.state.delay(step)
+            return self._error()
+        self.state.delay(step)
+
+        if step == "exportar":
+            return self._export(export, tenant, start, end)
+        result = ""
+        if step == "filtrar":
+            if start is None or end is None:
+                result = "Fechas invalidas"
+            else:
+                rows = sum(1 for _ in self._rows(export, tenant, start, end))
+                result = f"{rows} registros"
+        self._html(self._report_page(link, form, result))
+
+    def _login(self, app_name: str, tenant: str, form: dict) -> None:
+        self.state.delay("login")
+        if self.state.should_fail(tenant, "-", "login"):
+            return self._error()
+        config = self.state.config
+        if form.get(USER_FIELD) != config.user or form.get(PASS_FIELD) != config.password:
+            return self._html(self._login_page("Usuario o clave incorrectos"))
+
+        session = secrets.token_hex(12)
+        with self.state.lock:
+            self.state.sessions[session] = app_name
+        self._html(self._home_page(), headers={
+            "Set-Cookie": f"ASP.NET_SessionId={session}; path=/{app_name}/; HttpOnly",
+        })
+
+    def _rows(self, export: str | None, tenant: str, start: date, end: date):
+        if export is None or end < start:
+            return iter(())
+        config = self.state.config
+        return export_rows(export, tenant, start, end, config.volume, config.scale, config.seed)
+
+    def _export(self, export: str | None, tenant: str, start: date | None, end: date | None) -> None:
+        if export is None or start is None or end is None:
+            return self._error()
+        out = io.BytesIO()
+        write_export(out, export, self._rows(export, tenant, start, end))
+        self._send(200, out.getvalue(), XLSX, {"Content-Disposition": 'attachment; filename="Reporte.xlsx"'})
+
+
+class FakeSipe:
+    '''The server on a background thread: `with FakeSipe(config) as sipe: ... sipe.url`'''
+
+    def __init__(self, config: FakeSipeConfig = FakeSipeConfig(), host: str = "127.0.0.1", port: int = 0):
+        self.state = _State(config)
+        handler = type("Handler", (_Handler,), {"state": self.state})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeSipe":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "FakeSipe":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def _delay(value: str) -> tuple[str, float]:
+    step, _, secs = value.partition("=")
+    if step not in STEPS:
+        raise argparse.ArgumentTypeError(f"step must be one of {', '.join(STEPS)}")
+    return step, float(secs)
+
+
+def _failure(value: str) -> Failure:
+    '''tenant/report/step[:times], e.g. sg/stock/exportar:2 or */*/filtrar'''
+    spec, _, times = value.partition(":")
+    parts = spec.split("/")
+    if len(parts) != 3 or parts[2] not in STEPS:
+        raise argparse.ArgumentTypeError("use tenant/report/step[:times], e.g. sg/stock/exportar:1")
+    return Failure(*parts, times=int(times or 1))
+
+
+def add_server_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--delay", type=_delay, action="append", default=[], metavar="STEP=SECONDS",
+                        help=f"server-side delay of a step ({', '.join(STEPS)}); repeatable")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+- share of every delay, e.g. 0.3")
+    parser.add_argument("--fail", type=_failure, action="append", default=[], metavar="TENANT/REPORT/STEP[:N]",
+                        help="answer the first N matching requests with a 500; * matches any tenant/report")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="share of filtrar/exportar requests that fail")
+    parser.add_argument("--kbps", type=int, default=None, help="download speed of the exports in KB/s")
+    parser.add_argument("--scale", type=float, default=1, help="volume of the exports (see benchmarks.synthetic)")
+
+
+def config_from_args(args) -> FakeSipeConfig:
+    return FakeSipeConfig(
+        delays=dict(args.delay),
+        jitter=args.jitter,
+        fail_rate=args.fail_rate,
+        failures=list(args.fail),
+        bytes_per_second=args.kbps * 1024 if args.kbps else None,
+        scale=args.scale,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    sipe = FakeSipe(config_from_args(args), args.host, args.port)
+    print(f"Fake SIPE on {sipe.url} (user/pass: {sipe.state.config.user}/{sipe.state.config.password})")
+    try:
+        sipe.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sipe.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+Recorded SIPE responses and a local server that replays them, so http_export.py
+can be checked without the site (tests/test_http_export.py).
+
+record drives http_export.HttpExportClient through the login and the asked
+exports and saves every response (headers, body) to a folder, with
+which click on which page asked for it. It never saves what was posted, so the
+password stays out of it. The export bodies are the real report data: keep the
+range short.
+
+    SIPE_URL=https://nube2.sipe.com.ar python -m benchmarks.replay_sipe record \\
+        --out /tmp/sipe --tenant sg --report gastos --start 2024-01-01 --end 2024-01-31
+    python -m benchmarks.replay_sipe record --fake --out tests/sipe --report gastos --report facturas
+
+ReplaySipe answers a request with the recorded response of the same click on
+the same page: the page is told apart by the __VIEWSTATE it posts back, so a
+client that does not send back the page's fields gets a 404.
+"""
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import urllib.parse
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from http_export import HttpExportClient
+
+EXCHANGES = "exchanges.json"
+KEPT_HEADERS = ("Content-Type", "Content-Disposition", "Set-Cookie")
+
+
+def viewstate_hash(form: dict) -> str | None:
+    value = form.get("__VIEWSTATE")
+    return hashlib.sha1(value.encode("utf-8")).hexdigest() if value is not None else None
+
+
+def _click(action) -> dict | None:
+    if action is None:
+        return None
+    if action[0] == "submit":
+        return {"field": action[1]}
+    return {"target": action[1], "argument": action[2]}
+
+
+class RecordingClient(HttpExportClient):
+    '''HttpExportClient that writes every answer to `out` (see the module docstring)'''
+
+    def __init__(self, out: Path, timeout: float = 120):
+        super().__init__(timeout)
+        self.out = Path(out)
+        self.out.mkdir(parents=True, exist_ok=True)
+        self.exchanges: list[dict] = []
+        self._action = None
+
+    def _post_data(self, page, action, values):
+        self._action = action
+        return super()._post_data(page, action, values)
+
+    def _open(self, url: str, data: dict | None = None):
+        final_url, headers, body = super()._open(url, data)
+        parts = urllib.parse.urlsplit(url)
+        content_type = headers.get("Content-Type", "")
+        name = f"{len(self.exchanges):02d}.{'html' if 'html' in content_type else 'bin'}"
+        (self.out / name).write_bytes(body)
+        self.exchanges.append({
+            "method": "GET" if data is None else "POST",
+            "path": parts.path + (f"?{parts.query}" if parts.query else ""),
+            "session": any(True for _ in self.jar) if data is None else None,
+            "viewstate": viewstate_hash(data) if data is not None else None,
+            "click": _click(self._action) if data is not None else None,
+            "headers": {k: headers[k] for k in KEPT_HEADERS if headers.get(k)},
+            "body": name,
+        })
+        self._action = None
+        (self.out / EXCHANGES).write_text(json.dumps(self.exchanges, indent=2), encoding="utf-8")
+        return final_url, headers, body
+
+
+def record(out: Path, url: str, user: str, pw: str, reports: list[str], start: date, end: date) -> list[dict]:
+    '''Logs in to `url` and exports `reports` (scraper.REPORTS keys or file names), saving every answer'''
+    import scraper
+
+    specs = [spec for key, spec in scraper.REPORTS.items() if key in reports or spec.file in reports]
+    client = RecordingClient(out)
+    home = client.login(url, user, pw, scraper.USER_INPUT.lstrip("#"), scraper.PASS_INPUT.lstrip("#"))
+    with tempfile.TemporaryDirectory() as tmp:  # the recorded answer already holds the file
+        for spec in specs:
+            client.export(home, spec, start, end, Path(tmp) / f"{spec.file}.xlsx")
+    return client.exchanges
+
+
+class _Handler(BaseHTTPRequestHandler):
+    replay: "ReplaySipe"  # set per server
+
+    def log_message(self, format, *args):
+        pass
+
+    def _answer(self, exchange: dict | None) -> None:
+        if exchange is None:
+            body = b"<html><body><h1>404</h1><p>not recorded</p></body></html>"
+            self.send_response(404)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+        else:
+            body = (self.replay.folder / exchange["body"]).read_bytes()
+            self.send_response(200)
+            for k, v in exchange["headers"].items():
+                self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        session = "Cookie" in self.headers
+        self.replay.received.append(("GET", self.path, {}))
+        self._answer(self.replay.find("GET", self.path, lambda e: e["session"] == session))
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        form = {
+            k: v[-1]
+            for k, v in urllib.parse.parse_qs(self.rfile.read(length).decode(), keep_blank_values=True).items()
+        }
+        self.replay.received.append(("POST", self.path, form))
+        state = viewstate_hash(form)
+
+        def clicked(e: dict) -> bool:
+            click = e["click"] or {}
+            if "field" in click:
+                hit = click["field"] in form
+            else:
+                hit = (form.get("__EVENTTARGET"), form.get("__EVENTARGUMENT")) == (click.get("target"), click.get("argument"))
+            return hit and e["viewstate"] == state
+
+        self._answer(self.replay.find("POST", self.path, clicked))
+
+
+class ReplaySipe:
+    '''The recorded folder served on a background thread: `with ReplaySipe(folder) as sipe: ... sipe.url`'''
+
+    def __init__(self, folder: Path, host: str = "127.0.0.1", port: int = 0):
+        self.folder = Path(folder)
+        self.exchanges = json.loads((self.folder / EXCHANGES).read_text(encoding="utf-8"))
+        self.received: list[tuple[str, str, dict]] = []   # (method, path, posted form)
+        handler = type("Handler", (_Handler,), {"replay": self})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+
+    def find(self, method: str, path: str, matches) -> dict | None:
+        return next(
+            (e for e in self.exchanges if e["method"] == method and e["path"] == path and matches(e)),
+            None,
+        )
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "ReplaySipe":
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rec = commands.add_parser("record", help="save the answers of a login and some exports")
+    rec.add_argument("--out", type=Path, required=True)
+    rec.add_argument("--tenant", choices=["sg", "s2"], default="sg")
+    rec.add_argument("--report", action="append", required=True, help="scraper.REPORTS key or file name; repeatable")
+    rec.add_argument("--start", type=date.fromisoformat, default=date(2026, 1, 1))
+    rec.add_argument("--end", type=date.fromisoformat, default=date(2026, 1, 31))
+    rec.add_argument("--fake", action="store_true", help="record benchmarks/fake_sipe instead of SIPE_URL")
+
+    serve = commands.add_parser("serve", help="replay a recorded folder")
+    serve.add_argument("folder", type=Path)
+    serve.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        replay = ReplaySipe(args.folder, port=args.port)
+        print(f"Replaying {args.folder} on {replay.url}")
+        try:
+            replay.httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return
+
+    if args.fake:
+        from benchmarks.fake_sipe import FakeSipe
+
+        with FakeSipe() as sipe:
+            os.environ.update(SIPE_URL=sipe.url, APP_USER=sipe.state.config.user, APP_PASS=sipe.state.config.password)
+            _record(args)
+    else:
+        _record(args)
+
+
+def _record(args) -> None:
+    import scraper  # reads SIPE_URL at import
+
+    exchanges = record(args.out, scraper.TENANTS[args.tenant], os.environ["APP_USER"], os.environ["APP_PASS"], args.report, args.start, args.end)
+    print(f"{len(exchanges)} answers saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
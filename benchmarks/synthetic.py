@@ -0,0 +1,217 @@
+"""
+Synthetic SIPE exports: {sueldos,facturas,gastos,stock}-{sg,s2}.xlsx with the
+real header offsets (5/7/6/6 title rows), column names and the extra columns
+SIPE adds, so the whole pipeline runs without live downloads.
+
+Names are taken from the SECTION_MAPs and written with the variants the real
+exports have (case, doubled/trailing spaces, missing accents), plus names that
+are in no map and a few empty cells.
+
+    python -m benchmarks.synthetic --out /tmp/res --scale 10
+    python -m processor --input /tmp/res
+
+--scale multiplies rows, employees and clients (1 = a normal month's volume,
+for every month of --years).
+"""
+import argparse
+import calendar
+import random
+import unicodedata
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+
+from openpyxl import Workbook
+
+from modules import gastos, sueldos
+from modules.loader import REPORTS, TENANTS
+
+# header row of each export, as SIPE writes it (standardized by the loader)
+HEADERS = {
+    "sueldos":  ["Legajo", "Empleado", "Fecha Cierre", "Concepto", "Total"],
+    "facturas": ["Comprobante", "Numero", "Cliente", "Fecha", "CUIT", "Neto", "IVA", "Total", "Vendedor"],
+    "gastos":   ["Tipo Gasto", "Proveedor", "Fecha", "Total", "Comprobante", "Numero", "CUIT", "Neto", "IVA", "Observaciones"],
+    "stock":    ["Tipo Gasto", "Proveedor", "Fecha", "Total", "Comprobante", "Numero", "Deposito"],
+}
+
+# share of rows whose name is in no SECTION_MAP / is left empty
+UNMAPPED_SHARE = 0.1
+EMPTY_SHARE = 0.005
+
+
+@dataclass
+class Volume:
+    years: int = 1
+    employees: int = 25
+    clients: int = 150
+    providers: int = 60
+    rows_per_month: int = 200  # facturas and gastos rows per tenant and month; stock gets half
+
+    def scaled(self, scale: float) -> "Volume":
+        return Volume(
+            years=self.years,
+            employees=max(1, round(self.employees * scale)),
+            clients=max(1, round(self.clients * scale)),
+            providers=self.providers,
+            rows_per_month=max(1, round(self.rows_per_month * scale)),
+        )
+
+
+def _unaccented(name: str) -> str:
+    text = unicodedata.normalize("NFKD", name)
+    return "".join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def name_variants(name: str) -> list[str]:
+    '''How the same name shows up across exports'''
+    return [
+        name,
+        name.strip(),
+        f" {name.strip()}  ",
+        name.strip().replace(" ", "  ", 1),
+        name.strip().title(),
+        _unaccented(name.strip()),
+    ]
+
+
+def _pick_name(rnd: random.Random, mapped: list[str], unmapped: list[str]):
+    roll = rnd.random()
+    if roll < EMPTY_SHARE:
+        return None
+    if roll < EMPTY_SHARE + UNMAPPED_SHARE:
+        return rnd.choice(unmapped)
+    return rnd.choice(name_variants(rnd.choice(mapped)))
+
+
+def _months(first: date, last: date):
+    year, month = first.year, first.month
+    while (year, month) <= (last.year, last.month):
+        yield year, month
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def _year_range(years: int) -> tuple[date, date]:
+    last = date.today().year
+    return date(last - years + 1, 1, 1), date(last, 12, 31)
+
+
+def _staff(v: Volume, seed: str) -> list[str]:
+    rnd = random.Random(f"{seed}-staff")
+    mapped = list(sueldos.SECTION_MAP)
+    return [
+        rnd.choice(name_variants(mapped[i])) if i < len(mapped) else f"EMPLEADO {i:05d}"
+        for i in range(v.employees)
+    ]
+
+
+def _sueldos_month(rnd: random.Random, v: Volume, year: int, month: int, staff: list[str]):
+    closing = date(year, month, calendar.monthrange(year, month)[1])
+    concepts = ["SUELDO", "AGUINALDO"] if month in (6, 12) else ["SUELDO"]
+    for legajo, name in enumerate(staff, start=1):
+        for concept in concepts:
+            total = round(rnd.uniform(400_000, 2_500_000) / (2 if concept == "AGUINALDO" else 1), 2)
+            yield [legajo, name, closing, concept, total]
+
+
+def _facturas_month(rnd: random.Random, v: Volume, year: int, month: int, staff):
+    days = calendar.monthrange(year, month)[1]
+    for _ in range(v.rows_per_month):
+        neto = round(rnd.uniform(10_000, 3_000_000), 2)
+        client = None if rnd.random() < EMPTY_SHARE else f"CLIENTE {rnd.randrange(v.clients):05d} S.A."
+        yield ["FC A", rnd.randint(1, 99_999_999), client, date(year, month, rnd.randint(1, days)),
+               "30-12345678-9", neto, round(neto * 0.21, 2), round(neto * 1.21, 2), "MOSTRADOR"]
+
+
+def _gastos_month(rnd: random.Random, v: Volume, year: int, month: int, staff, rows: int | None = None, extra=None):
+    mapped = list(gastos.SECTION_MAP)
+    unmapped = [f"GASTO VARIO {i}" for i in range(20)]
+    if extra is None:
+        extra = lambda total: ["30-12345678-9", round(total / 1.21, 2), round(total - total / 1.21, 2), ""]
+    days = calendar.monthrange(year, month)[1]
+    for _ in range(v.rows_per_month if rows is None else rows):
+        total = round(rnd.uniform(1_000, 900_000), 2)
+        yield [_pick_name(rnd, mapped, unmapped), f"PROVEEDOR {rnd.randrange(v.providers):04d}",
+               date(year, month, rnd.randint(1, days)), total, "FC A", rnd.randint(1, 99_999_999), *extra(total)]
+
+
+def _stock_month(rnd: random.Random, v: Volume, year: int, month: int, staff):
+    return _gastos_month(rnd, v, year, month, staff, max(1, v.rows_per_month // 2), lambda total: ["DEPOSITO 1"])
+
+
+MONTH_ROWS = {
+    "sueldos": _sueldos_month,
+    "facturas": _facturas_month,
+    "gastos": _gastos_month,
+    "stock": _stock_month,
+}
+
+
+def export_rows(report: str, tenant: str, start: date, end: date,
+                volume: Volume = Volume(), scale: float = 1, seed: int = 0):
+    '''
+    Data rows of one export for the dates [start, end]. Each month is drawn from
+    its own seed, so month-by-month exports add up to the whole-range one.
+    '''
+    # negros are a smaller share of the volume
+    v = volume.scaled(scale if tenant == TENANTS[0] else scale * 0.3)
+    key = f"{seed}-{tenant}"
+    staff = _staff(v, key)
+    date_idx = HEADERS[report].index("Fecha Cierre" if report == "sueldos" else "Fecha")
+
+    for year, month in _months(start, end):
+        rnd = random.Random(f"{key}-{report}-{year}-{month:02d}")
+        for row in MONTH_ROWS[report](rnd, v, year, month, staff):
+            if start <= row[date_idx] <= end:
+                yield row
+
+
+def write_export(out, report: str, rows) -> int:
+    '''One export with SIPE's layout to a path or a binary file object. Returns the data rows'''
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Hoja1")
+    for i in range(REPORTS[report]["header"]):
+        ws.append([f"SIPE - {report} ({i})"])
+    ws.append(HEADERS[report])
+
+    count = 0
+    for row in rows:
+        ws.append(row)
+        count += 1
+    wb.save(out)
+    return count
+
+
+def write_exports(out_dir: Path, volume: Volume = Volume(), scale: float = 1, seed: int = 0) -> dict[str, int]:
+    '''Writes every {report}-{tenant}.xlsx (volume.years up to this year) into out_dir. Returns rows per file'''
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    start, end = _year_range(volume.years)
+
+    counts = {}
+    for tenant in TENANTS:
+        for report in MONTH_ROWS:
+            name = f"{report}-{tenant}"
+            rows = export_rows(report, tenant, start, end, volume, scale, seed)
+            counts[name] = write_export(out_dir / f"{name}.xlsx", report, rows)
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", type=Path, required=True, help="folder to write the exports to")
+    parser.add_argument("--scale", type=float, default=1)
+    parser.add_argument("--years", type=int, default=Volume.years)
+    parser.add_argument("--employees", type=int, default=Volume.employees)
+    parser.add_argument("--clients", type=int, default=Volume.clients)
+    parser.add_argument("--rows-per-month", type=int, default=Volume.rows_per_month)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    volume = Volume(years=args.years, employees=args.employees, clients=args.clients, rows_per_month=args.rows_per_month)
+    counts = write_exports(args.out, volume, args.scale, args.seed)
+    for name, n in counts.items():
+        print(f"{name:<14} {n:>9} rows")
+
+
+if __name__ == "__main__":
+    main()
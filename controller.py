@@ -1,18 +1,35 @@
+from contextlib import ExitStack
 from datetime import date
 from pathlib import Path
 from scraper import scrape_exports
+from modules import instrument
+from runlock import run_lock
 import processor as p
 
+# Who is running, written in the lock file (refresh.py sets "refresh")
+RUN_OWNER = "app"
+
+# Seconds to wait for another run (app or scheduled refresh) to finish; None = until it does
+LOCK_TIMEOUT: float | None = None
+
 
 def run_controller(start: date, end: date, output_path: Path) -> None:
     if start > end:
         raise ValueError("Start date must be before or equal to end date")
 
-    # 1) Download + rename into res/
-    scrape_exports(start, end)
+    # scrape + process timed as one run: out/x.run.json (and x.pstats with RUN_PROFILE=1)
+    profile = instrument.profile_path(output_path) if instrument.RUN_PROFILE else None
+    with instrument.run("controller", instrument.run_report_path(output_path), profile), ExitStack() as held:
+        # one run at a time on res/ and the history database
+        with instrument.stage("wait_lock"):
+            held.enter_context(run_lock(RUN_OWNER, LOCK_TIMEOUT, on_wait=lambda who: print(f"Waiting for {who}...")))
+
+        # 1) Download + rename into res/
+        with instrument.stage("scrape"):
+            scrape_exports(start, end)
 
-    # 2) Process files from res/ and write output
-    p.run_processor(output_path)
+        # 2) Process files from res/ (kept in the history database too) and write output
+        p.run_processor(output_path, ingest=True, ingest_span=(start, end))
 
 
 # Optional: keep a dev/CLI default run
@@ -0,0 +1,276 @@
+import io
+import json
+import shutil
+import threading
+import zipfile
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+CACHE_DIR = Path("res") / "cache"
+MANIFEST_PATH = CACHE_DIR / "manifest.json"
+
+# What each res/{report}-{tenant}.xlsx was last joined from (and its own size/mtime),
+# so an unchanged one is not joined again and keeps its hash for the loader's staging
+STITCHED_PATH = CACHE_DIR / "stitched.json"
+# Written into joined files instead of the save time (see _join_parts)
+_JOINED_AT = datetime(1980, 1, 1)
+
+# Exports saved by a scrape that has not finished yet, one entry per
+# (tenant, report, date range): a rerun after a failure only downloads the rest
+CHECKPOINT_PATH = Path("res") / "checkpoint.json"
+
+_manifest_lock = threading.Lock()
+
+
+def month_windows(start: date, end: date) -> list[tuple[date, date]]:
+    """Splits [start, end] into one (from, to) window per calendar month."""
+    windows = []
+    first = start.replace(day=1)
+    while first <= end:
+        next_first = (first + timedelta(days=32)).replace(day=1)
+        last = next_first - timedelta(days=1)
+        windows.append((max(start, first), min(end, last)))
+        first = next_first
+    return windows
+
+
+def part_path(tenant: str, report: str, window_start: date) -> Path:
+    return CACHE_DIR / tenant / report / f"{window_start:%Y-%m}.xlsx"
+
+
+def span_path(tenant: str, report: str, window_start: date, window_end: date) -> Path:
+    '''Where one export of several months waits to be split into their parts'''
+    return CACHE_DIR / tenant / report / f"{window_start:%Y-%m-%d}..{window_end:%Y-%m-%d}.xlsx"
+
+
+def _entry_key(tenant: str, report: str, window_start: date) -> str:
+    return f"{tenant}/{report}/{window_start:%Y-%m}"
+
+
+def load_manifest() -> dict:
+    if not MANIFEST_PATH.exists():
+        return {}
+    return json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+
+
+def is_fresh(manifest: dict, tenant: str, report: str, window: tuple[date, date], max_age: timedelta | None = None) -> bool:
+    '''
+    A part is reusable when it covers the same window and was fetched after the
+    window closed, or (still open windows) less than max_age ago or before the
+    fresh_until its download was recorded with.
+    '''
+    entry = manifest.get(_entry_key(tenant, report, window[0]))
+    if entry is None or not part_path(tenant, report, window[0]).exists():
+        return False
+
+    if entry["from"] != window[0].isoformat() or entry["to"] != window[1].isoformat():
+        return False
+
+    now = datetime.now()
+    fetched_at = datetime.fromisoformat(entry["fetched_at"])
+    if max_age is not None and now - fetched_at < max_age:
+        return True
+    if "fresh_until" in entry and now < datetime.fromisoformat(entry["fresh_until"]):
+        return True
+    return fetched_at.date() > window[1]
+
+
+def record(tenant: str, report: str, window: tuple[date, date], fresh_for: timedelta | None = None) -> None:
+    '''
+    Marks a freshly downloaded part in the manifest (safe to call from several
+    threads). With fresh_for, every run reuses it for that long even while its
+    window is open (the scheduled refresh passes its interval).
+    '''
+    now = datetime.now()
+    entry = {
+        "from": window[0].isoformat(),
+        "to": window[1].isoformat(),
+        "fetched_at": now.isoformat(timespec="seconds"),
+    }
+    if fresh_for is not None:
+        entry["fresh_until"] = (now + fresh_for).isoformat(timespec="seconds")
+
+    with _manifest_lock:
+        manifest = load_manifest()
+        manifest[_entry_key(tenant, report, window[0])] = entry
+        MANIFEST_PATH.parent.mkdir(parents=True, exist_ok=True)
+        MANIFEST_PATH.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8")
+
+
+def _checkpoint_key(tenant: str, report: str, window: tuple[date, date]) -> str:
+    return f"{tenant}/{report}/{window[0].isoformat()}..{window[1].isoformat()}"
+
+
+def _load_checkpoint() -> dict:
+    if not CHECKPOINT_PATH.exists():
+        return {}
+    return json.loads(CHECKPOINT_PATH.read_text(encoding="utf-8"))
+
+
+def checkpointed_paths(max_age: timedelta) -> set[Path]:
+    '''Files saved by an unfinished scrape less than max_age ago'''
+    now = datetime.now()
+    return {
+        Path(entry["path"])
+        for entry in _load_checkpoint().values()
+        if now - datetime.fromisoformat(entry["saved_at"]) < max_age
+    }
+
+
+def is_checkpointed(tenant: str, report: str, window: tuple[date, date], path: Path, max_age: timedelta) -> bool:
+    '''This export was already saved to path by an unfinished scrape, less than max_age ago'''
+    entry = _load_checkpoint().get(_checkpoint_key(tenant, report, window))
+    if entry is None or Path(entry["path"]) != Path(path) or not Path(path).exists():
+        return False
+    return datetime.now() - datetime.fromisoformat(entry["saved_at"]) < max_age
+
+
+def checkpoint(tenant: str, report: str, window: tuple[date, date], path: Path) -> None:
+    '''Marks one saved export (safe to call from several threads)'''
+    with _manifest_lock:
+        entries = _load_checkpoint()
+        entries[_checkpoint_key(tenant, report, window)] = {
+            "path": Path(path).as_posix(),
+            "saved_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        CHECKPOINT_PATH.parent.mkdir(parents=True, exist_ok=True)
+        CHECKPOINT_PATH.write_text(json.dumps(entries, indent=2, sort_keys=True), encoding="utf-8")
+
+
+def clear_checkpoint() -> None:
+    '''The scrape finished: the next one downloads everything it needs again'''
+    with _manifest_lock:
+        CHECKPOINT_PATH.unlink(missing_ok=True)
+
+
+def split_export(path: Path, parts: list[Path], windows: list[tuple[date, date]], header: int, date_column: str) -> None:
+    '''
+    Splits one export of several months into one part per window (in order),
+    each with the export's title and header rows, and removes it. Rows go to
+    the window of their date_column; the ones without a date that reads
+    (pd.to_datetime, as the loader does) go to the first window.
+    '''
+    # only for a download of several months
+    import pandas as pd
+    from openpyxl import Workbook, load_workbook
+
+    src = load_workbook(path, read_only=True)
+    try:
+        src_rows = src.active.iter_rows(values_only=True)
+        top = [row for _, row in zip(range(header + 1), src_rows)]
+        rows = [row for row in src_rows if any(v is not None for v in row)]
+    finally:
+        src.close()
+
+    names = [str(v).strip().lower().replace(" ", "_") for v in top[-1]]
+    col = names.index(date_column)
+    dates = pd.to_datetime(pd.Series([row[col] if col < len(row) else None for row in rows], dtype=object), errors="coerce")
+
+    # first window each row's date falls in, 0 when none does
+    bounds = [(pd.Timestamp(lo), pd.Timestamp(hi) + pd.Timedelta(days=1)) for lo, hi in windows]
+    slots = [
+        next((i for i, (lo, hi) in enumerate(bounds) if lo <= day < hi), 0) if not pd.isna(day) else 0
+        for day in dates
+    ]
+
+    for i, part in enumerate(parts):
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet()
+        for row in top:
+            ws.append(row)
+        for row, slot in zip(rows, slots):
+            if slot == i:
+                ws.append(row)
+        part.parent.mkdir(parents=True, exist_ok=True)
+        wb.save(part)
+
+    Path(path).unlink()
+
+
+def _stat(path: Path) -> list[int]:
+    st = Path(path).stat()
+    return [st.st_size, st.st_mtime_ns]
+
+
+def _load_stitched() -> dict:
+    if not STITCHED_PATH.exists():
+        return {}
+    return json.loads(STITCHED_PATH.read_text(encoding="utf-8"))
+
+
+def _stitch_entry(parts: list[Path], out_path: Path) -> dict:
+    return {"parts": [[Path(p).as_posix(), *_stat(p)] for p in parts], "out": _stat(out_path)}
+
+
+def is_stitched(parts: list[Path], out_path: Path) -> bool:
+    '''out_path was joined from exactly these parts, and neither it nor they changed since'''
+    entry = _load_stitched().get(Path(out_path).as_posix())
+    try:
+        return entry is not None and entry == _stitch_entry(parts, out_path)
+    except FileNotFoundError:
+        return False
+
+
+def stitched_outputs() -> set[Path]:
+    '''Files stitch_parts wrote (they may be current or not: it checks on the next call)'''
+    return {Path(out) for out in _load_stitched()}
+
+
+def stitch_parts(parts: list[Path], out_path: Path, header: int) -> bool:
+    """
+    Joins monthly exports into one file with the same layout the builders read
+    (`header` is the pandas header= offset of the report).
+    The first part is kept whole; only data rows are taken from the rest.
+    Does nothing if out_path is already the join of these parts; returns
+    whether it wrote the file.
+    """
+    if is_stitched(parts, out_path):
+        return False
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+
+    if len(parts) == 1:
+        shutil.copyfile(parts[0], out_path)
+    else:
+        _join_parts(parts, out_path, header)
+
+    with _manifest_lock:
+        stitched = _load_stitched()
+        stitched[Path(out_path).as_posix()] = _stitch_entry(parts, out_path)
+        STITCHED_PATH.parent.mkdir(parents=True, exist_ok=True)
+        STITCHED_PATH.write_text(json.dumps(stitched, indent=2, sort_keys=True), encoding="utf-8")
+    return True
+
+
+def _join_parts(parts: list[Path], out_path: Path, header: int) -> None:
+    # only when there are parts to join
+    from openpyxl import load_workbook
+    from openpyxl.xml.constants import ARC_CORE
+    from openpyxl.xml.functions import tostring
+
+    wb = load_workbook(parts[0])
+    ws = wb.active
+
+    first_data_row = header + 2  # header= is 0-based, openpyxl rows are 1-based
+    for part in parts[1:]:
+        src = load_workbook(part, read_only=True)
+        for row in src.active.iter_rows(min_row=first_data_row, values_only=True):
+            if any(v is not None for v in row):
+                ws.append(row)
+        src.close()
+
+    # openpyxl stamps the save time in the properties and on every zip entry:
+    # fix both, so the same parts always join to the same bytes and whatever is
+    # keyed by the file's hash (loader staging/aggregates) still hits after the
+    # refresh's narrower join came and went
+    buf = io.BytesIO()
+    wb.save(buf)
+    wb.properties.created = wb.properties.modified = _JOINED_AT
+    core = tostring(wb.properties.to_tree())
+    with zipfile.ZipFile(buf) as src, zipfile.ZipFile(out_path, "w", zipfile.ZIP_DEFLATED) as dst:
+        for info in src.infolist():
+            data = core if info.filename == ARC_CORE else src.read(info)
+            # a fresh ZipInfo is ZIP_STORED whatever the ZipFile says
+            entry = zipfile.ZipInfo(info.filename, _JOINED_AT.timetuple()[:6])
+            entry.compress_type = zipfile.ZIP_DEFLATED
+            dst.writestr(entry, data)
+
@@ -0,0 +1,238 @@
+"""
+Browserless export backend: replays the SIPE ASP.NET form posts with a plain
+HTTP client + cookie jar (viewstate, Filtro_* fields, Filtrar/Exportar buttons)
+and saves the report file straight from the response.
+
+Only uses the standard library. scraper.py falls back to Playwright if this fails.
+"""
+import re
+import urllib.parse
+import urllib.request
+from datetime import date
+from html.parser import HTMLParser
+from http.cookiejar import CookieJar
+from pathlib import Path
+
+POSTBACK_RE = re.compile(r"__doPostBack\(\s*'([^']*)'\s*,\s*'([^']*)'\s*\)")
+
+
+class _FormParser(HTMLParser):
+    '''Collects what a browser would post back: form fields, buttons and links'''
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.action = None
+        self.fields = {}        # name -> value posted with the form
+        self.ids = {}           # element id -> name
+        self.buttons = []       # (label, name, value)
+        self.links = []         # (label, href, menu section or None)
+        self._items = []        # open <li>s: the text of each one's <span>, None if it has none
+        self._span = None       # text of the menu section <span> being read
+        self._select = None
+        self._select_first = None
+        self._text_tag = None   # "a" or "button" while collecting its label
+        self._text_attrs = None
+        self._text = []
+
+    def handle_starttag(self, tag, attrs):
+        a = {k: (v if v is not None else "") for k, v in attrs}
+        name = a.get("name")
+        if name and a.get("id"):
+            self.ids[a["id"]] = name
+
+        if tag == "form" and self.action is None:
+            self.action = a.get("action", "")
+
+        elif tag == "input" and name:
+            kind = a.get("type", "text").lower()
+            if kind in ("submit", "button", "image"):
+                self.buttons.append((a.get("value", ""), name, a.get("value", "")))
+            elif kind in ("checkbox", "radio"):
+                if "checked" in a:
+                    self.fields[name] = a.get("value", "on")
+            else:
+                self.fields[name] = a.get("value", "")
+
+        elif tag == "select" and name:
+            self._select = name
+            self._select_first = None
+
+        elif tag == "option" and self._select:
+            value = a.get("value", "")
+            if self._select_first is None:
+                self._select_first = value
+                self.fields.setdefault(self._select, value)
+            if "selected" in a:
+                self.fields[self._select] = value
+
+        elif tag == "li":
+            self._items.append(None)
+
+        elif tag == "span" and self._items and self._items[-1] is None and self._span is None and not self._text_tag:
+            self._span = []
+
+        elif tag in ("a", "button"):
+            self._text_tag = tag
+            self._text_attrs = a
+            self._text = []
+
+    def handle_endtag(self, tag):
+        if tag == "select":
+            self._select = None
+        elif tag == "li" and self._items:
+            self._items.pop()
+        elif tag == "span" and self._span is not None:
+            self._items[-1] = " ".join("".join(self._span).split())
+            self._span = None
+        elif tag == self._text_tag:
+            label = " ".join("".join(self._text).split())
+            a = self._text_attrs
+            if tag == "a":
+                # a menu link belongs to the nearest list item titled by a <span>
+                section = next((s for s in reversed(self._items) if s), None)
+                self.links.append((label, a.get("href", ""), section))
+            elif a.get("name"):
+                self.buttons.append((label or a.get("value", ""), a["name"], a.get("value", "")))
+            self._text_tag = None
+
+    def handle_data(self, data):
+        if self._text_tag:
+            self._text.append(data)
+        if self._span is not None:
+            self._span.append(data)
+
+
+class AspNetPage:
+    def __init__(self, url: str, html: str):
+        self.url = url
+        self.html = html
+        parser = _FormParser()
+        parser.feed(html)
+        self.action = urllib.parse.urljoin(url, parser.action or url)
+        self.fields = parser.fields
+        self.ids = parser.ids
+        self.buttons = parser.buttons
+        self.links = parser.links
+
+    def has_id(self, element_id: str) -> bool:
+        return element_id in self.ids
+
+    def field_name(self, element_id: str) -> str:
+        try:
+            return self.ids[element_id]
+        except KeyError:
+            raise RuntimeError(f"Field '{element_id}' not found on {self.url}") from None
+
+    def find_action(self, label: str, exact: bool = True, section: str | None = None):
+        """
+        Finds what clicking `label` would send:
+        ("submit", name, value) for a button, ("postback", target, arg) for a
+        __doPostBack link or ("get", url) for a plain link. With `section`,
+        only links under that menu section count (its text, as the browser's
+        listitem has_text filter matches it).
+        """
+        def matches(text: str) -> bool:
+            return text == label if exact else label.lower() in text.lower()
+
+        links = self.links
+        if section is not None:
+            links = [link for link in links if link[2] and section.lower() in link[2].lower()]
+            if not links:
+                raise RuntimeError(f"Menu section '{section}' not found on {self.url}")
+        else:
+            for text, name, value in self.buttons:
+                if matches(text):
+                    return ("submit", name, value)
+
+        for text, href, _ in links:
+            if not matches(text):
+                continue
+            m = POSTBACK_RE.search(href)
+            if m:
+                return ("postback", m.group(1), m.group(2))
+            if href and not href.startswith("javascript:"):
+                return ("get", urllib.parse.urljoin(self.url, href))
+
+        where = f" in menu '{section}'" if section is not None else ""
+        raise RuntimeError(f"'{label}' not found{where} on {self.url}")
+
+
+def _decode(body: bytes, content_type: str) -> str:
+    m = re.search(r"charset=([\w-]+)", content_type or "")
+    try:
+        return body.decode(m.group(1) if m else "utf-8")
+    except (LookupError, UnicodeDecodeError):
+        return body.decode("latin-1")
+
+
+class HttpExportClient:
+    def __init__(self, timeout: float = 120):
+        self.timeout = timeout
+        self.jar = CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.jar))
+
+    def _open(self, url: str, data: dict | None = None):
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        req = urllib.request.Request(url, data=body, headers={"User-Agent": "Mozilla/5.0"})
+        with self.opener.open(req, timeout=self.timeout) as resp:
+            return resp.geturl(), resp.headers, resp.read()
+
+    def _page(self, url: str, data: dict | None = None) -> AspNetPage:
+        final_url, headers, body = self._open(url, data)
+        return AspNetPage(final_url, _decode(body, headers.get("Content-Type", "")))
+
+    def get(self, url: str) -> AspNetPage:
+        return self._page(url)
+
+    def _post_data(self, page: AspNetPage, action, values: dict | None) -> dict:
+        data = dict(page.fields)
+        data.update(values or {})
+        if action[0] == "submit":
+            data[action[1]] = action[2]
+        elif action[0] == "postback":
+            data["__EVENTTARGET"] = action[1]
+            data["__EVENTARGUMENT"] = action[2]
+        return data
+
+    def click(self, page: AspNetPage, label: str, exact: bool = True, values: dict | None = None,
+              section: str | None = None) -> AspNetPage:
+        action = page.find_action(label, exact, section)
+        if action[0] == "get":
+            return self.get(action[1])
+        return self._page(page.action, self._post_data(page, action, values))
+
+    def login(self, url: str, user: str, pw: str, user_id: str, pass_id: str) -> AspNetPage:
+        page = self.get(url)
+        if not page.has_id(user_id):
+            return page  # cookie jar already holds a session
+
+        values = {page.field_name(user_id): user, page.field_name(pass_id): pw}
+        home = self.click(page, "Ingresar", values=values)
+        if home.has_id(user_id):
+            raise RuntimeError("Login failed (login form shown again)")
+        return home
+
+    def export(self, home: AspNetPage, spec, start: date, end: date, out_path: Path) -> None:
+        '''spec is a scraper.ReportSpec'''
+        # the menu sections only open client-side: their links are already in the page
+        report = self.click(home, spec.link, exact=spec.exact, section=spec.menu)
+
+        dates = {
+            report.field_name(spec.from_input.lstrip("#")): start.strftime("%d/%m/%Y"),
+            report.field_name(spec.to_input.lstrip("#")): end.strftime("%d/%m/%Y"),
+        }
+        filtered = self.click(report, "Filtrar", values=dates)
+
+        action = filtered.find_action("Exportar")
+        if action[0] == "get":
+            _, headers, body = self._open(action[1])
+        else:
+            _, headers, body = self._open(filtered.action, self._post_data(filtered, action, dates))
+
+        content_type = headers.get("Content-Type", "")
+        disposition = headers.get("Content-Disposition", "")
+        if "attachment" not in disposition.lower() and "html" in content_type.lower():
+            raise RuntimeError(f"Exportar did not return a file for {spec.link}")
+
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        out_path.write_bytes(body)
@@ -0,0 +1,161 @@
+import difflib
+import hashlib
+import json
+import threading
+import unicodedata
+import weakref
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from modules.instrument import stage
+
+# Fuzzy decisions for labels that are not in a SECTION_MAP, kept between runs
+# as long as the map's keys stay the same
+MATCH_CACHE_PATH = Path(".cache") / "section_matches.json"
+
+# How close an unknown label must be to a known one to take its seccion (0..1)
+FUZZY_CUTOFF = 0.9
+
+_cache_lock = threading.Lock()
+
+# every SectionIndex, so new_run() can reset what they reported
+_indexes: "weakref.WeakSet[SectionIndex]" = weakref.WeakSet()
+
+
+def normalize_key(label) -> str:
+    '''Accents folded, upper case, single spaces: "  Mario  Algañaraz " -> "MARIO ALGANARAZ"'''
+    text = unicodedata.normalize("NFKD", str(label))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(text.upper().split())
+
+
+def _read_match_cache() -> dict:
+    if not MATCH_CACHE_PATH.exists():
+        return {}
+    return json.loads(MATCH_CACHE_PATH.read_text(encoding="utf-8"))
+
+
+def _keys_digest(keys) -> str:
+    return hashlib.sha1("\n".join(sorted(keys)).encode("utf-8")).hexdigest()
+
+
+def _load_match_cache(name: str, digest: str) -> dict:
+    with _cache_lock:
+        entry = _read_match_cache().get(name, {})
+    # decisions taken against other keys (renamed, removed or added since) are taken again
+    if entry.get("keys") != digest:
+        return {}
+    return dict(entry.get("matches", {}))
+
+
+def _save_match_cache(name: str, digest: str, matches: dict) -> None:
+    with _cache_lock:
+        cache = _read_match_cache()
+        cache[name] = {"keys": digest, "matches": matches}
+        MATCH_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        # written aside and swapped in, so a reader never sees half a file
+        tmp = MATCH_CACHE_PATH.with_suffix(".tmp")
+        tmp.write_text(json.dumps(cache, indent=2, sort_keys=True, ensure_ascii=False), encoding="utf-8")
+        tmp.replace(MATCH_CACHE_PATH)
+
+
+def new_run() -> None:
+    '''A new run starts: every index reports its fuzzy and unmapped labels again'''
+    for index in list(_indexes):
+        index.reset_reports()
+
+
+class SectionIndex:
+    """
+    A SECTION_MAP compiled once into normalized keys.
+    Labels are classified per distinct value (factorize, look up, map back), so
+    the cost follows the number of names, not the number of rows.
+    Unknown labels try a fuzzy match against the known keys (decisions are cached
+    in .cache/section_matches.json, per set of keys) and otherwise fall to `default`.
+    Both are reported once per run (see new_run): a fuzzy match moves amounts
+    to another seccion.
+    """
+
+    def __init__(self, name: str, section_map: dict[str, str], default: str, order: list[str] | None = None):
+        self.name = name
+        self.default = default
+        self.keys: dict[str, str] = {}
+        for label, seccion in section_map.items():
+            key = normalize_key(label)
+            if self.keys.get(key, seccion) != seccion:
+                print(f"{name}: '{label}' is mapped to both {self.keys[key]} and {seccion}")
+            self.keys[key] = seccion
+        # secciones the report has no row for: their amounts would vanish from Resumen
+        for seccion in sorted(set(self.keys.values()) | {default}):
+            if order is not None and seccion not in order:
+                print(f"{name}: seccion '{seccion}' is not in SECTION_ORDER, its rows are left out")
+        self._digest = _keys_digest(self.keys)
+
+        self._matches: dict[str, str | None] | None = None  # normalized label -> matched key
+        self._lock = threading.Lock()
+        self.fuzzy: dict[str, str] = {}   # label -> key it was matched to
+        self.unmapped: set[str] = set()   # labels that fell to default
+        self._reported: set[str] = set()
+        _indexes.add(self)
+
+    def reset_reports(self) -> None:
+        '''Forgets the labels seen so far, so the next classify reports them again'''
+        with self._lock:
+            self.fuzzy.clear()
+            self.unmapped.clear()
+            self._reported.clear()
+
+    def _lookup(self, label) -> tuple[str, bool]:
+        '''seccion of a label, and whether a new fuzzy decision was made'''
+        key = normalize_key(label)
+        seccion = self.keys.get(key)
+        if seccion is not None:
+            return seccion, False
+
+        is_new = key not in self._matches or self._matches[key] not in (None, *self.keys)
+        if is_new:
+            close = difflib.get_close_matches(key, self.keys, n=1, cutoff=FUZZY_CUTOFF)
+            self._matches[key] = close[0] if close else None
+
+        matched = self._matches[key]
+        if matched is not None:
+            self.fuzzy[str(label)] = matched
+            return self.keys[matched], is_new
+
+        self.unmapped.add(str(label))
+        return self.default, is_new
+
+    def classify(self, labels: pd.Series) -> pd.Series:
+        with stage("classify", index=self.name):
+            return self._classify(labels)
+
+    def _classify(self, labels: pd.Series) -> pd.Series:
+        codes, uniques = pd.factorize(labels)
+
+        with self._lock:
+            if self._matches is None:
+                self._matches = _load_match_cache(self.name, self._digest)
+
+            looked_up = [self._lookup(label) for label in uniques]
+            if any(is_new for _, is_new in looked_up):
+                _save_match_cache(self.name, self._digest, dict(self._matches))
+
+            # fuzzy and unmapped labels are reported once per run, not once per builder
+            fuzzy = {label: self.fuzzy[label] for label in sorted(set(self.fuzzy) - self._reported)}
+            unmapped = sorted(self.unmapped - self._reported)
+            self._reported.update(fuzzy, unmapped)
+        if fuzzy:
+            matched = ", ".join(f"'{label}' as '{key}' -> {self.keys[key]}" for label, key in fuzzy.items())
+            print(f"{self.name}: {len(fuzzy)} label(s) matched by similarity: {matched}")
+        if unmapped:
+            print(f"{self.name}: {len(unmapped)} label(s) without seccion -> {self.default}: {', '.join(unmapped)}")
+
+        secciones = [seccion for seccion, _ in looked_up]
+
+        # missing labels (code -1) take the last entry: the default
+        table, categories = pd.factorize(np.array(secciones + [self.default], dtype=object), sort=True)
+        return pd.Series(
+            pd.Categorical.from_codes(table[codes], categories=categories),
+            index=labels.index,
+            name="seccion",
+        )
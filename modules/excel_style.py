@@ -1,9 +1,212 @@
 from __future__ import annotations
 
-from openpyxl import load_workbook
-from openpyxl.styles import Font, PatternFill, Border, Side, Alignment
+import numbers
+import weakref
+
+import pandas as pd
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Border, Side, Alignment, NamedStyle
 from openpyxl.utils import get_column_letter
 
+# --- look of the financial sheets
+HEADER_FILL = "D9D9D9"
+ZEBRA_FILL = "02D4C6"
+LABEL_GRAY = "E6E6E6"
+LABEL_GRAY_DARK = "CFCFCF"
+NEGATIVE_COLOR = "9C0006"
+DARKER_LABELS = {"confeccion", "impresion", "extrusion", "echado", "oficina", "gral"}
+MAX_COL_WIDTH = 45
+
+DEFAULT_SPECIAL_ROW_FILLS = {
+    "TOTAL_SPENDINGS": "FFF2CC",  # light yellow
+    "FACTURACION": "BDD7EE",      # light blue
+    "RESULTADO": "E2EFDA",        # light green
+}
+
+
+class _StyleBook:
+    """
+    Shared named styles: one per distinct cell look, registered once in the
+    workbook, so cells only point at a style instead of owning Font/Fill objects.
+    """
+
+    def __init__(self, wb: Workbook, money_format: str):
+        self.wb = wb
+        self.money_format = money_format
+        thin = Side(style="thin")
+        self._border = Border(left=thin, right=thin, top=thin, bottom=thin)
+        self._names: dict[tuple, str] = {}
+
+    def get(self, *, fill: str | None = None, bold: bool = False, color: str | None = None,
+            align: str = "right", money: bool = False) -> str:
+        key = (fill, bold, color, align, money)
+        name = self._names.get(key)
+        if name is None:
+            name = f"fin_{len(self._names)}"
+            while name in self.wb.style_names:
+                name += "_"
+            style = NamedStyle(
+                name=name,
+                font=Font(bold=bold, color=color),
+                border=self._border,
+                alignment=Alignment(horizontal=align, vertical="center"),
+                number_format=self.money_format if money else "General",
+            )
+            if fill:
+                style.fill = PatternFill("solid", fgColor=fill)
+            self.wb.add_named_style(style)
+            self._names[key] = name
+        return name
+
+    def header(self) -> str:
+        return self.get(fill=HEADER_FILL, bold=True, align="center")
+
+    def row(self, values: list, row_pos: int, label_col: int, special_row_fills: dict[str, str]) -> list[str]:
+        """
+        Style of every cell of a data row (row_pos = 1 for the first data row):
+        zebra on even rows, gray label column (darker + bold for the sections),
+        special rows filled and bold, money format and red negatives for numbers.
+        """
+        label = values[label_col - 1] if len(values) >= label_col else None
+        special = special_row_fills.get(label.strip()) if isinstance(label, str) else None
+        zebra = ZEBRA_FILL if row_pos % 2 == 0 else None
+
+        names = []
+        for c, v in enumerate(values, start=1):
+            if special:
+                fill, bold = special, True
+            elif c == label_col and isinstance(label, str):
+                bold = label.strip().lower() in DARKER_LABELS
+                fill = LABEL_GRAY_DARK if bold else LABEL_GRAY
+            else:
+                fill, bold = zebra, False
+
+            if c == label_col or isinstance(v, str):
+                # label column and extra text columns (e.g. empleado in detail sheets)
+                names.append(self.get(fill=fill, bold=bold, align="left"))
+                continue
+
+            negative = (
+                c > label_col
+                and isinstance(v, numbers.Real)
+                and not isinstance(v, bool)
+                and v < 0
+            )
+            names.append(self.get(fill=fill, bold=bold, color=NEGATIVE_COLOR if negative else None, money=True))
+        return names
+
+
+# one _StyleBook per workbook + money format, so every sheet of a workbook shares the styles
+_books: "weakref.WeakKeyDictionary[Workbook, dict[str, _StyleBook]]" = weakref.WeakKeyDictionary()
+
+
+def _style_book(wb: Workbook, money_format: str) -> _StyleBook:
+    books = _books.setdefault(wb, {})
+    if money_format not in books:
+        books[money_format] = _StyleBook(wb, money_format)
+    return books[money_format]
+
+
+def _width(max_len: int) -> float:
+    return min(max_len + 2, MAX_COL_WIDTH)
+
+
+def _frame_rows(df: pd.DataFrame):
+    '''DataFrame rows one at a time as plain Python objects, NaN -> None (what Excel gets)'''
+    for row in df.itertuples(index=False, name=None):
+        yield [None if pd.isna(v) else v for v in row]
+
+
+def _text_len(v) -> int:
+    # numbers are stored with 16 significant digits and whole floats come back as ints,
+    # size them the way the stored value reads
+    if isinstance(v, float):
+        text = "%.16g" % v
+        return len(str(float(text))) if any(ch in text for ch in ".eEn") else len(text)
+    return len(str(v))
+
+
+def _frame_widths(df: pd.DataFrame) -> list[float]:
+    '''Column widths from the DataFrame itself (same rule as sizing from the cells)'''
+    widths = []
+    for i, col in enumerate(df.columns):
+        # plain iteration: categorical name columns would map to a categorical
+        longest = max(map(_text_len, df.iloc[:, i].dropna()), default=0)
+        widths.append(_width(max(len(str(col)), longest)))
+    return widths
+
+
+def write_financial_sheet(
+    df: pd.DataFrame,
+    filepath,
+    sheet_name: str = "Resumen",
+    label_col: int = 1,
+    header_row: int = 1,
+    money_format: str = '"$"#,##0.00',
+    freeze_panes_cell: str = "B2",
+    special_row_fills: dict[str, str] | None = None,
+    wb: Workbook | None = None,
+    streaming: bool = False,
+) -> Workbook:
+    """
+    Writes df as a report-like sheet and styles every cell as it is written
+    (single pass, no reload from disk). Same look as style_financial_sheet.
+    Pass `wb` to add the sheet to an existing workbook; it is saved to filepath
+    unless filepath is None.
+    streaming=True uses openpyxl's write-only mode: rows go straight to disk,
+    so memory stays flat however many employees/clients/months there are
+    (a given `wb` must then be a Workbook(write_only=True)).
+    """
+    if special_row_fills is None:
+        special_row_fills = DEFAULT_SPECIAL_ROW_FILLS
+
+    if wb is None:
+        wb = Workbook(write_only=streaming)
+        ws = wb.create_sheet(sheet_name) if streaming else wb.active
+        ws.title = sheet_name
+    else:
+        ws = wb.create_sheet(sheet_name)
+
+    book = _style_book(wb, money_format)
+
+    # widths and panes first: write-only sheets need them before any row
+    for c, width in enumerate(_frame_widths(df), start=1):
+        ws.column_dimensions[get_column_letter(c)].width = width
+
+    if freeze_panes_cell:
+        ws.freeze_panes = freeze_panes_cell
+
+    header = [str(col) for col in df.columns]
+    header_styles = [book.header()] * len(header)
+    rows = _frame_rows(df)
+
+    if streaming:
+        def cells(values, styles):
+            out = []
+            for v, style in zip(values, styles):
+                cell = WriteOnlyCell(ws, value=v)
+                cell.style = style
+                out.append(cell)
+            return out
+
+        for _ in range(header_row - 1):
+            ws.append([])
+        ws.append(cells(header, header_styles))
+        for pos, values in enumerate(rows, start=1):
+            ws.append(cells(values, book.row(values, pos, label_col, special_row_fills)))
+    else:
+        for c, (v, style) in enumerate(zip(header, header_styles), start=1):
+            ws.cell(row=header_row, column=c, value=v).style = style
+        for pos, values in enumerate(rows, start=1):
+            r = header_row + pos
+            for c, (v, style) in enumerate(zip(values, book.row(values, pos, label_col, special_row_fills)), start=1):
+                ws.cell(row=r, column=c, value=v).style = style
+
+    if filepath is not None:
+        wb.save(filepath)
+    return wb
+
 
 def style_financial_sheet(
     filepath: str,
@@ -15,133 +218,45 @@ def style_financial_sheet(
     special_row_fills: dict[str, str] | None = None,
 ) -> None:
     """
-    Apply Excel styling to a report-like sheet:
+    Apply Excel styling to a report-like sheet that is already on disk:
     - header style
     - borders
     - number formatting for numeric cells
     - highlights special rows by label (first column)
     - auto column widths
     - freeze panes
+    Prefer write_financial_sheet when writing the sheet yourself (no reload).
     """
 
     if special_row_fills is None:
         # default highlights (you can override from main)
-        special_row_fills = {
-            "TOTAL_SPENDINGS": "FFF2CC",  # light yellow
-            "FACTURACION": "BDD7EE",      # light blue
-            "RESULTADO": "E2EFDA",        # light green
-        }
+        special_row_fills = DEFAULT_SPECIAL_ROW_FILLS
 
     wb = load_workbook(filepath)
     ws = wb[sheet_name]
-
-    # --- styles
-    zebra_fill = PatternFill("solid", fgColor="02D4C6")
-    header_fill = PatternFill("solid", fgColor="D9D9D9")
-    label_gray = PatternFill("solid", fgColor="E6E6E6")        
-    label_gray_dark = PatternFill("solid", fgColor="CFCFCF")  
-    darker_labels = {"confeccion","impresion","extrusion","echado","oficina","gral",}
-    bold = Font(bold=True)
-
-    thin_side = Side(style="thin")
-    thin_border = Border(left=thin_side, right=thin_side, top=thin_side, bottom=thin_side)
-
-    center = Alignment(horizontal="center", vertical="center")
-    left = Alignment(horizontal="left", vertical="center")
-    right = Alignment(horizontal="right", vertical="center")
+    book = _style_book(wb, money_format)
 
     # freeze panes (nice UX)
     if freeze_panes_cell:
         ws.freeze_panes = freeze_panes_cell
 
-    # Determine used range
-    max_row = ws.max_row
-    max_col = ws.max_column
-
-    # --- header row formatting
-    for c in range(1, max_col + 1):
-        cell = ws.cell(row=header_row, column=c)
-        cell.font = bold
-        cell.fill = header_fill
-        cell.border = thin_border
-        cell.alignment = center
-
-    # --- cell borders + alignment + number formats
-    for r in range(header_row + 1, max_row + 1):
-        # label cell
-        label_cell = ws.cell(row=r, column=label_col)
-        label_cell.border = thin_border
-        label_cell.alignment = left
-
-        # numeric cells: everything except label column
-        for c in range(1, max_col + 1):
-            cell = ws.cell(row=r, column=c)
-            cell.border = thin_border
-
-            if c == label_col:
-                continue
+    # one pass over the used range: styles + longest value per column
+    max_len = [0] * ws.max_column
+    header_style = book.header()
+    for r, cells in enumerate(ws.iter_rows(min_row=1, max_row=ws.max_row), start=1):
+        values = [cell.value for cell in cells]
+        for i, v in enumerate(values):
+            if v is not None:
+                max_len[i] = max(max_len[i], len(str(v)))
 
-            # Only apply money format to numeric cells
-            # (if it’s text, openpyxl will ignore number_format visually)
-            cell.number_format = money_format
-            cell.alignment = right
-
-    # --- zebra striping (even rows only, excluding header)
-    for r in range(header_row + 1, max_row + 1):
-        # Excel rows: apply to even-numbered data rows
-        if (r - header_row) % 2 == 0:
-            for c in range(1, max_col + 1):
-                ws.cell(row=r, column=c).fill = zebra_fill
-
-    # --- gray background for label column (index / seccion)
-    for r in range(header_row + 1, max_row + 1):
-        cell = ws.cell(row=r, column=label_col)
-        label = cell.value
-    
-        if not isinstance(label, str):
+        if r < header_row:
             continue
-        
-        label_key = label.strip().lower()
-    
-        # darker gray for selected sections
-        if label_key in darker_labels:
-            cell.fill = label_gray_dark
-            cell.font = Font(bold=True)
-        else:
-            cell.fill = label_gray
-    
-    # --- highlight special rows by label text (first column)
-    for r in range(header_row + 1, max_row + 1):
-        label = ws.cell(row=r, column=label_col).value
-        if not isinstance(label, str):
-            continue
-
-        label_key = label.strip()
-        if label_key in special_row_fills:
-            fill = PatternFill("solid", fgColor=special_row_fills[label_key])
-            for c in range(1, max_col + 1):
-                cell = ws.cell(row=r, column=c)
-                cell.fill = fill
-                cell.font = bold
-
-    # --- optional: color negative numbers red (common finance convention)
-    # keep it simple: just set font color when cell value is numeric and < 0
-    for r in range(header_row + 1, max_row + 1):
-        for c in range(label_col + 1, max_col + 1):
-            cell = ws.cell(row=r, column=c)
-            v = cell.value
-            if isinstance(v, (int, float)) and v < 0:
-                cell.font = Font(color="9C0006", bold=cell.font.bold if cell.font else False)
+        styles = [header_style] * len(cells) if r == header_row else book.row(values, r - header_row, label_col, special_row_fills)
+        for cell, style in zip(cells, styles):
+            cell.style = style
 
     # --- auto column widths
-    for c in range(1, max_col + 1):
-        col_letter = get_column_letter(c)
-        max_len = 0
-        for r in range(1, max_row + 1):
-            v = ws.cell(row=r, column=c).value
-            if v is None:
-                continue
-            max_len = max(max_len, len(str(v)))
-        ws.column_dimensions[col_letter].width = min(max_len + 2, 45)
+    for c, n in enumerate(max_len, start=1):
+        ws.column_dimensions[get_column_letter(c)].width = _width(n)
 
     wb.save(filepath)
@@ -1,45 +1,45 @@
 import pandas as pd
-from modules.helpers import sanitize, standardize_columns, pivot_by_period, normalize_names
+from pathlib import Path
+from modules.helpers import sanitize, pivot_by_period, normalize_names, period_keys
+from modules.loader import load_reports
+from modules.memory import track
 
 SECTION_ORDER = []
 SECTION_MAP = {}
 
-def build_facturas_base() -> pd.DataFrame:
+def build_facturas_base(res_dir: Path = Path("res")) -> pd.DataFrame:
     '''Internal Use only'''
     ## Processing raw input
 
-    # Extract data frames from excel files
-    facturas_blancos = pd.read_excel("res/facturas-sg.xlsx", header=7)
-    facturas_negros = pd.read_excel("res/facturas-s2.xlsx", header=7)
-
-    # Standardizes colum names
-    facturas_blancos = standardize_columns(facturas_blancos)
-    facturas_negros = standardize_columns(facturas_negros)
-
-    # Only keep the columns i want to work with
-    facturas_blancos = facturas_blancos[[ "cliente", "fecha", "total"]]
-    facturas_negros = facturas_negros[[ "cliente", "fecha", "total"]]
-
-    ## Join both black and white facturas
-    facturas = pd.concat([facturas_blancos, facturas_negros],ignore_index=True)
+    # Both black and white facturas, parsed once per run by the loader
+    facturas = load_reports("facturas", res_dir)
 
     # Normalize
     facturas["fecha"] = pd.to_datetime(facturas["fecha"], errors="coerce")
     facturas = sanitize(facturas,[ "cliente", "fecha"])
     facturas["cliente"] = normalize_names(facturas["cliente"])
 
+    return track("base:facturas", facturas)
+
+def build_facturas_por_cliente(res_dir: Path = Path("res"), granularity: str = "monthly") -> pd.DataFrame:
+
+    facturas = build_facturas_base(res_dir)
+    facturas = pivot_by_period(facturas, "fecha",["cliente"],"total", granularity=granularity)
+
     return facturas
 
-def build_facturas_por_cliente() -> pd.DataFrame:
+def build_facturas_total(res_dir: Path = Path("res"), granularity: str = "monthly") -> pd.DataFrame:
 
-    facturas = build_facturas_base()
-    facturas = pivot_by_period(facturas, "fecha",["cliente"],"total")
+    facturas = build_facturas_base(res_dir)
+    facturas = pivot_by_period(facturas, "fecha",[],"total", granularity=granularity)
 
     return facturas
 
-def build_facturas_total() -> pd.DataFrame:
+def facturas_records(res_dir: Path = Path("res"), granularity: str = "monthly") -> pd.DataFrame:
+    '''Long format (seccion, period, amount), everything under the "facturacion" seccion'''
 
-    facturas = build_facturas_base()
-    facturas = pivot_by_period(facturas, "fecha",[],"total")
+    facturas = build_facturas_base(res_dir)
+    facturas["period"] = period_keys(facturas, "fecha", granularity)
+    facturas["seccion"] = pd.Series("facturacion", index=facturas.index, dtype="category")
 
-    return facturas
\ No newline at end of file
+    return track("records:facturas", facturas.rename(columns={"total": "amount"})[["seccion", "period", "amount"]])
@@ -1,8 +1,12 @@
 import pandas as pd
-from modules.helpers import sanitize, standardize_columns, pivot_by_period, normalize_names
+from pathlib import Path
+from modules.helpers import sanitize, pivot_by_period, normalize_names, period_keys
+from modules.loader import load_reports
+from modules.memory import track
+from modules.classify import SectionIndex
 
-SECTION_ORDER = [ "alquiler" , "honorarios", "contabilidad" , "inversiones", "fletes"   , "logistica",
-                  "vehiculos", "maquinas"  , "mantenimiento", "material"   , "servicios", "otros"    ,]
+SECTION_ORDER = [ "alquiler" , "hualfin"   , "honorarios"   , "contabilidad", "inversiones", "fletes"   ,
+                  "logistica", "vehiculos" , "maquinas"     , "mantenimiento", "material"  , "servicios", "otros",]
 
 SECTION_MAP = {
     # FLETES
@@ -112,27 +116,17 @@ SECTION_MAP = {
     "INVERSIONES": "inversiones",
 }
 
+# SECTION_MAP compiled once; unknown tipos fall in "otros"
+SECTIONS = SectionIndex("gastos", SECTION_MAP, "otros", SECTION_ORDER)
 
 
-def build_gastos_by_section() -> pd.DataFrame:
-    ## Processing raw input
-
-    # Extract data frames from excel files
-    gastos_blancos = pd.read_excel("res/gastos-sg.xlsx", header=6)
-    gastos_negros  = pd.read_excel("res/gastos-s2.xlsx", header=6)
-
-    # Standardizes colum names
-    gastos_blancos = standardize_columns(gastos_blancos)
-    gastos_negros  = standardize_columns(gastos_negros )
-
-    # Only keep the columns i want to work with
-    gastos_blancos = gastos_blancos[[ "tipo_gasto", "proveedor", "fecha", "total"]]
-    gastos_negros  = gastos_negros [[ "tipo_gasto", "proveedor", "fecha", "total"]]
-
 
+def build_gastos_base(res_dir: Path = Path("res")) -> pd.DataFrame:
+    '''Internal Use only'''
+    ## Processing raw input
 
-    ## Join both black and white gastos
-    gastos = pd.concat([gastos_blancos, gastos_negros],ignore_index=True)
+    # Both black and white gastos, parsed once per run by the loader
+    gastos = load_reports("gastos", res_dir)
 
 
     # Normalizes/sanitizes
@@ -140,13 +134,48 @@ def build_gastos_by_section() -> pd.DataFrame:
     gastos["tipo_gasto"] = normalize_names(gastos["tipo_gasto"])
 
     # Map secciones
-    gastos["seccion"] = gastos["tipo_gasto"].map(SECTION_MAP).fillna("otros")
+    gastos["seccion"] = SECTIONS.classify(gastos["tipo_gasto"])
+
+    return track("base:gastos", gastos)
+
+def build_gastos_by_section(res_dir: Path = Path("res"), granularity: str = "monthly") -> pd.DataFrame:
+
+    gastos = build_gastos_base(res_dir)
 
     gastos["seccion"] = pd.Categorical(
             gastos["seccion"], categories=SECTION_ORDER, ordered=True
         )
     gastos = gastos.sort_values("seccion")
 
-    gastos = pivot_by_period(gastos,"fecha","seccion","total")
+    gastos = pivot_by_period(gastos,"fecha","seccion","total", granularity=granularity)
+
+    return gastos
+
+def build_gastos_by_tipo(res_dir: Path = Path("res"), granularity: str = "monthly") -> pd.DataFrame:
+
+    gastos = build_gastos_base(res_dir)
+
+    # pivot: one row per tipo_gasto, one column per period
+    gastos = pivot_by_period(gastos,"fecha",["seccion", "tipo_gasto"],"total", granularity=granularity)
+
+    # order rows by section (custom order) and then tipo_gasto
+    gastos["seccion"] = pd.Categorical(
+        gastos["seccion"], categories=SECTION_ORDER, ordered=True
+    )
+    gastos = gastos.sort_values(["seccion", "tipo_gasto"]).reset_index(drop=True)
+
+    return gastos
+
+def gastos_records(res_dir: Path = Path("res"), granularity: str = "monthly") -> pd.DataFrame:
+    '''Long format (seccion, period, amount), one row per gasto'''
+
+    gastos = build_gastos_base(res_dir)
+    gastos["period"] = period_keys(gastos, "fecha", granularity)
+
+    # same row order build_gastos_by_section sums in, so the totals match to the last digit
+    gastos["seccion"] = pd.Categorical(
+            gastos["seccion"], categories=SECTION_ORDER, ordered=True
+        )
+    gastos = gastos.sort_values("seccion")
 
-    return gastos
\ No newline at end of file
+    return track("records:gastos", gastos.rename(columns={"total": "amount"})[["seccion", "period", "amount"]])
@@ -1,6 +1,23 @@
+import numpy as np
 import pandas as pd
-from typing import List
+from typing import Callable, List
 from typing import Iterable
+from modules.instrument import stage
+
+# label of the rows whose name cell was empty, in the per-name tables
+MISSING_NAME = "(sin nombre)"
+
+# period granularities, finest first -> pandas period frequency
+GRANULARITIES = {
+    "daily": "D",
+    "weekly": "W",
+    "monthly": "M",
+    "quarterly": "Q",
+    "yearly": "Y",
+}
+
+# day key of every row, added once by the loader (modules.loader.load_report)
+DAY_COLUMN = "dia"
 
 
 def standardize_columns(df: pd.DataFrame) -> pd.DataFrame:
@@ -14,20 +31,51 @@ def standardize_columns(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
+def categorical_map(s: pd.Series, fn: Callable[[pd.Index], pd.Index]) -> pd.Series:
+    '''
+    fn applied once per distinct value of s (as an Index), back as a categorical
+    Series. Categories come out sorted, so sorting by the column is still
+    alphabetical. Missing values stay missing.
+    '''
+    codes, uniques = pd.factorize(s)
+    new_codes, categories = pd.factorize(fn(pd.Index(uniques)), sort=True)
+    codes = np.append(new_codes, -1)[codes]  # -1 (missing) stays -1
+    return pd.Series(pd.Categorical.from_codes(codes, categories=categories), index=s.index, name=s.name)
+
+
 def normalize_names(s: pd.Series) -> pd.Series:
-    return (
-        s.astype(str)
-         .str.strip()
-         .str.replace(r"\s+", " ", regex=True)
+    # cleaned once per distinct name; empty cells stay NaN (not the text "nan")
+    return categorical_map(
+        s,
+        lambda names: names.astype(str).str.strip().str.replace(r"\s+", " ", regex=True),
     )
 
 
+def period_keys(df: pd.DataFrame, date_col: str, granularity: str = "monthly") -> pd.Series:
+    '''Period of every row at `granularity`, from the loader's day keys when they are there'''
+    freq = GRANULARITIES[granularity]
+    if DAY_COLUMN in df.columns:
+        days = df[DAY_COLUMN]
+    else:
+        days = pd.to_datetime(df[date_col], errors="coerce").dt.to_period("D")
+    return days if freq == "D" else days.dt.asfreq(freq)
+
+
+def finest_granularity(granularities: Iterable[str]) -> str:
+    '''The granularity all the requested ones can be summed up from'''
+    wanted = set(granularities)
+    if "weekly" in wanted and wanted - {"weekly"}:
+        return "daily"  # weeks don't add up to months
+    return min(wanted, key=list(GRANULARITIES).index)
+
+
 def pivot_by_period(
     df: pd.DataFrame,
     date_col: str,
     index_cols: List[str],
     value_col: str,
     fill_value=0,
+    granularity: str = "monthly",
 ) -> pd.DataFrame:
 
     df = df.copy()
@@ -35,18 +83,30 @@ def pivot_by_period(
     # ensure datetime
     df[date_col] = pd.to_datetime(df[date_col], errors="coerce")
 
-    # create period column
-    df["period"] = df[date_col].dt.to_period("M")
+    # create period column (one column per day/week/month/quarter/year)
+    df["period"] = period_keys(df, date_col, granularity)
+
+    # ordered categoricals (declared seccion orders) keep their empty rows,
+    # plain categorical names only give the combinations that exist
+    keys = [index_cols] if isinstance(index_cols, str) else index_cols
+    ordered = [isinstance(df[c].dtype, pd.CategoricalDtype) and df[c].cat.ordered for c in keys]
+    observed = not any(ordered)
+
+    # rows without a name get their own row instead of being dropped by the pivot
+    for c, is_ordered in zip(keys, ordered):
+        if isinstance(df[c].dtype, pd.CategoricalDtype) and not is_ordered and df[c].isna().any():
+            df[c] = df[c].cat.add_categories([MISSING_NAME]).fillna(MISSING_NAME)
 
     # pivot
-    pivot = df.pivot_table(
-        index=index_cols,
-        columns="period",
-        values=value_col,
-        aggfunc="sum",
-        fill_value=fill_value,
-        observed=False
-    ).reset_index()
+    with stage("pivot"):
+        pivot = df.pivot_table(
+            index=index_cols,
+            columns="period",
+            values=value_col,
+            aggfunc="sum",
+            fill_value=fill_value,
+            observed=observed
+        ).reset_index()
 
     return pivot
 
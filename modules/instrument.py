@@ -0,0 +1,252 @@
+import contextvars
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+# Stdlib only: the scraper and the app import this too.
+# A run (controller, processor) times every stage opened inside it: scrape
+# steps, export parsing, pivots, sheet writing... nested, tagged with the
+# report/tenant they belong to, with the peak RSS seen while each was open.
+
+# Set RUN_PROFILE=1 to also dump a cProfile .pstats next to the run report
+RUN_PROFILE = os.environ.get("RUN_PROFILE", "0") == "1"
+
+# how often the RSS sampler looks at the process while a run is active
+SAMPLE_SECONDS = 0.05
+
+
+class _Stage:
+    __slots__ = ("id", "parent", "name", "tags", "start", "seconds", "peak_rss")
+
+    def __init__(self, index: int, parent: "_Stage | None", name: str, tags: dict):
+        self.id = index
+        self.parent = parent
+        self.name = name
+        self.tags = {**(parent.tags if parent else {}), **tags}  # report/tenant inherited
+        self.start = time.perf_counter()
+        self.seconds: float | None = None
+        self.peak_rss = 0
+
+
+class _Run:
+    def __init__(self, name: str):
+        self.name = name
+        self.started = datetime.now()
+        self.stages: list[_Stage] = []
+        self.open: set[_Stage] = set()
+        self.status = name
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+        self.profiled = False
+
+
+_run: _Run | None = None
+_current: contextvars.ContextVar["_Stage | None"] = contextvars.ContextVar("instrument_stage", default=None)
+
+
+def _current_rss() -> int:
+    '''Resident memory of this process in bytes (0 where it can't be read)'''
+    try:
+        if sys.platform.startswith("linux"):
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        if sys.platform == "win32":
+            import ctypes
+            from ctypes import wintypes
+
+            class _Counters(ctypes.Structure):
+                _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [
+                    (f, ctypes.c_size_t) for f in (
+                        "PeakWorkingSetSize", "WorkingSetSize",
+                        "QuotaPeakPagedPoolUsage", "QuotaPagedPoolUsage",
+                        "QuotaPeakNonPagedPoolUsage", "QuotaNonPagedPoolUsage",
+                        "PagefileUsage", "PeakPagefileUsage",
+                    )
+                ]
+
+            counters = _Counters()
+            counters.cb = ctypes.sizeof(counters)
+            process = ctypes.windll.kernel32.GetCurrentProcess()
+            ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb)
+            return counters.WorkingSetSize
+    except (OSError, AttributeError, ValueError):
+        pass
+    return 0
+
+
+def _sample(run: _Run) -> None:
+    while not run.done.wait(SAMPLE_SECONDS):
+        rss = _current_rss()
+        with run.lock:
+            for s in run.open:
+                s.peak_rss = max(s.peak_rss, rss)
+
+
+@contextmanager
+def stage(name: str, **tags):
+    '''
+    Times the block as a stage of the active run (nested in the stage it was
+    opened from). No-op outside a run. tags: report=, tenant=, sheet=...
+    '''
+    run = _run
+    if run is None:
+        yield
+        return
+
+    parent = _current.get()
+    rss = _current_rss()
+    with run.lock:
+        s = _Stage(len(run.stages), parent, name, tags)
+        s.peak_rss = rss
+        run.stages.append(s)
+        run.open.add(s)
+        label = " ".join(str(v) for v in s.tags.values())
+        run.status = f"{label} {name}".strip()
+    token = _current.set(s)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+        rss = _current_rss()
+        with run.lock:
+            s.seconds = time.perf_counter() - s.start
+            s.peak_rss = max(s.peak_rss, rss)
+            run.open.discard(s)
+            if parent is not None:
+                parent.peak_rss = max(parent.peak_rss, s.peak_rss)
+
+
+@contextmanager
+def run(name: str, report_path: Path | None = None, profile_path: Path | None = None):
+    '''
+    Collects every stage opened inside the block. Writes the JSON run report to
+    report_path and a cProfile dump (calling thread only) to profile_path.
+    Inside another run it is just a stage of that run.
+    '''
+    global _run
+    if _run is not None:
+        with stage(name):
+            yield
+        return
+
+    current = _Run(name)
+    sampler = threading.Thread(target=_sample, args=(current,), daemon=True)
+    profiler = cProfile.Profile() if profile_path else None
+
+    _run = current
+    sampler.start()
+    if profiler:
+        current.profiled = True
+        profiler.enable()
+    try:
+        with stage(name):
+            yield
+    finally:
+        if profiler:
+            profiler.disable()
+        current.done.set()
+        _run = None
+
+        if profile_path:
+            Path(profile_path).parent.mkdir(parents=True, exist_ok=True)
+            profiler.dump_stats(profile_path)
+            print(f"Profile: {profile_path}  (python -m pstats {profile_path})")
+        if report_path:
+            write_run_report(current, report_path)
+            print(f"Run report: {report_path}")
+
+
+def profiling() -> bool:
+    '''True while the run is being profiled: cProfile only sees the calling thread'''
+    run = _run
+    return run is not None and run.profiled
+
+
+def status() -> str:
+    '''What the active run is doing right now, for a status line ("" when idle)'''
+    run = _run
+    if run is None:
+        return ""
+    with run.lock:
+        elapsed = time.perf_counter() - run.stages[0].start if run.stages else 0.0
+        text = run.status
+    rss = _current_rss()
+    mem = f" · {rss / 2**20:.0f} MiB" if rss else ""
+    return f"{text} · {elapsed:.0f}s{mem}"
+
+
+def _mb(n: int) -> float:
+    return round(n / 2**20, 1)
+
+
+def _tree(stages: list[_Stage]) -> list[dict]:
+    nodes = {}
+    roots = []
+    for s in stages:
+        node = {
+            "name": s.name,
+            **({"tags": s.tags} if s.tags else {}),
+            "seconds": round(s.seconds, 4) if s.seconds is not None else None,
+            "peak_rss_mb": _mb(s.peak_rss),
+            "children": [],
+        }
+        nodes[s.id] = node
+        (nodes[s.parent.id]["children"] if s.parent is not None else roots).append(node)
+    return roots
+
+
+def _by_report_tenant(stages: list[_Stage]) -> list[dict]:
+    totals: dict[tuple, dict] = {}
+    for s in stages:
+        if "report" not in s.tags and "tenant" not in s.tags:
+            continue
+        key = (s.tags.get("report", "-"), s.tags.get("tenant", "-"), s.name)
+        entry = totals.setdefault(key, {"seconds": 0.0, "count": 0, "peak_rss_mb": 0.0})
+        entry["seconds"] += s.seconds or 0.0
+        entry["count"] += 1
+        entry["peak_rss_mb"] = max(entry["peak_rss_mb"], _mb(s.peak_rss))
+
+    rows = [
+        {"report": report, "tenant": tenant, "stage": name, **{**entry, "seconds": round(entry["seconds"], 4)}}
+        for (report, tenant, name), entry in totals.items()
+    ]
+    return sorted(rows, key=lambda r: -r["seconds"])
+
+
+def write_run_report(run: _Run, path: Path) -> None:
+    with run.lock:
+        stages = list(run.stages)
+    root = stages[0] if stages else None
+
+    report = {
+        "name": run.name,
+        "started": run.started.isoformat(timespec="seconds"),
+        "seconds": round(root.seconds, 4) if root and root.seconds is not None else None,
+        "peak_rss_mb": _mb(max((s.peak_rss for s in stages), default=0)),
+        "by_report_tenant": _by_report_tenant(stages),
+        "stages": _tree(stages),
+    }
+
+    # frame sizes per stage, when modules.memory recorded them (--memory-report)
+    memory = sys.modules.get("modules.memory")
+    if memory is not None and memory.MEMORY_STAGES:
+        report["frames"] = list(memory.MEMORY_STAGES)
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+
+def run_report_path(output_path: Path) -> Path:
+    '''Where a run that writes output_path puts its report: out/x.xlsx -> out/x.run.json'''
+    return Path(output_path).with_suffix(".run.json")
+
+
+def profile_path(output_path: Path) -> Path:
+    return Path(output_path).with_suffix(".pstats")
@@ -0,0 +1,292 @@
+import hashlib
+import json
+import os
+import threading
+import pandas as pd
+from pathlib import Path
+from pandas.api.types import union_categoricals
+from modules.helpers import categorical_map, DAY_COLUMN
+from modules.instrument import stage
+from modules.memory import track
+from modules.readers import read_export
+
+try:
+    import pyarrow  # noqa: F401  (optional: parquet staging)
+    STAGING_FORMAT = "parquet"
+except ImportError:
+    STAGING_FORMAT = "pkl"
+
+# How each raw export is read: header offset, dtypes and the columns the builders use
+REPORTS = {
+    "sueldos":  {"header": 5, "dtype": {"Total": float}, "columns": ["fecha_cierre", "empleado", "total"]},
+    "facturas": {"header": 7, "dtype": None,             "columns": ["cliente", "fecha", "total"]},
+    "gastos":   {"header": 6, "dtype": None,             "columns": ["tipo_gasto", "proveedor", "fecha", "total"]},
+    "stock":    {"header": 6, "dtype": {"Total": float}, "columns": ["tipo_gasto", "proveedor", "fecha", "total"]},
+}
+
+# Explicit dtypes of the staged columns (everything else is a name/label column,
+# kept as a categorical: each distinct name is stored once)
+# Amounts stay float64: float32 keeps ~7 digits, not enough for cents on monthly
+# totals in the millions
+DATE_COLUMNS = {"fecha", "fecha_cierre"}
+AMOUNT_COLUMNS = {"total"}
+
+# Typed copies of the exports, so each .xlsx is only parsed once per content.
+# A few contents are kept per export: the app's range and the scheduled
+# refresh's narrower one (refresh.py) take turns in res/
+STAGING_DIR_NAME = ".staging"
+STAGING_KEEP = 4
+
+# Rows summed per (names, day), stored month by month and keyed by a hash of
+# that month's rows: a rerun only sums again the months that changed, whatever
+# range the export covers. The month list of the last AGGREGATE_KEEP_FILES
+# exports is kept, so an unchanged one is not read at all.
+# PROCESSOR_INCREMENTAL=0 (or processor --full) reads every row every run.
+AGGREGATE_DIR_NAME = ".aggregates"
+AGGREGATE_VERSION = 2
+AGGREGATE_KEEP_FILES = 8
+INCREMENTAL = os.environ.get("PROCESSOR_INCREMENTAL", "1") == "1"
+
+# a modules.store.HistoryQuery: the builders read that date range from the
+# history database instead of res/ (processor --from-history)
+HISTORY = None
+
+# blancos first, then negros (same order the builders always concatenated them)
+TENANTS = ("sg", "s2")
+
+# path -> ((mtime_ns, size), frame)
+_cache: dict[Path, tuple[tuple[int, int], pd.DataFrame]] = {}
+
+# one lock per file, so builders running in threads never parse the same export twice
+_locks: dict[Path, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+
+def _lock_for(path: Path) -> threading.Lock:
+    with _locks_guard:
+        return _locks.setdefault(path, threading.Lock())
+
+
+def load_report(report: str, tenant: str, res_dir: Path = Path("res")) -> pd.DataFrame:
+    '''
+    Parses res/{report}-{tenant}.xlsx once and keeps it until the file changes.
+    Returns standardized, column-projected data. Treat it as read-only.
+    '''
+    path = (Path(res_dir) / f"{report}-{tenant}.xlsx").resolve()
+
+    with _lock_for(path):
+        st = path.stat()
+        stamp = (st.st_mtime_ns, st.st_size)
+
+        cached = _cache.get(path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+
+        with stage("load", report=report, tenant=tenant):
+            df = _with_day_keys(_load_staged(report, path))
+
+        _cache[path] = (stamp, df)
+        return df
+
+
+def _file_hash(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _with_day_keys(df: pd.DataFrame) -> pd.DataFrame:
+    # day key computed once per load; builders derive week/month/... keys from it
+    date_col = next(c for c in df.columns if c in DATE_COLUMNS)
+    df[DAY_COLUMN] = df[date_col].dt.to_period("D")
+    return df
+
+
+def typed_report(df: pd.DataFrame) -> pd.DataFrame:
+    '''A frame with an export's columns typed like a staged export, plus its day keys'''
+    return _with_day_keys(_typed(df))
+
+
+def _typed(df: pd.DataFrame) -> pd.DataFrame:
+    for c in df.columns:
+        if c in DATE_COLUMNS:
+            df[c] = pd.to_datetime(df[c], errors="coerce")
+        elif c in AMOUNT_COLUMNS:
+            df[c] = pd.to_numeric(df[c], errors="coerce").astype("float64")
+        else:
+            # names: categorical of str values, NaN where empty (parquet hands back None)
+            df[c] = categorical_map(df[c], lambda names: names.astype(str))
+    return df
+
+
+def _load_staged(report: str, path: Path) -> pd.DataFrame:
+    '''
+    Reads the typed staging copy of an export (res/.staging/{stem}-{hash}) if one
+    was made from a file with the same content, otherwise parses the .xlsx and
+    stages it. The STAGING_KEEP most recently used copies of each export are kept.
+    '''
+    spec = REPORTS[report]
+    staging_dir = path.parent / STAGING_DIR_NAME
+    staged = staging_dir / f"{path.stem}-{_file_hash(path)[:16]}.{STAGING_FORMAT}"
+
+    if staged.exists():
+        os.utime(staged)  # most recently used
+        with stage("read_staged"):
+            df = pd.read_parquet(staged) if STAGING_FORMAT == "parquet" else pd.read_pickle(staged)
+            return _typed(df)
+
+    with stage("read_excel"):
+        df = _typed(read_export(path, spec["header"], spec["columns"], spec["dtype"]))
+
+    staging_dir.mkdir(parents=True, exist_ok=True)
+    if STAGING_FORMAT == "parquet":
+        df.to_parquet(staged, index=False)
+    else:
+        df.to_pickle(staged)
+
+    copies = sorted(staging_dir.glob(f"{path.stem}-*.{STAGING_FORMAT}"), key=lambda p: p.stat().st_mtime_ns)
+    for old in copies[:-STAGING_KEEP]:
+        old.unlink(missing_ok=True)
+    # single-slot copies from before
+    (staging_dir / f"{path.stem}.{STAGING_FORMAT}").unlink(missing_ok=True)
+    (staging_dir / f"{path.stem}.sha256").unlink(missing_ok=True)
+
+    return df
+
+
+def load_reports(report: str, res_dir: Path = Path("res")) -> pd.DataFrame:
+    '''Both tenants of a report stacked in one new frame (safe to modify)'''
+    if HISTORY is not None:
+        load = HISTORY.load
+    else:
+        load = load_aggregated if INCREMENTAL else load_report
+    frames = [load(report, tenant, res_dir) for tenant in TENANTS]
+
+    # same categories on both sides, otherwise concat falls back to object strings
+    for c in frames[0].columns:
+        if isinstance(frames[0][c].dtype, pd.CategoricalDtype):
+            categories = union_categoricals([f[c] for f in frames], sort_categories=True).categories
+            frames = [f.assign(**{c: f[c].cat.set_categories(categories)}) for f in frames]
+
+    return track(f"load:{report}", pd.concat(frames, ignore_index=True))
+
+
+## Incremental aggregates
+
+def _month_hashes(df: pd.DataFrame) -> dict[str, list]:
+    '''month ("2025-01", "NaT" for undated rows) -> [content hash, row positions]'''
+    row_hashes = pd.util.hash_pandas_object(df.drop(columns=DAY_COLUMN), index=False).to_numpy()
+    months = df[DAY_COLUMN].dt.asfreq("M").astype(str)
+    out = {}
+    for month, rows in months.groupby(months, sort=True).indices.items():
+        out[month] = [hashlib.sha256(row_hashes[rows].tobytes()).hexdigest(), rows]
+    return out
+
+
+def _aggregate(rows: pd.DataFrame) -> pd.DataFrame:
+    '''rows summed per (names, day); dates become the day, names stay as plain strings'''
+    date_col = next(c for c in rows.columns if c in DATE_COLUMNS)
+    names = [c for c in rows.columns if c not in DATE_COLUMNS | AMOUNT_COLUMNS | {DAY_COLUMN}]
+    amount = next(c for c in rows.columns if c in AMOUNT_COLUMNS)
+
+    agg = (
+        rows.groupby(names + [DAY_COLUMN], observed=True, dropna=False, sort=False)[amount]
+            .sum()
+            .reset_index()
+    )
+    agg[date_col] = agg[DAY_COLUMN].dt.to_timestamp()
+    for c in names:
+        agg[c] = agg[c].astype(object)
+    return agg[[c for c in rows.columns if c != DAY_COLUMN]]
+
+
+def _part_path(store: Path, month: str, month_hash: str) -> Path:
+    return store / f"{month}-{month_hash[:16]}.{STAGING_FORMAT}"
+
+
+def _read_frame(path: Path) -> pd.DataFrame:
+    return pd.read_parquet(path) if STAGING_FORMAT == "parquet" else pd.read_pickle(path)
+
+
+def _write_frame(df: pd.DataFrame, path: Path) -> None:
+    if STAGING_FORMAT == "parquet":
+        df.to_parquet(path, index=False)
+    else:
+        df.to_pickle(path)
+
+
+def load_aggregated(report: str, tenant: str, res_dir: Path = Path("res")) -> pd.DataFrame:
+    '''
+    Like load_report, but with the rows summed per (names, day). The sums are kept
+    per month and content in res/.aggregates/{report}-{tenant}/, whatever range
+    the export covered: an export seen before is not read at all, and another
+    one only has the months that are new or changed summed again.
+    '''
+    path = (Path(res_dir) / f"{report}-{tenant}.xlsx").resolve()
+    store = path.parent / AGGREGATE_DIR_NAME / path.stem
+
+    with _lock_for(store):
+        st = path.stat()
+        stamp = (st.st_mtime_ns, st.st_size)
+
+        cached = _cache.get(store)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+
+        index_path = store / "index.json"
+        index = json.loads(index_path.read_text()) if index_path.exists() else {}
+        if index.get("version") != AGGREGATE_VERSION:
+            index = {}
+        files = index.get("files", {})   # export content hash -> {month: month hash}
+
+        digest = _file_hash(path)
+        months = files.get(digest)
+        if months is not None and all(_part_path(store, m, h).exists() for m, h in months.items()):
+            with stage("read_aggregates", report=report, tenant=tenant):
+                df = _typed(pd.concat([_read_frame(_part_path(store, m, h)) for m, h in months.items()], ignore_index=True))
+        else:
+            df = load_report(report, tenant, res_dir)
+            month_rows = _month_hashes(df)
+            if not month_rows:
+                return df
+
+            store.mkdir(parents=True, exist_ok=True)
+            parts, dirty = [], 0
+            for month, (month_hash, rows) in month_rows.items():
+                part = _part_path(store, month, month_hash)
+                if part.exists():
+                    parts.append(_read_frame(part))
+                    continue
+                with stage("aggregate", report=report, tenant=tenant, month=month):
+                    agg = _aggregate(df.iloc[rows])
+                    _write_frame(agg, part)
+                parts.append(agg)
+                dirty += 1
+
+            months = {month: month_hash for month, (month_hash, _) in month_rows.items()}
+            df = _typed(pd.concat(parts, ignore_index=True))
+            if dirty:
+                print(f"{path.stem}: {dirty} of {len(months)} months summed again")
+
+        # this export last (most recent); parts no kept export uses are dropped
+        files.pop(digest, None)
+        files[digest] = months
+        files = dict(list(files.items())[-AGGREGATE_KEEP_FILES:])
+        used = {_part_path(store, m, h).name for kept in files.values() for m, h in kept.items()}
+        for part in store.glob(f"*.{STAGING_FORMAT}"):
+            if part.name not in used:
+                part.unlink(missing_ok=True)
+
+        # index last: if anything above failed, the next run starts over
+        index_path.write_text(json.dumps({"version": AGGREGATE_VERSION, "files": files}, indent=2))
+
+        df = _with_day_keys(df)
+
+        _cache[store] = (stamp, df)
+        return df
+
+
+def clear_cache() -> None:
+    _cache.clear()
@@ -0,0 +1,63 @@
+import os
+import threading
+import pandas as pd
+
+try:
+    import resource  # not on Windows: no peak RSS there
+except ImportError:
+    resource = None
+
+# MEMORY_REPORT=1 (or processor --memory-report) records the size of the frames
+# each stage hands on; off by default, memory_usage(deep=True) walks every string
+MEMORY_REPORT = os.environ.get("MEMORY_REPORT", "0") == "1"
+
+# one entry per tracked frame: {"stage", "rows", "bytes"}
+MEMORY_STAGES: list[dict] = []
+_stages_lock = threading.Lock()
+
+
+def frame_bytes(df: pd.DataFrame) -> int:
+    '''Real size of a frame, strings and categories included'''
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+
+def track(stage: str, df: pd.DataFrame) -> pd.DataFrame:
+    '''Records the size of df under `stage` (when enabled) and hands df back'''
+    if MEMORY_REPORT:
+        entry = {"stage": stage, "rows": len(df), "bytes": frame_bytes(df)}
+        with _stages_lock:
+            MEMORY_STAGES.append(entry)
+    return df
+
+
+def peak_rss_mb() -> float | None:
+    '''Peak resident memory of this process so far, in MiB (None where unknown)'''
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # KiB on Linux, bytes on macOS
+    return peak / (1024 * 1024) if os.uname().sysname == "Darwin" else peak / 1024
+
+
+def print_memory_report() -> None:
+    '''Largest frame seen per stage, in the order the stages first ran'''
+    per_stage: dict[str, dict] = {}
+    with _stages_lock:
+        for entry in MEMORY_STAGES:
+            seen = per_stage.get(entry["stage"])
+            if seen is None or entry["bytes"] > seen["bytes"]:
+                per_stage[entry["stage"]] = entry
+
+    if per_stage:
+        print("\nMemory per stage (memory_usage deep):")
+        for stage, entry in per_stage.items():
+            print(f"  {stage:<22} {entry['rows']:>9} rows  {entry['bytes'] / 2**20:8.2f} MiB")
+
+    peak = peak_rss_mb()
+    if peak is not None:
+        print(f"  peak RSS {peak:.1f} MiB")
+
+
+def clear_memory_report() -> None:
+    with _stages_lock:
+        MEMORY_STAGES.clear()
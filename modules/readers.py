@@ -0,0 +1,86 @@
+import os
+import pandas as pd
+from pathlib import Path
+from openpyxl import load_workbook
+from modules.helpers import standardize_columns
+
+# Excel reader used by the loader: "auto", "calamine", "stream" or "pandas"
+# auto = calamine when python-calamine is installed, otherwise stream
+EXCEL_READER = os.environ.get("EXCEL_READER", "auto")
+
+try:
+    import python_calamine  # noqa: F401
+    HAS_CALAMINE = True
+except ImportError:
+    HAS_CALAMINE = False
+
+
+def _standard_name(name) -> str:
+    return str(name).strip().lower().replace(" ", "_")
+
+
+def read_pandas(path: Path, header: int, columns: list[str], dtype=None) -> pd.DataFrame:
+    '''The original path: pandas + openpyxl, whole sheet, then project'''
+    df = pd.read_excel(path, header=header, dtype=dtype)
+    return standardize_columns(df)[columns]
+
+
+def read_calamine(path: Path, header: int, columns: list[str], dtype=None) -> pd.DataFrame:
+    '''Rust calamine engine, only the wanted columns are turned into a frame'''
+    df = pd.read_excel(
+        path,
+        engine="calamine",
+        header=header,
+        usecols=lambda c: _standard_name(c) in columns,
+    )
+    return standardize_columns(df)[columns]
+
+
+def read_stream(path: Path, header: int, columns: list[str], dtype=None) -> pd.DataFrame:
+    '''
+    openpyxl read_only/values_only: rows are streamed and only the wanted
+    columns are kept. `header` means the same as in pd.read_excel.
+    '''
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[0]
+        ws.reset_dimensions()  # some exports carry a wrong <dimension>, don't trust it
+
+        rows = ws.iter_rows(values_only=True)
+        for _ in range(header):
+            next(rows)
+
+        names = [_standard_name(v) for v in next(rows)]
+        idx = [names.index(c) for c in columns]  # ValueError -> caller falls back
+
+        data = [
+            [row[i] if i < len(row) else None for i in idx]
+            for row in rows
+            if any(v is not None for v in row)  # blank rows carry nothing
+        ]
+    finally:
+        wb.close()
+
+    return pd.DataFrame(data, columns=columns)
+
+
+READERS = {
+    "pandas": read_pandas,
+    "calamine": read_calamine,
+    "stream": read_stream,
+}
+
+
+def read_export(path: Path, header: int, columns: list[str], dtype=None) -> pd.DataFrame:
+    '''Reads an export with the configured reader, falling back to pandas for odd files'''
+    name = EXCEL_READER
+    if name == "auto":
+        name = "calamine" if HAS_CALAMINE else "stream"
+
+    if name != "pandas":
+        try:
+            return READERS[name](path, header, columns, dtype)
+        except Exception as e:
+            print(f"{name} reader failed on {Path(path).name} ({e!r}), using pandas")
+
+    return read_pandas(path, header, columns, dtype)
@@ -1,33 +1,50 @@
 import pandas as pd
-from modules.helpers import sanitize, standardize_columns, normalize_names, pivot_by_period
+from pathlib import Path
+from modules.helpers import sanitize, normalize_names, pivot_by_period, period_keys
+from modules.loader import load_reports
+from modules.memory import track
 
-def build_stock() -> pd.DataFrame:
+def build_stock_base(res_dir: Path = Path("res")) -> pd.DataFrame:
+    '''Internal Use only'''
     ## Processing raw input
-    
-    # Extract data frames from excel files
-    stock_negros  = pd.read_excel("res/stock-s2.xlsx", header=6, dtype={"Total": float})
-    stock_blancos = pd.read_excel("res/stock-sg.xlsx", header=6, dtype={"Total": float})
 
-    # Standardizes colum names
-    stock_blancos = standardize_columns(stock_blancos)
-    stock_negros = standardize_columns(stock_negros)
-
-    # Only keep the columns i want to work with
-    stock_blancos = stock_blancos[[ "tipo_gasto", "proveedor", "fecha", "total"]]
-    stock_negros  =  stock_negros[[ "tipo_gasto", "proveedor", "fecha", "total"]]
-
-
-    ## Join both black and white stock
-    stock = pd.concat([stock_blancos, stock_negros],ignore_index=True)
+    # Both black and white stock, parsed once per run by the loader
+    stock = load_reports("stock", res_dir)
 
 
     # Normalizes 
     stock["fecha"] = pd.to_datetime(stock["fecha"], errors="coerce")
     stock = sanitize(stock,[ "tipo_gasto", "proveedor", "fecha"])
 
+    return track("base:stock", stock)
+
+def build_stock(res_dir: Path = Path("res"), granularity: str = "monthly") -> pd.DataFrame:
+
+    stock = build_stock_base(res_dir)
+
     ## Ordering and styling of output table
 
-    # pivot: one column per month, totals summed
-    stock = pivot_by_period(stock,"fecha",[],"total")
+    # pivot: one column per period, totals summed
+    stock = pivot_by_period(stock,"fecha",[],"total", granularity=granularity)
+
+    return stock
+
+def build_stock_by_proveedor(res_dir: Path = Path("res"), granularity: str = "monthly") -> pd.DataFrame:
+
+    stock = build_stock_base(res_dir)
+    stock["proveedor"] = normalize_names(stock["proveedor"])
+
+    # pivot: one row per proveedor, one column per period
+    stock = pivot_by_period(stock,"fecha",["proveedor"],"total", granularity=granularity)
+    stock = stock.sort_values("proveedor").reset_index(drop=True)
 
     return stock
+
+def stock_records(res_dir: Path = Path("res"), granularity: str = "monthly") -> pd.DataFrame:
+    '''Long format (seccion, period, amount), everything under the "stock" seccion'''
+
+    stock = build_stock_base(res_dir)
+    stock["period"] = period_keys(stock, "fecha", granularity)
+    stock["seccion"] = pd.Series("stock", index=stock.index, dtype="category")
+
+    return track("records:stock", stock.rename(columns={"total": "amount"})[["seccion", "period", "amount"]])
@@ -0,0 +1,178 @@
+import os
+import sqlite3
+import threading
+import pandas as pd
+from datetime import date
+from pathlib import Path
+
+from modules import gastos, sueldos
+from modules.helpers import normalize_names
+from modules.instrument import stage
+from modules.loader import REPORTS, DATE_COLUMNS, AMOUNT_COLUMNS, TENANTS, load_report, typed_report
+
+# Every export ever processed, one table per report (same columns as the loader
+# gives, plus tenant and seccion), so other years/slices don't need a new scrape
+HISTORY_DB = Path(os.environ.get("HISTORY_DB", "data/history.sqlite"))
+
+# seccion stored with each row: a classifier (name column, SectionIndex) or a fixed label
+SECCION_OF = {
+    "gastos": ("tipo_gasto", gastos.SECTIONS),
+    "sueldos": ("empleado", sueldos.SECTIONS),
+    "stock": "stock",
+    "facturas": "facturacion",
+}
+
+
+def _columns(report: str) -> tuple[str, list[str], str]:
+    '''(date column, name columns, amount column) of a report'''
+    cols = REPORTS[report]["columns"]
+    date_col = next(c for c in cols if c in DATE_COLUMNS)
+    amount_col = next(c for c in cols if c in AMOUNT_COLUMNS)
+    names = [c for c in cols if c not in (date_col, amount_col)]
+    return date_col, names, amount_col
+
+
+def connect(db_path: Path = HISTORY_DB) -> sqlite3.Connection:
+    '''Opens the history database, creating the tables and indexes if needed'''
+    db_path = Path(db_path)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+
+    for report in REPORTS:
+        date_col, names, amount_col = _columns(report)
+        name_defs = ", ".join(f"{c} TEXT NOT NULL DEFAULT ''" for c in names)
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {report} ("
+            f"tenant TEXT NOT NULL, {date_col} TEXT NOT NULL, {name_defs}, "
+            f"{amount_col} REAL NOT NULL, seccion TEXT, dup INTEGER NOT NULL DEFAULT 0)"
+        )
+        # natural key: the row itself; dup numbers rows that are identical within one export
+        natural = ", ".join(["tenant", date_col, *names, amount_col, "dup"])
+        conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {report}_natural ON {report} ({natural})")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {report}_date ON {report} ({date_col})")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {report}_tenant_date ON {report} (tenant, {date_col})")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {report}_seccion ON {report} (seccion, {date_col})")
+        for c in names:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {report}_{c} ON {report} ({c}, {date_col})")
+    return conn
+
+
+def _rows_for_store(report: str, df: pd.DataFrame) -> pd.DataFrame:
+    '''A loaded export as table rows: dated rows only, '' for empty names, seccion and dup added'''
+    date_col, names, amount_col = _columns(report)
+    rows = df[df[date_col].notna()]
+
+    out = pd.DataFrame({
+        date_col: rows[date_col].dt.strftime("%Y-%m-%d"),
+        **{c: rows[c].astype(object).where(rows[c].notna(), "") for c in names},
+        amount_col: rows[amount_col].fillna(0.0),
+    })
+
+    seccion = SECCION_OF[report]
+    if isinstance(seccion, str):
+        out["seccion"] = seccion
+    else:
+        name_col, index = seccion
+        out["seccion"] = index.classify(normalize_names(rows[name_col])).astype(object)
+
+    out["dup"] = out.groupby([date_col, *names, amount_col], sort=False).cumcount()
+    return out
+
+
+def ingest_export(
+    conn: sqlite3.Connection, report: str, tenant: str, df: pd.DataFrame, span: tuple[date, date] | None = None,
+) -> tuple[int, str, str]:
+    '''
+    Stores one loaded export. Rows already stored for the tenant inside the
+    export's date span are replaced by it, so a re-download with corrections
+    doesn't count twice. span is the range the export was asked for: without
+    it the span is the export's own first..last date, and an empty export
+    replaces nothing. Returns (rows, first date, last date).
+    '''
+    date_col, names, amount_col = _columns(report)
+    rows = _rows_for_store(report, df)
+    if span is not None:
+        first, last = span[0].isoformat(), span[1].isoformat()
+    elif rows.empty:
+        return 0, "", ""
+    else:
+        first, last = rows[date_col].min(), rows[date_col].max()
+    cols = [date_col, *names, amount_col, "seccion", "dup"]
+    placeholders = ", ".join("?" for _ in range(len(cols) + 1))
+
+    with conn:
+        conn.execute(
+            f"DELETE FROM {report} WHERE tenant = ? AND {date_col} BETWEEN ? AND ?",
+            (tenant, first, last),
+        )
+        conn.executemany(
+            f"INSERT OR IGNORE INTO {report} (tenant, {', '.join(cols)}) VALUES ({placeholders})",
+            ((tenant, *row) for row in rows[cols].itertuples(index=False, name=None)),
+        )
+    return len(rows), first, last
+
+
+def ingest_exports(
+    res_dir: Path = Path("res"), db_path: Path = HISTORY_DB, span: tuple[date, date] | None = None,
+) -> dict[str, int]:
+    '''Every {report}-{tenant}.xlsx in res_dir into the history database (span: see ingest_export)'''
+    counts = {}
+    conn = connect(db_path)
+    try:
+        for report in REPORTS:
+            for tenant in TENANTS:
+                if not (Path(res_dir) / f"{report}-{tenant}.xlsx").exists():
+                    continue
+                with stage("ingest", report=report, tenant=tenant):
+                    n, first, last = ingest_export(conn, report, tenant, load_report(report, tenant, res_dir), span)
+                counts[f"{report}-{tenant}"] = n
+                if first:
+                    print(f"History: {report}-{tenant} {first}..{last} ({n} rows)")
+    finally:
+        conn.close()
+    return counts
+
+
+class HistoryQuery:
+    """
+    A date range of the history database, read by the builders instead of the
+    exports in res/ (set it as modules.loader.HISTORY). Each (report, tenant)
+    is queried once, through the date/tenant index, in the order it was stored.
+    """
+
+    def __init__(self, db_path: Path = HISTORY_DB, start: date | None = None, end: date | None = None):
+        self.db_path = Path(db_path)
+        self.start = start
+        self.end = end
+        self._frames: dict[tuple[str, str], pd.DataFrame] = {}
+        self._lock = threading.Lock()
+
+    def load(self, report: str, tenant: str, res_dir: Path | None = None) -> pd.DataFrame:
+        '''Same frame load_report gives for an export, from the stored rows (res_dir is ignored)'''
+        with self._lock:
+            key = (report, tenant)
+            if key not in self._frames:
+                with stage("history", report=report, tenant=tenant):
+                    self._frames[key] = typed_report(self._query(report, tenant))
+            return self._frames[key]
+
+    def _query(self, report: str, tenant: str) -> pd.DataFrame:
+        date_col, names, amount_col = _columns(report)
+        where, params = ["tenant = ?"], [tenant]
+        if self.start is not None:
+            where.append(f"{date_col} >= ?")
+            params.append(self.start.isoformat())
+        if self.end is not None:
+            where.append(f"{date_col} <= ?")
+            params.append(self.end.isoformat())
+
+        select = ", ".join([*(f"NULLIF({c}, '') AS {c}" for c in names), date_col, amount_col])
+        sql = f"SELECT {select} FROM {report} WHERE {' AND '.join(where)} ORDER BY rowid"
+
+        conn = connect(self.db_path)
+        try:
+            df = pd.read_sql_query(sql, conn, params=params)
+        finally:
+            conn.close()
+        return df[REPORTS[report]["columns"]]
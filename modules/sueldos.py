@@ -1,5 +1,9 @@
 import pandas as pd
-from modules.helpers import sanitize, standardize_columns, normalize_names, pivot_by_period
+from pathlib import Path
+from modules.helpers import sanitize, normalize_names, pivot_by_period, period_keys
+from modules.loader import load_reports
+from modules.memory import track
+from modules.classify import SectionIndex
 
 SECTION_ORDER = ["confeccion", "impresion", "extrusion", "echado", "oficina", "gral"]
 SECTION_MAP = {
@@ -41,24 +45,14 @@ SECTION_MAP = {
     ## Desconocidos caen en gral
 }
 
-def build_sueldos_by_employee() -> pd.DataFrame:
-    ## Processing raw input
-
-    # Extract data frames from excel files
-    sueldos_negros = pd.read_excel("res/sueldos-s2.xlsx", header=5, dtype={"Total": float})
-    sueldos_blancos = pd.read_excel("res/sueldos-sg.xlsx", header=5, dtype={"Total": float})
-
-    # Standardizes colum names
-    sueldos_blancos = standardize_columns(sueldos_blancos)
-    sueldos_negros = standardize_columns(sueldos_negros)
-
-    # Only keep the columns i want to work with
-    sueldos_blancos = sueldos_blancos[[ "fecha_cierre", "empleado", "total"]]
-    sueldos_negros = sueldos_negros[[ "fecha_cierre", "empleado", "total"]]
+SECTIONS = SectionIndex("sueldos", SECTION_MAP, "gral", SECTION_ORDER)
 
+def build_sueldos_base(res_dir: Path = Path("res")) -> pd.DataFrame:
+    '''Internal Use only'''
+    ## Processing raw input
 
-    ## Join both black and white sueldos
-    sueldos = pd.concat([sueldos_blancos, sueldos_negros],ignore_index=True)
+    # Both black and white sueldos, parsed once per run by the loader
+    sueldos = load_reports("sueldos", res_dir)
 
 
     # Normalizes 
@@ -67,12 +61,18 @@ def build_sueldos_by_employee() -> pd.DataFrame:
     sueldos["empleado"] = normalize_names(sueldos["empleado"])
 
     # Adds seccion
-    sueldos["seccion"] = sueldos["empleado"].map(SECTION_MAP).fillna("gral")
+    sueldos["seccion"] = SECTIONS.classify(sueldos["empleado"])
+
+    return track("base:sueldos", sueldos)
+
+def build_sueldos_by_employee(res_dir: Path = Path("res"), granularity: str = "monthly") -> pd.DataFrame:
+
+    sueldos = build_sueldos_base(res_dir)
 
     ## Ordering and styling of output table
 
-    # pivot: one column per month, totals summed
-    sueldos = pivot_by_period(sueldos,"fecha_cierre",["seccion", "empleado"],"total")
+    # pivot: one column per period, totals summed
+    sueldos = pivot_by_period(sueldos,"fecha_cierre",["seccion", "empleado"],"total", granularity=granularity)
 
     # order rows by section (custom order) and then employee
     sueldos["seccion"] = pd.Categorical(
@@ -84,9 +84,9 @@ def build_sueldos_by_employee() -> pd.DataFrame:
 
     return sueldos
 
-def build_sueldos_by_section() -> pd.DataFrame:
+def build_sueldos_by_section(res_dir: Path = Path("res"), granularity: str = "monthly") -> pd.DataFrame:
 
-    sueldos = build_sueldos_by_employee()
+    sueldos = build_sueldos_by_employee(res_dir, granularity)
 
     month_cols = sueldos.columns.difference(["seccion", "empleado"])
 
@@ -99,3 +99,19 @@ def build_sueldos_by_section() -> pd.DataFrame:
     #print(sueldos_seccion.to_string(index=False))
 
     return sueldos_seccion
+
+def sueldos_records(res_dir: Path = Path("res"), granularity: str = "monthly") -> pd.DataFrame:
+    '''Long format (seccion, period, amount), one row per employee and period'''
+
+    sueldos = build_sueldos_base(res_dir)
+    sueldos["period"] = period_keys(sueldos, "fecha_cierre", granularity)
+
+    # per employee first, like the by-employee table the sections used to be summed from
+    # (rows without an empleado still count for their seccion)
+    records = (
+        sueldos
+          .groupby(["seccion", "empleado", "period"], as_index=False, observed=True, dropna=False)["total"].sum()
+          .rename(columns={"total": "amount"})
+          [["seccion", "period", "amount"]]
+    )
+    return track("records:sueldos", records)
@@ -0,0 +1,143 @@
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+from modules import gastos, sueldos
+from modules.gastos import gastos_records
+from modules.sueldos import sueldos_records
+from modules.stock import stock_records
+from modules.facturacion import facturas_records
+from modules.instrument import stage
+from modules.memory import track
+from modules.helpers import GRANULARITIES, finest_granularity
+
+
+def stack_records(frames: dict[str, pd.DataFrame]) -> pd.DataFrame:
+    '''
+    Stacks each builder's (seccion, period, amount) records with a "source"
+    column. source and seccion are categorical, so grouping on them is cheap.
+    '''
+    sources = list(frames)
+    out = pd.concat(frames.values(), ignore_index=True)
+    codes = np.repeat(np.arange(len(sources)), [len(df) for df in frames.values()])
+    out["source"] = pd.Categorical.from_codes(codes, categories=sources)
+    out["seccion"] = out["seccion"].astype("category")
+    return track("records", out)
+
+
+def period_sums(records: pd.DataFrame, seccion_col: str = "seccion") -> pd.Series:
+    '''The one pass over the rows: amount per (source, seccion, period)'''
+    return records.groupby(["source", seccion_col, "period"], observed=True)["amount"].sum()
+
+
+def rollup_sums(sums: pd.Series, granularity: str) -> pd.Series:
+    '''
+    period_sums summed up to a coarser granularity (e.g. daily -> weekly,
+    monthly -> quarterly), from the finer sums, without going back to the rows.
+    '''
+    periods = sums.index.get_level_values("period")
+    coarse = periods.asfreq(GRANULARITIES[granularity])
+    if coarse.equals(periods):
+        return sums
+    keys = [sums.index.get_level_values(level) for level in sums.index.names[:-1]]
+    return sums.groupby(keys + [coarse.rename("period")], observed=True).sum()
+
+
+def summarize(
+    records: pd.DataFrame,
+    sections: dict[str, list[str]],
+    fact_source: str = "facturacion",
+    seccion_col: str = "seccion",
+    **labels,
+) -> pd.DataFrame:
+    """
+    One groupby/pivot from long records (source, seccion, period, amount) to the
+    Resumen table. Same result as join_pivots + join_pivots + add_totals_and_result.
+    See summarize_sums for the layout.
+    """
+    return summarize_sums(period_sums(records, seccion_col), sections, fact_source, seccion_col, **labels)
+
+
+def summarize_sums(
+    sums: pd.Series,
+    sections: dict[str, list[str]],
+    fact_source: str = "facturacion",
+    seccion_col: str = "seccion",
+    fact_row_label: str = "facturacion",
+    total_spend_label: str = "gastos_total",
+    result_label: str = "ganancia",
+    total_col_name: str = "TOTAL",
+    avg_col_name: str = "AVG",
+) -> pd.DataFrame:
+    """
+    The Resumen table from period_sums: a row per (source, seccion) in `sections`
+    order, then the gastos_total, facturacion and ganancia rows, plus TOTAL/AVG
+    columns. Secciones not listed in `sections` are left out; facturacion only
+    counts in periods that have spendings.
+    """
+    sources = sums.index.get_level_values("source")
+
+    # spending rows: (source, seccion) x period, in the declared order
+    grid = sums[sources != fact_source].unstack("period", fill_value=0)
+    rows = pd.MultiIndex.from_tuples(
+        [(source, sec) for source, secs in sections.items() for sec in secs]
+    )
+    grid = grid.reindex(index=rows, columns=sorted(grid.columns), fill_value=0)
+    grid.index = grid.index.get_level_values(1)
+    month_cols = list(grid.columns)
+
+    # months x rows, the layout pandas itself keeps a frame's float columns in,
+    # so every sum below adds the numbers in the same order the old chain did
+    block = grid.to_numpy(dtype="float64").T.copy()
+
+    # the three summary rows
+    total_spend = pd.Series(block.sum(axis=1), index=month_cols)
+    fact = sums[sources == fact_source].groupby(level="period").sum().reindex(month_cols).fillna(0)
+    result = fact - total_spend
+    summary_rows = pd.DataFrame(
+        [total_spend, fact, result],
+        index=[total_spend_label, fact_row_label, result_label],
+    )
+    summary_rows[total_col_name] = [float(s.sum()) for s in (total_spend, fact, result)]
+    summary_rows[avg_col_name] = [float(s.mean()) for s in (total_spend, fact, result)]
+
+    grid[total_col_name] = block.sum(axis=0)
+    grid[avg_col_name] = grid[total_col_name] / len(month_cols)
+
+    table = pd.concat([grid, summary_rows])
+    table.index.name = seccion_col
+    table.columns.name = None
+    return table.reset_index()
+
+
+def build_resumen(res_dir: Path = Path("res"), granularity: str = "monthly") -> pd.DataFrame:
+    '''The Resumen sheet from every builder's long records'''
+    return build_resumen_rollups(res_dir, [granularity])[granularity]
+
+
+def build_resumen_rollups(res_dir: Path = Path("res"), granularities: tuple[str, ...] = ("monthly",)) -> dict[str, pd.DataFrame]:
+    '''
+    One Resumen per granularity. The records are read once, at the finest
+    granularity needed; the coarser tables are summed up from those sums.
+    '''
+    finest = finest_granularity(granularities)
+    sources = {
+        "gastos": gastos_records,
+        "sueldos": sueldos_records,
+        "stock": stock_records,
+        "facturacion": facturas_records,
+    }
+    records = stack_records({name: fn(res_dir, finest) for name, fn in sources.items()})
+    with stage("summarize"):
+        sums = period_sums(records)
+
+    sections = {
+        "gastos": gastos.SECTION_ORDER,
+        "sueldos": sueldos.SECTION_ORDER,
+        "stock": ["stock"],
+    }
+    with stage("summarize"):
+        return {
+            granularity: track(f"resumen:{granularity}", summarize_sums(rollup_sums(sums, granularity), sections))
+            for granularity in granularities
+        }
@@ -1,53 +1,266 @@
-import pandas as pd
-from modules.excel_style import style_financial_sheet
+import argparse
+from contextlib import contextmanager
+from datetime import date
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-from modules.sueldos import build_sueldos_by_section, build_sueldos_by_employee
-from modules.gastos import build_gastos_by_section
-from modules.facturacion import  build_facturas_total, build_facturas_por_cliente
-from modules.stock import build_stock
-from modules.helpers import join_pivots, add_totals_and_result
+from modules import instrument
 
-###  Esto deberia llamar a los modules y cada module deberia devolver las 
+if TYPE_CHECKING:
+    from modules.store import HistoryQuery
+
+# pandas/openpyxl and the modules are imported inside run_processor so that
+# `import processor` stays cheap (check with: python -X importtime -c "import processor")
+
+DEFAULT_INPUT = Path("res")
+DEFAULT_OUTPUT = Path("out/resumen_financiero.xlsx")
+
+
+# Detail sheets written next to Resumen: sheet name -> freeze panes cell
+DETAIL_SHEETS = {
+    "Sueldos": "C2",
+    "Facturas": "B2",
+    "Gastos": "C2",
+    "Stock": "B2",
+}
+
+SPECIAL_ROW_FILLS = {
+    "gastos_total": "FFF2CC",
+    "facturacion": "BDD7EE",
+    "ganancia": "E2EFDA",
+}
+
+
+###  Esto deberia llamar a los modules y cada module deberia devolver las
 ### tablas divididas por mes/ o dividirlas en el main?
-def run_processor(output_path: Path):
-        print("Processor running...")
+def run_processor(
+    output_path: Path,
+    input_dir: Path = DEFAULT_INPUT,
+    streaming: bool = False,
+    details: bool = True,
+    workers: int | None = None,
+    memory_report: bool = False,
+    granularity: str | list[str] = "monthly",
+    incremental: bool | None = None,
+    ingest: bool = False,
+    history: "HistoryQuery | None" = None,
+    ingest_span: tuple[date, date] | None = None,
+    report_path: Path | None = None,
+    profile: bool | None = None,
+):
+    '''
+    Every stage of the run is timed into report_path (default: next to the
+    output, x.run.json). profile=True (or RUN_PROFILE=1) also dumps a cProfile
+    x.pstats; the tables are then built one after the other so it sees them.
+    ingest_span is the range the exports were downloaded for: what the history
+    holds in it is replaced, even for an export that came back empty.
+    '''
+    if report_path is None:
+        report_path = instrument.run_report_path(output_path)
+    if profile is None:
+        profile = instrument.RUN_PROFILE
 
-        sueldos = build_sueldos_by_section()
-        #print(sueldos.to_string(index=False))
-
-        gastos = build_gastos_by_section()
-        #print(gastos.to_string(index=False))
-
-        #facturas = build_facturas_por_cliente()
-        facturas =build_facturas_total()
-        #print(facturas.to_string(index=False))
-        
-        stock = build_stock()
-
-        resumen_spendings = join_pivots(gastos, sueldos)
-        resumen_spendings = join_pivots(resumen_spendings, stock, b_label="stock")
-        final = add_totals_and_result(resumen_spendings, facturas)
-        #print(final.to_string(index=False))
-
-        output_path.parent.mkdir(parents=True, exist_ok=True)   
-
-        with pd.ExcelWriter(output_path, engine="openpyxl") as writer:
-            final.to_excel(writer, sheet_name="Resumen", index=False)
-
-        # apply formatting AFTER export
-        style_financial_sheet(
-            filepath=output_path,
-            sheet_name="Resumen",
-            freeze_panes_cell="B2",
-            special_row_fills = {
-                "gastos_total": "FFF2CC",
-                "facturacion": "BDD7EE",
-                "ganancia": "E2EFDA",
-            }
+    with instrument.run("processor", report_path, instrument.profile_path(output_path) if profile else None):
+        _run_processor(
+            output_path, input_dir, streaming, details, workers,
+            memory_report, granularity, incremental, ingest, history, ingest_span,
         )
 
+
+def _run_processor(
+    output_path: Path,
+    input_dir: Path,
+    streaming: bool,
+    details: bool,
+    workers: int | None,
+    memory_report: bool,
+    granularity: str | list[str],
+    incremental: bool | None,
+    ingest: bool,
+    history: "HistoryQuery | None",
+    ingest_span: tuple[date, date] | None,
+):
+    from modules import classify, memory, loader
+
+    # loader/memory switches hold for this run only: the app runs many in one process
+    with _switches(
+        (loader, "INCREMENTAL", loader.INCREMENTAL if incremental is None else incremental),
+        (loader, "HISTORY", history),
+        (memory, "MEMORY_REPORT", memory.MEMORY_REPORT or memory_report),
+    ):
+        import contextvars
+        from concurrent.futures import ThreadPoolExecutor
+        from functools import partial
+        from openpyxl import Workbook
+        from modules.excel_style import write_financial_sheet
+        from modules.summary import build_resumen_rollups
+        from modules.sueldos import build_sueldos_by_employee
+        from modules.gastos import build_gastos_by_tipo
+        from modules.facturacion import build_facturas_por_cliente
+        from modules.stock import build_stock_by_proveedor
+
+        print("Processor running...")
+        classify.new_run()
+
+        # keep the exports in the history database (the builders then read them
+        # from it instead of res/ when a history query is given)
+        if ingest:
+            from modules.store import ingest_exports
+            ingest_exports(input_dir, span=ingest_span)
+
+        if memory_report:
+            memory.clear_memory_report()
+
+        # first granularity: "Resumen" and the detail sheets; the rest get a
+        # "Resumen {granularity}" sheet each, summed up from the same records
+        granularities = [granularity] if isinstance(granularity, str) else list(granularity)
+        primary = granularities[0]
+
+        # Every table is independent: build them all at once. Threads (not
+        # processes) so they share the loader's cache and each export is parsed once.
+        builders = {
+            "Resumen": partial(build_resumen_rollups, granularities=tuple(granularities)),
+        }
+        if details:
+            builders.update({
+                "Sueldos": partial(build_sueldos_by_employee, granularity=primary),
+                "Facturas": partial(build_facturas_por_cliente, granularity=primary),
+                "Gastos": partial(build_gastos_by_tipo, granularity=primary),
+                "Stock": partial(build_stock_by_proveedor, granularity=primary),
+            })
+
+        def build(name, fn):
+            with instrument.stage("build", sheet=name):
+                return fn(input_dir)
+
+        if instrument.profiling():
+            # cProfile only follows this thread: build them here, one at a time
+            tables = {name: build(name, fn) for name, fn in builders.items()}
+        else:
+            # each builder in a copy of this context so its stages nest under the run
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = {
+                    name: pool.submit(contextvars.copy_context().run, build, name, fn)
+                    for name, fn in builders.items()
+                }
+            tables = {name: fut.result() for name, fut in futures.items()}
+
+        resumenes = tables["Resumen"]
+        #print(resumenes[primary].to_string(index=False))
+
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # written and styled in one pass
+        wb = Workbook(write_only=streaming)
+        if not streaming:
+            wb.remove(wb.active)
+
+        for g, final in resumenes.items():
+            sheet = "Resumen" if g == primary else f"Resumen {g}"
+            with instrument.stage("write", sheet=sheet):
+                write_financial_sheet(
+                    final,
+                    None,
+                    sheet_name=sheet,
+                    freeze_panes_cell="B2",
+                    streaming=streaming,
+                    special_row_fills=SPECIAL_ROW_FILLS,
+                    wb=wb,
+                )
+
+        if details:
+            for sheet, freeze in DETAIL_SHEETS.items():
+                with instrument.stage("write", sheet=sheet):
+                    write_financial_sheet(
+                        tables[sheet],
+                        None,
+                        sheet_name=sheet,
+                        freeze_panes_cell=freeze,
+                        streaming=streaming,
+                        special_row_fills={},
+                        wb=wb,
+                    )
+
+        with instrument.stage("save"):
+            wb.save(output_path)
+
         print("Done:")
         print("Exported:", output_path)
+
+        if memory.MEMORY_REPORT:
+            memory.print_memory_report()
         return
-run_processor(Path("out/resumen_financiero.xlsx"))
\ No newline at end of file
+
+
+@contextmanager
+def _switches(*settings):
+    '''Sets each (module, name, value) for the block and puts the old values back'''
+    saved = [(module, name, getattr(module, name)) for module, name, _ in settings]
+    for module, name, value in settings:
+        setattr(module, name, value)
+    try:
+        yield
+    finally:
+        for module, name, value in saved:
+            setattr(module, name, value)
+
+
+def _granularities(value: str) -> list[str]:
+    from modules.helpers import GRANULARITIES
+
+    names = [v.strip() for v in value.split(",") if v.strip()]
+    unknown = [n for n in names if n not in GRANULARITIES]
+    if not names or unknown:
+        raise argparse.ArgumentTypeError(f"choose from {', '.join(GRANULARITIES)}")
+    return names
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m processor",
+        description="Builds the financial summary workbook from the exports in res/.",
+    )
+    parser.add_argument("--input", type=Path, default=DEFAULT_INPUT, help="folder with the {report}-{s2|sg}.xlsx exports")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT, help="output .xlsx path")
+    parser.add_argument("--streaming", action="store_true", help="write-only xlsx output (flat memory for big reports)")
+    parser.add_argument("--summary-only", action="store_true", help="only the Resumen sheet, no detail sheets")
+    parser.add_argument("--workers", type=int, default=None, help="threads used to build the tables")
+    parser.add_argument(
+        "--granularity",
+        type=_granularities,
+        default=["monthly"],
+        help="period of the columns: daily, weekly, monthly, quarterly or yearly; "
+             "comma separated for extra Resumen sheets (e.g. weekly,monthly,quarterly)",
+    )
+    parser.add_argument("--full", action="store_true", help="read every row again instead of reusing the per-month sums in res/.aggregates")
+    parser.add_argument("--ingest", action="store_true", help="also store the exports in the history database (HISTORY_DB)")
+    parser.add_argument("--from-history", action="store_true", help="build from the history database instead of the exports in --input")
+    parser.add_argument("--start", type=date.fromisoformat, default=None, help="with --from-history: first day (YYYY-MM-DD); with --ingest: first day the exports were downloaded for")
+    parser.add_argument("--end", type=date.fromisoformat, default=None, help="with --from-history: last day (YYYY-MM-DD); with --ingest: last day the exports were downloaded for")
+    parser.add_argument("--memory-report", action="store_true", help="print the size of the frames at each stage and the peak RSS")
+    parser.add_argument("--profile", action="store_true", help="also dump a cProfile .pstats next to the output (see RUN_PROFILE)")
+    args = parser.parse_args(argv)
+
+    history = None
+    if args.from_history:
+        from modules.store import HistoryQuery
+        history = HistoryQuery(start=args.start, end=args.end)
+
+    run_processor(
+        args.output,
+        args.input,
+        streaming=args.streaming,
+        details=not args.summary_only,
+        workers=args.workers,
+        memory_report=args.memory_report,
+        granularity=args.granularity,
+        incremental=False if args.full else None,
+        ingest=args.ingest,
+        history=history,
+        ingest_span=(args.start, args.end) if args.ingest and args.start and args.end else None,
+        profile=args.profile or None,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Headless scheduled refresh: downloads and processes the current and previous
+month on a schedule, so the month parts in res/cache, the per-month sums in
+res/.aggregates and the history database are already there when Run is pressed
+in the app. The open months it downloads are marked fresh until the next
+refresh is due (a day for --at and --once, the interval for --every), so the
+app's Run reuses them instead of downloading them again.
+
+    python -m refresh --once            # one refresh now
+    python -m refresh --at 02:00        # every night at 02:00 (REFRESH_AT)
+    python -m refresh --every 180       # every 3 hours
+
+Takes the same lock as the app (runlock.py), so they never scrape at the same
+time: whichever comes second waits for the first one.
+"""
+import argparse
+import os
+import time
+import traceback
+from datetime import date, datetime, timedelta, time as clock
+from pathlib import Path
+
+import controller
+import scraper
+
+REFRESH_MONTHS = int(os.environ.get("REFRESH_MONTHS", "2"))
+REFRESH_AT = os.environ.get("REFRESH_AT", "02:00")
+REFRESH_OUTPUT = Path("out/resumen_refresh.xlsx")
+
+# longest single sleep, so a suspended machine or a clock change is noticed
+MAX_SLEEP_SECONDS = 60
+
+
+def refresh_range(today: date, months: int = REFRESH_MONTHS) -> tuple[date, date]:
+    '''First day of the month `months - 1` months back, up to today'''
+    year, month = today.year, today.month - (months - 1)
+    while month < 1:
+        year, month = year - 1, month + 12
+    return date(year, month, 1), today
+
+
+def refresh_once(
+    months: int = REFRESH_MONTHS,
+    output_path: Path = REFRESH_OUTPUT,
+    interval: timedelta = timedelta(days=1),
+) -> bool:
+    '''
+    One refresh through controller.run_controller. Returns False (and logs) if
+    it failed. The open months it downloads are reused by other runs for
+    `interval`, until the next refresh.
+    '''
+    start, end = refresh_range(date.today(), months)
+    print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] Refreshing {start} .. {end}")
+    controller.RUN_OWNER = "refresh"
+    t0 = time.perf_counter()
+    scraper.REFRESH_INTERVAL = interval
+    try:
+        controller.run_controller(start, end, output_path)
+    except Exception:
+        traceback.print_exc()
+        print(f"Refresh failed after {time.perf_counter() - t0:.0f}s, next one as scheduled")
+        return False
+    finally:
+        scraper.REFRESH_INTERVAL = None
+    print(f"Refresh done in {time.perf_counter() - t0:.0f}s")
+    return True
+
+
+def next_run(now: datetime, at: clock | None = None, every: timedelta | None = None) -> datetime:
+    if every is not None:
+        return now + every
+    when = datetime.combine(now.date(), at)
+    return when if when > now else when + timedelta(days=1)
+
+
+def sleep_until(when: datetime) -> None:
+    while (left := (when - datetime.now()).total_seconds()) > 0:
+        time.sleep(min(left, MAX_SLEEP_SECONDS))
+
+
+def _clock(value: str) -> clock:
+    try:
+        return datetime.strptime(value, "%H:%M").time()
+    except ValueError:
+        raise argparse.ArgumentTypeError("use HH:MM, e.g. 02:00") from None
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m refresh",
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    schedule = parser.add_mutually_exclusive_group()
+    schedule.add_argument("--once", action="store_true", help="refresh now and exit")
+    schedule.add_argument("--at", type=_clock, default=None, help=f"every day at HH:MM (default REFRESH_AT={REFRESH_AT})")
+    schedule.add_argument("--every", type=float, default=None, metavar="MINUTES", help="every MINUTES instead of daily")
+    parser.add_argument("--months", type=int, default=REFRESH_MONTHS, help="current month and the ones before it (REFRESH_MONTHS)")
+    parser.add_argument("--output", type=Path, default=REFRESH_OUTPUT, help="where the refresh writes its workbook")
+    parser.add_argument("--now", action="store_true", help="with --at/--every: also refresh once right away")
+    args = parser.parse_args(argv)
+
+    if args.once:
+        raise SystemExit(0 if refresh_once(args.months, args.output) else 1)
+
+    every = timedelta(minutes=args.every) if args.every else None
+    interval = every or timedelta(days=1)
+    at = args.at or _clock(REFRESH_AT)
+    if args.now:
+        refresh_once(args.months, args.output, interval)
+
+    while True:
+        when = next_run(datetime.now(), at, every)
+        print(f"Next refresh at {when:%Y-%m-%d %H:%M}")
+        sleep_until(when)
+        refresh_once(args.months, args.output, interval)
+
+
+if __name__ == "__main__":
+    main()
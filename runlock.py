@@ -0,0 +1,90 @@
+"""
+One scrape at a time across processes: the app's Run and the scheduled
+refresh (refresh.py) both take this lock before touching res/.
+
+An OS file lock (fcntl / msvcrt), so it is released when the holder exits,
+even if it crashes. The file says who holds it.
+"""
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+RUN_LOCK = Path(os.environ.get("RUN_LOCK", "data/run.lock"))
+
+# how often a waiting run checks the lock again
+POLL_SECONDS = 2.0
+
+# Windows locks a byte range: one far past the text, so the holder stays readable
+_WIN_LOCK_OFFSET = 1 << 20
+
+
+class LockBusy(RuntimeError):
+    pass
+
+
+def _try_lock(f) -> bool:
+    try:
+        if sys.platform == "win32":
+            import msvcrt
+            f.seek(_WIN_LOCK_OFFSET)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+
+def _unlock(f) -> None:
+    if sys.platform == "win32":
+        import msvcrt
+        f.seek(_WIN_LOCK_OFFSET)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        import fcntl
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def holder(path: Path = RUN_LOCK) -> str:
+    '''Who holds (or last held) the lock, e.g. "refresh pid 4242 since 02:00:05"'''
+    try:
+        return Path(path).read_text(encoding="utf-8").strip() or "another run"
+    except OSError:
+        return "another run"
+
+
+@contextmanager
+def run_lock(owner: str, timeout: float | None = None, path: Path = RUN_LOCK, on_wait=None):
+    '''
+    Holds the lock for the block. Waits for the current holder up to `timeout`
+    seconds (None = as long as it takes, 0 = not at all), then raises LockBusy.
+    on_wait(holder) is called once if it has to wait.
+    '''
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    f = open(path, "a+", encoding="utf-8")
+    try:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        waited = False
+        while not _try_lock(f):
+            if deadline is not None and time.monotonic() >= deadline:
+                raise LockBusy(f"{holder(path)} is scraping, try again when it is done")
+            if not waited and on_wait is not None:
+                on_wait(holder(path))
+            waited = True
+            time.sleep(POLL_SECONDS)
+
+        f.seek(0)
+        f.truncate()
+        f.write(f"{owner} pid {os.getpid()} since {datetime.now():%Y-%m-%d %H:%M:%S}\n")
+        f.flush()
+        try:
+            yield
+        finally:
+            _unlock(f)
+    finally:
+        f.close()
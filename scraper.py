@@ -1,31 +1,198 @@
+import asyncio
+import contextvars
 import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from datetime import date
+from datetime import date, timedelta
 from dotenv import load_dotenv
-from playwright.sync_api import sync_playwright
+from typing import NamedTuple
+from urllib.parse import parse_qs
+
+import download_cache
+from http_export import HttpExportClient
+from modules.instrument import stage
 
 load_dotenv()
 
-BASE_URL_S2 = "https://nube2.sipe.com.ar/Bolciti2/Default.aspx?nwflowId=NavegacionWorkflow152402497&codigo=frmHome"
-BASE_URL_SG = "https://nube2.sipe.com.ar/Bolciti/Default.aspx?nwflowId=NavegacionWorkflow1203130143&codigo=frmHome"
+# playwright is imported where a browser is started: the http backend and the
+# app's first window don't pay for it
+
+# SIPE_URL points the scraper at another server, e.g. the local stand-in
+# (python -m benchmarks.fake_sipe) used by benchmarks/bench_scrape.py
+SIPE_URL = os.environ.get("SIPE_URL", "https://nube2.sipe.com.ar").rstrip("/")
+BASE_URL_S2 = f"{SIPE_URL}/Bolciti2/Default.aspx?nwflowId=NavegacionWorkflow152402497&codigo=frmHome"
+BASE_URL_SG = f"{SIPE_URL}/Bolciti/Default.aspx?nwflowId=NavegacionWorkflow1203130143&codigo=frmHome"
 RES_DIR = Path("res")
 
+TENANTS = {
+    "s2": BASE_URL_S2,
+    "sg": BASE_URL_SG,
+}
+
+# Set SCRAPE_CONCURRENT=1 in .env to scrape both tenants at the same time
+SCRAPE_CONCURRENT = os.environ.get("SCRAPE_CONCURRENT", "0") == "1"
+
+# How many report pages a tenant exports at the same time (1 = one after another)
+SCRAPE_MAX_PAGES = int(os.environ.get("SCRAPE_MAX_PAGES", "4"))
+
+# Reuse closed months from res/cache/ instead of downloading the whole range again
+# (months still missing are downloaded together and split, see scrape_exports_url)
+SCRAPE_CACHE = os.environ.get("SCRAPE_CACHE", "1") == "1"
+
+# Open months (the current one) downloaded less than this many hours ago are
+# reused too. 0 = only the ones the scheduled refresh downloaded (below)
+SCRAPE_MAX_AGE_HOURS = float(os.environ.get("SCRAPE_MAX_AGE_HOURS", "0"))
+
+# Set by refresh.py to its interval: the open months it downloads are reused by
+# every run (the app's too) until the next refresh is due
+REFRESH_INTERVAL: timedelta | None = None
+
+# Opt-in: keep each tenant's login cookies in .sessions/ and only log in again when they expired
+SCRAPE_SESSION_CACHE = os.environ.get("SCRAPE_SESSION_CACHE", "0") == "1"
+SESSION_DIR = Path(".sessions")
+
+# Opt-in: keep Chromium running between runs while the process (e.g. the app) stays open
+SCRAPE_KEEP_BROWSER = os.environ.get("SCRAPE_KEEP_BROWSER", "0") == "1"
+
+# A failed export is tried up to SCRAPE_RETRIES times in all, each time on a
+# fresh page, waiting SCRAPE_RETRY_BACKOFF seconds before the second attempt
+# and twice as long before each next one
+SCRAPE_RETRIES = int(os.environ.get("SCRAPE_RETRIES", "3"))
+SCRAPE_RETRY_BACKOFF = float(os.environ.get("SCRAPE_RETRY_BACKOFF", "5"))
+
+# A scrape that fails keeps what it saved (res/checkpoint.json): a rerun within
+# this many hours only downloads the exports that are missing
+SCRAPE_RESUME_HOURS = float(os.environ.get("SCRAPE_RESUME_HOURS", "12"))
+
+# "playwright" drives the browser; "http" replays the form posts directly and
+# falls back to Playwright for whatever it could not download
+SCRAPE_BACKEND = os.environ.get("SCRAPE_BACKEND", "playwright")
+
+# Chrome/Chromium executable for Playwright; empty = the installed Google Chrome
+SCRAPE_CHROME = os.environ.get("SCRAPE_CHROME", "")
+
+USER_INPUT = "#ctl00_ContentPlaceHolder1_UsuarioTX"
+PASS_INPUT = "#ctl00_ContentPlaceHolder1_ClaveTX"
+
+# One entry per scrape step of the last scrape_exports run:
+# {"tenant", "report", "window", "step", "seconds"}
+STEP_TIMINGS: list[dict] = []
+
+
+class ReportSpec(NamedTuple):
+    file: str          # res/{file}-{tenant}.xlsx
+    menu: str          # menu list item text
+    link: str          # link inside the menu section
+    exact: bool        # exact link name match
+    from_input: str
+    to_input: str
+    header: int        # pandas header= offset of the export
+    date_column: str   # the export's date column (standardized name)
 
-def _clear_res_folder():
+
+class ExportJob(NamedTuple):
+    key: str           # key in REPORTS
+    start: date
+    end: date
+    out_path: Path
+
+
+REPORTS = {
+    "sueldos": ReportSpec(
+        "sueldos", "Sueldos y Otros Empleados", "Sueldos", True,
+        "#ctl00_ContentPlaceHolder1_Filtro_2", "#ctl00_ContentPlaceHolder1_Filtro_3", 5, "fecha_cierre",
+    ),
+    "ventas_facturas": ReportSpec(
+        "facturas", "Ventas Grupos Clientes Notas", "Facturas", True,
+        "#ctl00_ContentPlaceHolder1_Filtro_4", "#ctl00_ContentPlaceHolder1_Filtro_5", 7, "fecha",
+    ),
+    "compras_gastos": ReportSpec(
+        "gastos", "Compras Proveedores Facturas", "Facturas Gastos", False,
+        "#ctl00_ContentPlaceHolder1_Filtro_2", "#ctl00_ContentPlaceHolder1_Filtro_3", 6, "fecha",
+    ),
+    "compras_mercaderia": ReportSpec(
+        "stock", "Compras Proveedores Facturas", "Facturas Mercaderia", False,
+        "#ctl00_ContentPlaceHolder1_Filtro_2", "#ctl00_ContentPlaceHolder1_Filtro_3", 6, "fecha",
+    ),
+}
+
+
+def _clear_res_folder(keep: set[Path] = frozenset()):
     RES_DIR.mkdir(parents=True, exist_ok=True)
+    keep = {k.resolve() for k in keep}
     for p in RES_DIR.iterdir():
-        if p.is_file() and p.suffix.lower() in {".xlsx", ".xls"}:
+        if p.is_file() and p.suffix.lower() in {".xlsx", ".xls"} and p.resolve() not in keep:
             p.unlink()
 
 
-def _set_date_by_string(page, input_selector: str, target: date):
+def _resume_age() -> timedelta:
+    return timedelta(hours=SCRAPE_RESUME_HOURS)
+
+
+def _checkpoint(name: str, job: ExportJob) -> None:
+    download_cache.checkpoint(name, REPORTS[job.key].file, (job.start, job.end), job.out_path)
+
+
+def _pending(name: str, jobs: list[ExportJob]) -> list[ExportJob]:
+    '''jobs minus the ones an unfinished scrape of the same range already saved'''
+    left = [
+        job for job in jobs
+        if not download_cache.is_checkpointed(name, REPORTS[job.key].file, (job.start, job.end), job.out_path, _resume_age())
+    ]
+    if len(left) < len(jobs):
+        print(f"{name}: resuming, {len(jobs) - len(left)} exports already saved by the last attempt")
+    return left
+
+
+def _retry_delay(attempt: int) -> float:
+    '''Seconds to wait after failed attempt number `attempt` (1-based), with some jitter'''
+    return SCRAPE_RETRY_BACKOFF * 2 ** (attempt - 1) * random.uniform(0.75, 1.25)
+
+
+def _first_line(e: Exception) -> str:
+    lines = str(e).strip().splitlines()  # playwright errors carry a whole call log
+    return lines[0] if lines else type(e).__name__
+
+
+@contextmanager
+def _timed_step(tenant: str, report: str, window: str, step: str):
+    t0 = time.perf_counter()
+    try:
+        with stage(step, tenant=tenant, report=report, window=window):
+            yield
+    finally:
+        STEP_TIMINGS.append({
+            "tenant": tenant,
+            "report": report,
+            "window": window,
+            "step": step,
+            "seconds": time.perf_counter() - t0,
+        })
+
+
+def _print_step_summary(top: int = 8):
+    totals = {}
+    for t in STEP_TIMINGS:
+        key = (t["tenant"], t["report"], t["step"])
+        totals[key] = totals.get(key, 0.0) + t["seconds"]
+
+    print("Slowest scrape steps:")
+    for (tenant, report, step), secs in sorted(totals.items(), key=lambda kv: -kv[1])[:top]:
+        print(f"  {tenant:<3} {report:<10} {step:<8} {secs:6.1f}s")
+
+
+async def _set_date_by_string(page, input_selector: str, target: date):
     # 1) Make sure the element exists first
-    page.wait_for_selector(input_selector, state="attached", timeout=30_000)
+    await page.wait_for_selector(input_selector, state="attached", timeout=30_000)
 
     value = target.strftime("%d/%m/%Y")  # adjust if the site expects another format
 
     # 2) Set the value + fire events
-    page.evaluate(
+    await page.evaluate(
         """({ selector, value }) => {
             const input = document.querySelector(selector);
             if (!input) {
@@ -39,42 +206,412 @@ def _set_date_by_string(page, input_selector: str, target: date):
     )
 
     # 3) (Optional but useful) verify it actually changed
-    actual = page.locator(input_selector).input_value()
+    actual = await page.locator(input_selector).input_value()
     if actual.strip() != value:
         raise RuntimeError(f"Date did not stick. Wanted '{value}', got '{actual}'")
 
 
 
-def _export_report(page, from_input: str, to_input: str, start: date, end: date, out_path: Path):
-    _set_date_by_string(page, from_input, start)
-    _set_date_by_string(page, to_input, end)
-    page.get_by_role("button", name="Filtrar").click()
+def _postback_of(button: str):
+    '''
+    Matches the postback a click on `button` sends (its name=value is in the
+    form data), not the page's background postbacks to the same Default.aspx
+    '''
+    def matches(response) -> bool:
+        request = response.request
+        if request.method != "POST" or "Default.aspx" not in response.url:
+            return False
+        form = parse_qs(request.post_data or "")
+        return any(button in values for values in form.values()) or button in form.get("__EVENTTARGET", [""])[0]
+    return matches
 
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    with page.expect_download() as d:
-        page.get_by_role("button", name="Exportar").click()
-    d.value.save_as(out_path)
 
-    # helps avoid “menu click timeout” due to busy UI
-    page.wait_for_load_state("networkidle")
+def _check_postback(response, button: str) -> None:
+    # an error page never brings the filtered grid or the download: fail now, not at the timeout
+    if not response.ok:
+        raise RuntimeError(f"{button} answered HTTP {response.status}")
 
 
-def _open_menu_section(page, text: str):
+async def _export_report(page, from_input: str, to_input: str, start: date, end: date, out_path: Path, timed):
+    with timed("dates"):
+        await _set_date_by_string(page, from_input, start)
+        await _set_date_by_string(page, to_input, end)
+
+    # Filtrar is done when its own postback answers, not when the network goes quiet
+    with timed("filtrar"):
+        async with page.expect_response(_postback_of("Filtrar"), timeout=120_000) as filtered:
+            await page.get_by_role("button", name="Filtrar").click()
+        _check_postback(await filtered.value, "Filtrar")
+
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with timed("exportar"):
+        async with page.expect_download(timeout=120_000) as d:
+            async with page.expect_response(_postback_of("Exportar"), timeout=120_000) as exported:
+                await page.get_by_role("button", name="Exportar").click()
+            _check_postback(await exported.value, "Exportar")
+        download = await d.value
+        await download.save_as(out_path)
+
+
+async def _open_menu_section(page, text: str):
     # robust menu open: scroll + retry
     loc = page.get_by_role("listitem").filter(has_text=text).locator("span").first
-    loc.scroll_into_view_if_needed()
-    loc.click(timeout=60_000)
+    await loc.scroll_into_view_if_needed()
+    await loc.click(timeout=60_000)
+
+
+async def _login(page, user: str, pw: str):
+    await page.locator(USER_INPUT).fill(user)
+    await page.locator(PASS_INPUT).fill(pw)
+    await page.get_by_role("button", name="Ingresar").click()
+    # logged in once the login form is gone
+    await page.locator(USER_INPUT).wait_for(state="detached", timeout=60_000)
+
+
+async def _ensure_logged_in(page, url, user: str, pw: str) -> bool:
+    """Opens url and logs in only if the login form shows up. Returns True if it logged in."""
+    await page.goto(url)
+    if await page.locator(USER_INPUT).count() == 0:
+        return False  # saved session still valid
+
+    await _login(page, user, pw)
+    return True
+
+
+def _session_path(name: str) -> Path:
+    return SESSION_DIR / f"{name}.json"
 
-def scrape_exports(start: date, end: date):
-    _clear_res_folder()
-    scrape_exports_url(start,end,BASE_URL_S2,"s2")
-    scrape_exports_url(start,end,BASE_URL_SG,"sg")
-    
 
-def scrape_exports_url(start: date, end: date, url, name: str) -> dict[str, Path]:
+async def _launch(pw):
+    if SCRAPE_CHROME:
+        return await pw.chromium.launch(executable_path=SCRAPE_CHROME, headless=True)
+    return await pw.chromium.launch(channel="chrome", headless=True)
+
+
+class _WarmBrowser:
     """
-    Clears res/*.xls[x], logs in, exports the 3 Excel files into res/, returns their paths.
+    One playwright + Chromium kept alive on a background event loop,
+    so runs after the first one skip the browser launch.
+    Tenants scraped concurrently share it through separate contexts.
     """
+
+    def __init__(self):
+        self._thread_lock = threading.Lock()
+        self._loop = None
+        self._launch_lock = None
+        self._pw = None
+        self._browser = None
+
+    def run(self, coro):
+        with self._thread_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, daemon=True).start()
+        # in the caller's contextvars, so the scrape stages nest under its run
+        # (as processor's threads do; not left to how the loop schedules it)
+        return asyncio.run_coroutine_threadsafe(_in_context(contextvars.copy_context(), coro), self._loop).result()
+
+    async def browser(self):
+        if self._launch_lock is None:
+            self._launch_lock = asyncio.Lock()
+        async with self._launch_lock:
+            if self._browser is None or not self._browser.is_connected():
+                if self._pw is None:
+                    from playwright.async_api import async_playwright
+                    self._pw = await async_playwright().start()
+                self._browser = await _launch(self._pw)
+        return self._browser
+
+    async def _close(self):
+        if self._browser is not None:
+            await self._browser.close()
+        if self._pw is not None:
+            await self._pw.stop()
+        self._browser = None
+        self._pw = None
+
+    def close(self):
+        if self._loop is None:
+            return
+        self.run(self._close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop = None
+        self._launch_lock = None
+
+
+async def _in_context(ctx: contextvars.Context, coro):
+    '''Awaits coro with the variables of ctx set (in this task's own context)'''
+    for var, value in ctx.items():
+        var.set(value)
+    return await coro
+
+
+_warm_browser = _WarmBrowser()
+
+
+def close_warm_browser():
+    _warm_browser.close()
+
+
+async def _export_menu_report(page, spec: ReportSpec, start: date, end: date, out_path: Path, timed):
+    with timed("menu"):
+        await _open_menu_section(page, spec.menu)
+        await page.get_by_role("link", name=spec.link, exact=spec.exact).click(timeout=60_000)
+    await _export_report(
+        page,
+        from_input=spec.from_input,
+        to_input=spec.to_input,
+        start=start,
+        end=end,
+        out_path=out_path,
+        timed=timed,
+    )
+
+def scrape_exports(start: date, end: date, concurrent: bool | None = None) -> dict[str, float]:
+    """
+    Downloads every report for every tenant into res/.
+    Returns the wall-clock seconds spent on each tenant.
+    """
+    if concurrent is None:
+        concurrent = SCRAPE_CONCURRENT
+
+    # exports saved by a failed attempt are kept for the rerun, and joined month
+    # parts for stitch_parts to check (it only writes them again if a part changed)
+    keep = download_cache.checkpointed_paths(_resume_age())
+    if SCRAPE_CACHE:
+        keep |= download_cache.stitched_outputs()
+    _clear_res_folder(keep=keep)
+    STEP_TIMINGS.clear()
+
+    if concurrent:
+        timings = _scrape_tenants_concurrently(start, end)
+    else:
+        timings = {}
+        for name, url in TENANTS.items():
+            timings[name] = _timed_scrape(start, end, url, name)
+
+    download_cache.clear_checkpoint()
+
+    for name, secs in timings.items():
+        print(f"Scrape {name}: {secs:.1f}s")
+    _print_step_summary()
+    return timings
+
+
+def _timed_scrape(start: date, end: date, url, name: str) -> float:
+    t0 = time.perf_counter()
+    with stage("scrape", tenant=name):
+        scrape_exports_url(start, end, url, name)
+    return time.perf_counter() - t0
+
+
+def _scrape_tenants_concurrently(start: date, end: date) -> dict[str, float]:
+    # Each worker thread runs its own event loop + browser, so a failure
+    # (and its screenshot) in one tenant never touches the other one.
+    with ThreadPoolExecutor(max_workers=len(TENANTS)) as pool:
+        futures = {
+            name: pool.submit(contextvars.copy_context().run, _timed_scrape, start, end, url, name)
+            for name, url in TENANTS.items()
+        }
+
+    timings = {}
+    errors = {}
+    for name, fut in futures.items():
+        try:
+            timings[name] = fut.result()
+        except Exception as e:
+            errors[name] = e
+
+    if errors:
+        failed = ", ".join(f"{name}: {e}" for name, e in errors.items())
+        raise RuntimeError(f"Scrape failed for {failed}") from next(iter(errors.values()))
+
+    return timings
+
+
+def scrape_exports_url(
+    start: date,
+    end: date,
+    url,
+    name: str,
+    max_pages: int | None = None,
+    use_cache: bool | None = None,
+) -> dict[str, Path]:
+    """
+    Logs in, exports the 4 Excel files into res/, returns their paths.
+    Each report is exported from its own page of the same logged-in context,
+    at most `max_pages` at a time.
+    With the cache on, only months that are missing or still open are
+    downloaded and res/ files are stitched from the parts. Missing months that
+    follow each other are downloaded as one export and split into their parts,
+    so a cold cache costs one export per report, like without the cache.
+    """
+    if max_pages is None:
+        max_pages = SCRAPE_MAX_PAGES
+    if use_cache is None:
+        use_cache = SCRAPE_CACHE
+
+    outputs = {key: RES_DIR / f"{spec.file}-{name}.xlsx" for key, spec in REPORTS.items()}
+
+    if not use_cache:
+        jobs = _pending(name, [ExportJob(key, start, end, outputs[key]) for key in REPORTS])
+        if jobs:
+            _run_scrape(url, name, jobs, max(1, max_pages), lambda job: _checkpoint(name, job))
+        return outputs
+
+    # nothing exists after today: a range ending in the future gives the same
+    # windows the refresh downloaded today
+    windows = download_cache.month_windows(start, max(start, min(end, date.today())))
+    manifest = download_cache.load_manifest()
+    max_age = timedelta(hours=SCRAPE_MAX_AGE_HOURS) if SCRAPE_MAX_AGE_HOURS > 0 else None
+    jobs = _pending(name, [
+        ExportJob(key, w[0], w[1], download_cache.part_path(name, spec.file, w[0]))
+        for key, spec in REPORTS.items()
+        for w in windows
+        if not download_cache.is_fresh(manifest, name, spec.file, w, max_age)
+    ])
+    jobs, spans = _month_spans(name, jobs)
+    print(f"{name}: {sum(len(spans.get(job, [job])) for job in jobs)} of {len(REPORTS) * len(windows)} month exports to download, in {len(jobs)} exports")
+
+    def on_saved(job: ExportJob):
+        months = spans.get(job)
+        if months is not None:
+            spec = REPORTS[job.key]
+            download_cache.split_export(
+                job.out_path, [m.out_path for m in months], [(m.start, m.end) for m in months],
+                spec.header, spec.date_column,
+            )
+        for month in months or [job]:
+            download_cache.record(name, REPORTS[month.key].file, (month.start, month.end), REFRESH_INTERVAL)
+            _checkpoint(name, month)
+
+    if jobs:
+        _run_scrape(url, name, jobs, max(1, max_pages), on_saved)
+
+    joined = 0
+    for key, spec in REPORTS.items():
+        parts = [download_cache.part_path(name, spec.file, w[0]) for w in windows]
+        joined += download_cache.stitch_parts(parts, outputs[key], spec.header)
+    print(f"{name}: {joined} of {len(REPORTS)} exports joined again, the rest unchanged")
+
+    return outputs
+
+
+def _month_spans(name: str, jobs: list[ExportJob]) -> tuple[list[ExportJob], dict[ExportJob, list[ExportJob]]]:
+    '''
+    Joins the month jobs of a report that follow each other into one job for
+    the whole span. Returns the jobs to run, and the month jobs each span job
+    is split into once saved.
+    '''
+    runs: list[list[ExportJob]] = []
+    for job in jobs:
+        last = runs[-1][-1] if runs else None
+        if last is not None and last.key == job.key and last.end + timedelta(days=1) == job.start:
+            runs[-1].append(job)
+        else:
+            runs.append([job])
+
+    to_run, spans = [], {}
+    for run in runs:
+        if len(run) == 1:
+            to_run.append(run[0])
+            continue
+        first, last = run[0], run[-1]
+        span = ExportJob(first.key, first.start, last.end, download_cache.span_path(name, REPORTS[first.key].file, first.start, last.end))
+        to_run.append(span)
+        spans[span] = run
+    return to_run, spans
+
+
+def _run_scrape(url, name: str, jobs: list[ExportJob], max_pages: int, on_saved=None) -> None:
+    if SCRAPE_BACKEND == "http":
+        done = set()
+
+        def mark_done(job: ExportJob):
+            done.add(job)
+            if on_saved is not None:
+                on_saved(job)
+
+        try:
+            _scrape_http(url, name, jobs, max_pages, mark_done)
+            return
+        except Exception as e:
+            print(f"{name}: HTTP export failed ({e}), falling back to Playwright")
+            jobs = [job for job in jobs if job not in done]
+
+    if SCRAPE_KEEP_BROWSER:
+        _warm_browser.run(_scrape_warm(url, name, jobs, max_pages, on_saved))
+    else:
+        asyncio.run(_scrape_cold(url, name, jobs, max_pages, on_saved))
+
+
+def _scrape_http(url, name: str, jobs: list[ExportJob], max_pages: int, on_saved) -> None:
+    print("Retrieving files (http) from")
+    print(url)
+    print("...")
+
+    client = HttpExportClient()
+    with _timed_step(name, "-", "-", "login"):
+        home = client.login(
+            url, os.environ["APP_USER"], os.environ["APP_PASS"],
+            USER_INPUT.lstrip("#"), PASS_INPUT.lstrip("#"),
+        )
+
+    def run_job(job: ExportJob):
+        spec = REPORTS[job.key]
+        page = home
+        for attempt in range(1, SCRAPE_RETRIES + 1):
+            try:
+                if attempt > 1:
+                    # fresh home page; logs in again if the session died
+                    page = client.login(
+                        url, os.environ["APP_USER"], os.environ["APP_PASS"],
+                        USER_INPUT.lstrip("#"), PASS_INPUT.lstrip("#"),
+                    )
+                with _timed_step(name, spec.file, f"{job.start}..{job.end}", "http"):
+                    client.export(page, spec, job.start, job.end, job.out_path)
+                break
+            except Exception as e:
+                if attempt == SCRAPE_RETRIES:
+                    raise
+                delay = _retry_delay(attempt)
+                print(f"{name} {spec.file}: attempt {attempt} failed ({_first_line(e)}), retrying in {delay:.0f}s")
+                time.sleep(delay)
+        on_saved(job)
+
+    with ThreadPoolExecutor(max_workers=max_pages) as pool:
+        for fut in [pool.submit(contextvars.copy_context().run, run_job, job) for job in jobs]:
+            fut.result()
+
+    print("Done")
+
+
+async def _screenshot(page, path: str) -> None:
+    '''Best effort: a page that is already broken may not screenshot either'''
+    try:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        await page.screenshot(path=path, full_page=True)
+    except Exception as e:
+        print(f"Could not save {path}: {_first_line(e)}")
+
+
+async def _scrape_cold(url, name: str, jobs: list[ExportJob], max_pages: int, on_saved=None) -> None:
+    from playwright.async_api import async_playwright
+
+    async with async_playwright() as p:
+        browser = await _launch(p)
+        try:
+            await _scrape_exports_url(browser, url, name, jobs, max_pages, on_saved)
+        finally:
+            await browser.close()
+
+
+async def _scrape_warm(url, name: str, jobs: list[ExportJob], max_pages: int, on_saved=None) -> None:
+    browser = await _warm_browser.browser()
+    await _scrape_exports_url(browser, url, name, jobs, max_pages, on_saved)
+
+
+async def _scrape_exports_url(browser, url, name: str, jobs: list[ExportJob], max_pages: int, on_saved=None) -> None:
     print("Retrieving files from")
     print(url)
     print("...")
@@ -82,84 +619,68 @@ def scrape_exports_url(start: date, end: date, url, name: str) -> dict[str, Path
     user = os.environ["APP_USER"]
     pw = os.environ["APP_PASS"]
 
-    ym = f"{start.year}-{start.month:02d}"  # just for naming
-    outputs = {
-        "sueldos": RES_DIR / f"sueldos-{name}.xlsx",
-        "ventas_facturas": RES_DIR / f"facturas-{name}.xlsx",
-        "compras_gastos": RES_DIR / f"gastos-{name}.xlsx",
-        "compras_mercaderia": RES_DIR / f"stock-{name}.xlsx",  # NEW
-    }
+    session_path = _session_path(name)
+    storage_state = session_path if SCRAPE_SESSION_CACHE and session_path.exists() else None
 
+    context = await browser.new_context(accept_downloads=True, storage_state=storage_state)
+    page = await context.new_page()
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(channel="chrome", headless=True)    
-        context = browser.new_context(accept_downloads=True)
-        page = context.new_page()
+    try:
+        # Login (skipped when the saved session is still valid)
+        with _timed_step(name, "-", "-", "login"):
+            logged_in = await _ensure_logged_in(page, url, user, pw)
+        if logged_in and SCRAPE_SESSION_CACHE:
+            SESSION_DIR.mkdir(parents=True, exist_ok=True)
+            await context.storage_state(path=session_path)
+        home_url = page.url
 
-        try:
-            # Login
-            page.goto(url)
-            page.locator("#ctl00_ContentPlaceHolder1_UsuarioTX").fill(user)
-            page.locator("#ctl00_ContentPlaceHolder1_ClaveTX").fill(pw)
-            page.get_by_role("button", name="Ingresar").click()
-            page.wait_for_load_state("networkidle")
-
-            # 1) Sueldos
-            _open_menu_section(page, "Sueldos y Otros Empleados")
-            page.get_by_role("link", name="Sueldos", exact=True).click(timeout=60_000)
-            _export_report(
-                page,
-                from_input="#ctl00_ContentPlaceHolder1_Filtro_2",
-                to_input="#ctl00_ContentPlaceHolder1_Filtro_3",
-                start=start,
-                end=end,
-                out_path=outputs["sueldos"],
-            )
+        # One page per export, all sharing the login cookies
+        sem = asyncio.Semaphore(max_pages)
 
-            # 2) Ventas - Facturas
-            _open_menu_section(page, "Ventas Grupos Clientes Notas")
-            page.get_by_role("link", name="Facturas", exact=True).click(timeout=60_000)
-            _export_report(
-                page,
-                from_input="#ctl00_ContentPlaceHolder1_Filtro_4",
-                to_input="#ctl00_ContentPlaceHolder1_Filtro_5",
-                start=start,
-                end=end,
-                out_path=outputs["ventas_facturas"],
-            )
+        async def run_job(job: ExportJob):
+            spec = REPORTS[job.key]
 
-            # 3) Compras - Facturas Gastos
-            _open_menu_section(page, "Compras Proveedores Facturas")
-            page.get_by_role("link", name="Facturas Gastos").click(timeout=60_000)
-            _export_report(
-                page,
-                from_input="#ctl00_ContentPlaceHolder1_Filtro_2",
-                to_input="#ctl00_ContentPlaceHolder1_Filtro_3",
-                start=start,
-                end=end,
-                out_path=outputs["compras_gastos"],
-            )
+            def timed(step: str):
+                return _timed_step(name, spec.file, f"{job.start}..{job.end}", step)
 
-            # 4) Compras - Facturas Mercaderia
-            _open_menu_section(page, "Compras Proveedores Facturas")
-            page.get_by_role("link", name="Facturas Mercaderia").click(timeout=60_000)
-            _export_report(
-                page,
-                from_input="#ctl00_ContentPlaceHolder1_Filtro_2",
-                to_input="#ctl00_ContentPlaceHolder1_Filtro_3",
-                start=start,
-                end=end,
-                out_path=outputs["compras_mercaderia"],
-            )
+            async with sem:
+                for attempt in range(1, SCRAPE_RETRIES + 1):
+                    job_page = await context.new_page()
+                    try:
+                        with timed("open"):
+                            # first attempt reuses the session; a retry logs in again if it expired
+                            if attempt == 1:
+                                await job_page.goto(home_url)
+                            else:
+                                await _ensure_logged_in(job_page, home_url, user, pw)
+                        await _export_menu_report(job_page, spec, job.start, job.end, job.out_path, timed)
+                        break
+                    except Exception as e:
+                        await _screenshot(job_page, f"out/scrape_fail-{name}-{spec.file}.png")
+                        if attempt == SCRAPE_RETRIES:
+                            raise
+                        delay = _retry_delay(attempt)
+                        print(f"{name} {spec.file}: attempt {attempt} failed ({_first_line(e)}), retrying in {delay:.0f}s")
+                        await asyncio.sleep(delay)
+                    finally:
+                        await job_page.close()
+            if on_saved is not None:
+                on_saved(job)
 
+        results = await asyncio.gather(*(run_job(job) for job in jobs), return_exceptions=True)
 
-        except Exception:
-            Path("out").mkdir(exist_ok=True)
-            page.screenshot(path="out/scrape_fail.png", full_page=True)
-            raise
-        finally:
-            context.close()
-            browser.close()
+    except Exception:
+        await _screenshot(page, f"out/scrape_fail-{name}.png")
+        raise
+    finally:
+        await context.close()
+
+    # every export that could be saved is checkpointed; a rerun only retries these
+    failed = [(job, res) for job, res in zip(jobs, results) if isinstance(res, Exception)]
+    if failed:
+        detail = ", ".join(f"{REPORTS[job.key].file}: {_first_line(res)}" for job, res in failed)
+        raise RuntimeError(
+            f"{name}: {len(failed)} of {len(jobs)} exports failed after {SCRAPE_RETRIES} attempts ({detail})"
+        ) from failed[0][1]
 
     print("Done")
-    return outputs
@@ -0,0 +1,94 @@
+"""
+modules/classify.py: how a label finds its seccion, the fuzzy match cache and
+what is reported.
+"""
+import contextlib
+import io
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import pandas as pd
+
+from modules import classify
+from modules.classify import SectionIndex
+
+SECTION_MAP = {
+    "Mario Algañaraz": "cocina",
+    "JUAN PEREZ": "salon",
+    "Electricidad": "servicios",
+}
+
+
+class ClassifyTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.cache_path = Path(tmp.name) / "section_matches.json"
+        patcher = mock.patch.object(classify, "MATCH_CACHE_PATH", self.cache_path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def classify(self, labels: list, section_map: dict = SECTION_MAP, index: SectionIndex | None = None) -> tuple[list, str]:
+        '''secciones of the labels, and what was printed'''
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            index = index or SectionIndex("test", section_map, "otros")
+            secciones = index.classify(pd.Series(labels, dtype=object))
+        return [None if pd.isna(s) else s for s in secciones], out.getvalue()
+
+    def test_exact_and_normalized_labels(self):
+        secciones, printed = self.classify(["JUAN PEREZ", "  mario  algañaraz ", "MARIO ALGANARAZ", "electricidad"])
+        self.assertEqual(secciones, ["salon", "cocina", "cocina", "servicios"])
+        self.assertEqual(printed, "")
+
+    def test_fuzzy_label_is_reported(self):
+        secciones, printed = self.classify(["Juan Peres", "Electricida"])
+        self.assertEqual(secciones, ["salon", "servicios"])
+        self.assertIn("2 label(s) matched by similarity", printed)
+        self.assertIn("'Juan Peres' as 'JUAN PEREZ' -> salon", printed)
+
+    def test_unmapped_and_missing_labels_fall_to_default(self):
+        secciones, printed = self.classify(["Gas Natural", None, "Juan"])
+        self.assertEqual(secciones, ["otros", "otros", "otros"])
+        self.assertIn("2 label(s) without seccion -> otros: Gas Natural, Juan", printed)
+
+    def test_reported_once_per_run(self):
+        index = SectionIndex("test", SECTION_MAP, "otros")
+        _, first = self.classify(["Juan Peres", "Gas Natural"], index=index)
+        _, same_run = self.classify(["Juan Peres", "Gas Natural"], index=index)
+        classify.new_run()
+        _, next_run = self.classify(["Juan Peres", "Gas Natural"], index=index)
+
+        self.assertIn("matched by similarity", first)
+        self.assertEqual(same_run, "")
+        self.assertEqual(next_run, first)
+
+    def test_cached_decision_is_used_while_the_keys_stay_the_same(self):
+        self.classify(["Juan Peres"])
+        cached = json.loads(self.cache_path.read_text(encoding="utf-8"))["test"]
+        self.assertEqual(cached["matches"], {"JUAN PERES": "JUAN PEREZ"})
+
+        # a stricter cutoff would not match it again: the cached decision is used
+        with mock.patch.object(classify, "FUZZY_CUTOFF", 0.99):
+            secciones, _ = self.classify(["Juan Peres"])
+        self.assertEqual(secciones, ["salon"])
+
+    def test_cached_decisions_are_dropped_when_the_keys_change(self):
+        self.classify(["Juan Peres", "Gas Natural"])
+        renamed = {**SECTION_MAP, "Gas Natural": "servicios"}
+        del renamed["JUAN PEREZ"]
+        renamed["Juan Peralta"] = "salon"
+
+        with mock.patch.object(classify, "FUZZY_CUTOFF", 0.99):
+            secciones, _ = self.classify(["Juan Peres", "Gas Natural"], renamed)
+        self.assertEqual(secciones, ["otros", "servicios"])
+        cached = json.loads(self.cache_path.read_text(encoding="utf-8"))["test"]
+        self.assertEqual(cached["keys"], classify._keys_digest(classify.normalize_key(k) for k in renamed))
+        self.assertEqual(cached["matches"], {"JUAN PERES": None})
+
+
+if __name__ == "__main__":
+    unittest.main()
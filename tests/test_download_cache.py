@@ -0,0 +1,296 @@
+"""
+download_cache.py: month parts in res/cache joined into the res/ exports.
+"""
+import contextlib
+import io
+import json
+import tempfile
+import unittest
+import zipfile
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from unittest import mock
+
+import pandas as pd
+from openpyxl import Workbook
+
+import download_cache
+import scraper
+
+HEADER = 2  # pandas header= offset: two title rows above the column names
+
+
+def _write_part(path: Path, rows: list[tuple]) -> Path:
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["Facturas Gastos"])
+    ws.append(["Desde 01/01/2026"])
+    ws.append(["fecha", "proveedor", "total"])
+    for row in rows:
+        ws.append(row)
+    wb.save(path)
+    return path
+
+
+class CacheDirTest(unittest.TestCase):
+    '''Points res/cache at a temporary folder for each test'''
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+        cache = self.dir / "cache"
+        for name, value in {
+            "CACHE_DIR": cache,
+            "MANIFEST_PATH": cache / "manifest.json",
+            "STITCHED_PATH": cache / "stitched.json",
+            "CHECKPOINT_PATH": self.dir / "checkpoint.json",
+        }.items():
+            patcher = mock.patch.object(download_cache, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def download(self, window: tuple[date, date], fresh_for: timedelta | None = None) -> Path:
+        part = download_cache.part_path("sg", "gastos", window[0])
+        part.parent.mkdir(parents=True, exist_ok=True)
+        _write_part(part, [(window[0].strftime("%d/%m/%Y"), "Edenor", 100.0)])
+        download_cache.record("sg", "gastos", window, fresh_for)
+        return part
+
+    def is_fresh(self, window: tuple[date, date], max_age: timedelta | None = None) -> bool:
+        return download_cache.is_fresh(download_cache.load_manifest(), "sg", "gastos", window, max_age)
+
+
+class MonthWindowsTest(unittest.TestCase):
+    def test_whole_months_across_the_year_end(self):
+        self.assertEqual(download_cache.month_windows(date(2025, 11, 1), date(2026, 2, 28)), [
+            (date(2025, 11, 1), date(2025, 11, 30)),
+            (date(2025, 12, 1), date(2025, 12, 31)),
+            (date(2026, 1, 1), date(2026, 1, 31)),
+            (date(2026, 2, 1), date(2026, 2, 28)),
+        ])
+
+    def test_partial_first_and_last_month(self):
+        self.assertEqual(download_cache.month_windows(date(2024, 12, 15), date(2025, 2, 10)), [
+            (date(2024, 12, 15), date(2024, 12, 31)),
+            (date(2025, 1, 1), date(2025, 1, 31)),
+            (date(2025, 2, 1), date(2025, 2, 10)),
+        ])
+
+    def test_inside_one_month(self):
+        self.assertEqual(download_cache.month_windows(date(2024, 2, 3), date(2024, 2, 29)), [(date(2024, 2, 3), date(2024, 2, 29))])
+
+
+class IsFreshTest(CacheDirTest):
+    def test_month_downloaded_after_it_closed(self):
+        window = (date(2025, 1, 1), date(2025, 1, 31))
+        self.download(window)
+        self.assertTrue(self.is_fresh(window))
+
+    def test_month_downloaded_while_open(self):
+        window = (date(2025, 1, 1), date(2025, 1, 31))
+        self.download(window)
+        manifest = download_cache.load_manifest()
+        manifest["sg/gastos/2025-01"]["fetched_at"] = "2025-01-20T10:00:00"
+        self.assertFalse(download_cache.is_fresh(manifest, "sg", "gastos", window))
+        self.assertFalse(download_cache.is_fresh(manifest, "sg", "gastos", window, max_age=timedelta(hours=24)))
+
+    def test_other_window_of_the_same_month(self):
+        self.download((date(2025, 1, 10), date(2025, 1, 31)))
+        self.assertFalse(self.is_fresh((date(2025, 1, 1), date(2025, 1, 31))))
+        self.assertFalse(self.is_fresh((date(2025, 1, 10), date(2025, 1, 20))))
+
+    def test_part_missing_on_disk(self):
+        window = (date(2025, 1, 1), date(2025, 1, 31))
+        self.download(window).unlink()
+        self.assertFalse(self.is_fresh(window))
+        self.assertFalse(self.is_fresh((date(2025, 2, 1), date(2025, 2, 28))))
+
+
+class StitchPartsTest(CacheDirTest):
+    def setUp(self):
+        super().setUp()
+        self.parts = [self.download(download_cache.month_windows(date(2025, 1, 1), date(2025, 3, 31))[i]) for i in range(3)]
+        self.out = self.dir / "res" / "gastos-sg.xlsx"
+
+    def test_unchanged_parts_are_not_joined_again(self):
+        self.assertTrue(download_cache.stitch_parts(self.parts, self.out, HEADER))
+        written = self.out.stat().st_mtime_ns
+        self.assertFalse(download_cache.stitch_parts(self.parts, self.out, HEADER))
+        self.assertEqual(self.out.stat().st_mtime_ns, written)
+        self.assertEqual(download_cache.stitched_outputs(), {self.out})
+
+    def test_changed_part_is_joined_again(self):
+        download_cache.stitch_parts(self.parts, self.out, HEADER)
+        _write_part(self.parts[1], [("03/02/2025", "Aysa", 55.5), ("04/02/2025", "Aysa", 44.5)])
+
+        self.assertTrue(download_cache.stitch_parts(self.parts, self.out, HEADER))
+        joined = pd.read_excel(self.out, header=HEADER)
+        self.assertEqual(joined["total"].tolist(), [100.0, 55.5, 44.5, 100.0])
+        self.assertFalse(download_cache.stitch_parts(self.parts, self.out, HEADER))
+
+    def test_other_parts_or_edited_output_are_joined_again(self):
+        download_cache.stitch_parts(self.parts, self.out, HEADER)
+        self.assertTrue(download_cache.stitch_parts(self.parts[:2], self.out, HEADER))
+        self.assertEqual(len(pd.read_excel(self.out, header=HEADER)), 2)
+
+        _write_part(self.out, [])
+        self.assertTrue(download_cache.stitch_parts(self.parts[:2], self.out, HEADER))
+        self.assertEqual(len(pd.read_excel(self.out, header=HEADER)), 2)
+
+    def test_single_part_is_copied(self):
+        self.assertTrue(download_cache.stitch_parts(self.parts[:1], self.out, HEADER))
+        self.assertEqual(self.out.read_bytes(), self.parts[0].read_bytes())
+
+
+class SplitExportTest(CacheDirTest):
+    def test_rows_go_to_the_month_of_their_date(self):
+        span = download_cache.span_path("sg", "gastos", date(2025, 12, 1), date(2026, 2, 10))
+        span.parent.mkdir(parents=True)
+        _write_part(span, [
+            (datetime(2026, 1, 5), "Edenor", 1.0),
+            ("2026-02-03", "Aysa", 2.0),
+            (None, "Sin fecha", 3.0),
+            (datetime(2026, 2, 10), "Edenor", 4.0),
+            (datetime(2025, 12, 31, 18, 30), "Aysa", 5.0),
+        ])
+        windows = download_cache.month_windows(date(2025, 12, 1), date(2026, 2, 10))
+        parts = [download_cache.part_path("sg", "gastos", w[0]) for w in windows]
+
+        download_cache.split_export(span, parts, windows, HEADER, "fecha")
+
+        self.assertFalse(span.exists())
+        totals = [pd.read_excel(p, header=HEADER)["total"].tolist() for p in parts]
+        self.assertEqual(totals, [[3.0, 5.0], [1.0], [2.0, 4.0]])
+        with_titles = pd.read_excel(parts[1], header=None)
+        self.assertEqual(with_titles.iloc[0, 0], "Facturas Gastos")
+
+
+class RefreshedOpenMonthTest(CacheDirTest):
+    def setUp(self):
+        super().setUp()
+        today = date.today()
+        self.window = (today.replace(day=1), today)
+
+    def test_open_month_is_downloaded_again(self):
+        self.download(self.window)
+        self.assertFalse(self.is_fresh(self.window))
+        self.assertTrue(self.is_fresh(self.window, max_age=timedelta(hours=1)))
+
+    def test_refreshed_open_month_is_reused_until_the_next_refresh(self):
+        self.download(self.window, fresh_for=timedelta(days=1))
+        self.assertTrue(self.is_fresh(self.window))
+        with mock.patch.object(download_cache, "datetime", wraps=datetime) as clock:
+            clock.now.return_value = datetime.now() + timedelta(days=1, minutes=1)
+            self.assertFalse(self.is_fresh(self.window))
+
+
+class ResumeTest(CacheDirTest):
+    '''scraper.scrape_exports after a failed attempt, with the export steps faked'''
+
+    START, END = date(2025, 1, 1), date(2025, 1, 31)
+
+    def setUp(self):
+        super().setUp()
+        self.res = self.dir / "res"
+        for name, value in {"RES_DIR": self.res, "SCRAPE_CACHE": False, "SCRAPE_CONCURRENT": False}.items():
+            patcher = mock.patch.object(scraper, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.downloaded: list[tuple[str, str]] = []
+        self.fail = None   # (tenant, report key) whose export raises
+
+    def _run_scrape(self, url, name, jobs, max_pages, on_saved=None):
+        for job in jobs:
+            if (name, job.key) == self.fail:
+                raise RuntimeError(f"{job.key} failed")
+            _write_part(job.out_path, [])
+            self.downloaded.append((name, job.key))
+            on_saved(job)
+
+    def scrape(self):
+        self.downloaded.clear()
+        with mock.patch.object(scraper, "_run_scrape", self._run_scrape), contextlib.redirect_stdout(io.StringIO()):
+            scraper.scrape_exports(self.START, self.END)
+        return self.downloaded
+
+    def fail_once(self):
+        self.fail = ("sg", "compras_mercaderia")
+        with self.assertRaisesRegex(RuntimeError, "compras_mercaderia failed"):
+            self.scrape()
+        self.fail = None
+
+    def test_rerun_only_downloads_what_failed(self):
+        self.fail_once()
+        self.assertTrue(download_cache.CHECKPOINT_PATH.exists())
+        self.assertEqual(len(json.loads(download_cache.CHECKPOINT_PATH.read_text())), 7)
+
+        self.assertEqual(self.scrape(), [("sg", "compras_mercaderia")])
+        self.assertEqual(len(list(self.res.glob("*.xlsx"))), 8)
+        self.assertFalse(download_cache.CHECKPOINT_PATH.exists())
+
+    def test_finished_scrape_downloads_everything_again(self):
+        self.scrape()
+        self.assertFalse(download_cache.CHECKPOINT_PATH.exists())
+        self.assertEqual(len(self.scrape()), 8)
+
+    def test_stale_checkpoint_is_downloaded_again(self):
+        self.fail_once()
+        entries = json.loads(download_cache.CHECKPOINT_PATH.read_text())
+        stale = datetime.now() - timedelta(hours=scraper.SCRAPE_RESUME_HOURS, minutes=1)
+        for entry in entries.values():
+            entry["saved_at"] = stale.isoformat(timespec="seconds")
+        download_cache.CHECKPOINT_PATH.write_text(json.dumps(entries))
+
+        self.assertEqual(len(self.scrape()), 8)
+
+    def test_moved_or_deleted_export_is_downloaded_again(self):
+        self.fail_once()
+        (self.res / "gastos-s2.xlsx").rename(self.dir / "gastos-s2.xlsx")
+        entries = json.loads(download_cache.CHECKPOINT_PATH.read_text())
+        moved = next(k for k in entries if k.startswith("s2/sueldos/"))
+        entries[moved]["path"] = (self.dir / "sueldos-s2.xlsx").as_posix()
+        download_cache.CHECKPOINT_PATH.write_text(json.dumps(entries))
+
+        self.assertEqual(
+            sorted(self.scrape()),
+            [("s2", "compras_gastos"), ("s2", "sueldos"), ("sg", "compras_mercaderia")],
+        )
+
+    def test_other_range_is_not_resumed(self):
+        self.fail_once()
+        self.START = date(2025, 2, 1)
+        self.END = date(2025, 2, 28)
+        self.assertEqual(len(self.scrape()), 8)
+
+
+class JoinPartsTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+        self.parts = [
+            _write_part(self.dir / "2026-01.xlsx", [("02/01/2026", "Edenor", 1500.5), ("15/01/2026", "Aysa", 320.0)]),
+            _write_part(self.dir / "2026-02.xlsx", [("03/02/2026", "Edenor", 1720.25)]),
+        ]
+
+    def test_same_parts_join_to_the_same_deflated_bytes(self):
+        first, second = self.dir / "a.xlsx", self.dir / "b.xlsx"
+        download_cache._join_parts(self.parts, first, HEADER)
+        download_cache._join_parts(self.parts, second, HEADER)
+
+        self.assertEqual(first.read_bytes(), second.read_bytes())
+        with zipfile.ZipFile(first) as joined:
+            self.assertEqual({i.compress_type for i in joined.infolist()}, {zipfile.ZIP_DEFLATED})
+            self.assertEqual({i.date_time for i in joined.infolist()}, {(1980, 1, 1, 0, 0, 0)})
+
+    def test_joined_rows_are_the_parts_in_order(self):
+        out = self.dir / "gastos-sg.xlsx"
+        download_cache._join_parts(self.parts, out, HEADER)
+
+        expected = pd.concat([pd.read_excel(p, header=HEADER) for p in self.parts], ignore_index=True)
+        pd.testing.assert_frame_equal(pd.read_excel(out, header=HEADER), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+"""
+http_export.py against recorded SIPE answers (tests/sipe, replayed by
+benchmarks/replay_sipe.py). Re-record with:
+
+    python -m benchmarks.replay_sipe record --fake --out tests/sipe --report gastos --report facturas
+"""
+import json
+import shutil
+import tempfile
+import unittest
+import urllib.error
+from datetime import date
+from pathlib import Path
+
+import scraper
+from benchmarks.replay_sipe import EXCHANGES, ReplaySipe
+from http_export import AspNetPage, HttpExportClient
+
+RECORDED = Path(__file__).parent / "sipe"
+TENANT_PATH = scraper.BASE_URL_SG[len(scraper.SIPE_URL):]
+USER_ID = scraper.USER_INPUT.lstrip("#")
+PASS_ID = scraper.PASS_INPUT.lstrip("#")
+START, END = date(2026, 1, 1), date(2026, 1, 31)
+
+
+def _exchanges(folder: Path = RECORDED) -> list[dict]:
+    return json.loads((folder / EXCHANGES).read_text(encoding="utf-8"))
+
+
+def _recorded_page(index: int) -> AspNetPage:
+    return AspNetPage("http://sipe" + TENANT_PATH, (RECORDED / f"{index:02d}.html").read_text(encoding="utf-8"))
+
+
+def _login(sipe: ReplaySipe) -> tuple[HttpExportClient, AspNetPage]:
+    client = HttpExportClient(timeout=10)
+    return client, client.login(sipe.url + TENANT_PATH, "bench", "bench", USER_ID, PASS_ID)
+
+
+class FormParserTest(unittest.TestCase):
+    def test_login_page_fields(self):
+        page = _recorded_page(0)
+        self.assertIn("__VIEWSTATE", page.fields)
+        self.assertEqual(page.field_name(USER_ID), "ctl00$ContentPlaceHolder1$UsuarioTX")
+        self.assertEqual(page.find_action("Ingresar")[0], "submit")
+
+    def test_report_page_filters_and_buttons(self):
+        page = _recorded_page(2)  # Facturas, opened from the menu
+        spec = scraper.REPORTS["ventas_facturas"]
+        for element_id in (spec.from_input, spec.to_input):
+            self.assertIn(page.field_name(element_id.lstrip("#")), page.fields)
+        self.assertEqual([b[0] for b in page.buttons], ["Filtrar", "Exportar"])
+        self.assertEqual(page.action, "http://sipe" + TENANT_PATH)
+
+    def test_menu_links_know_their_section(self):
+        sections = {text: section for text, _, section in _recorded_page(1).links}
+        self.assertEqual(sections["Facturas Gastos"], "Compras Proveedores Facturas")
+        self.assertEqual(sections["Sueldos"], "Sueldos y Otros Empleados")
+
+
+class FindActionTest(unittest.TestCase):
+    def setUp(self):
+        self.home = _recorded_page(1)
+
+    def test_link_in_its_menu_section(self):
+        self.assertEqual(
+            self.home.find_action("Facturas", section="Ventas Grupos Clientes Notas"),
+            ("postback", "ctl00$Menu", "Ventas Grupos Clientes Notas/Facturas"),
+        )
+
+    def test_inexact_link_stays_in_its_section(self):
+        action = self.home.find_action("Facturas Mercaderia", exact=False, section="Compras Proveedores Facturas")
+        self.assertEqual(action[2], "Compras Proveedores Facturas/Facturas Mercaderia")
+        with self.assertRaisesRegex(RuntimeError, "not found in menu"):
+            self.home.find_action("Facturas Gastos", exact=False, section="Ventas Grupos Clientes Notas")
+
+    def test_missing_section_or_label(self):
+        with self.assertRaisesRegex(RuntimeError, "Menu section 'Inventario' not found"):
+            self.home.find_action("Facturas", section="Inventario")
+        with self.assertRaisesRegex(RuntimeError, "'Balance' not found"):
+            self.home.find_action("Balance")
+
+
+class ReplayTest(unittest.TestCase):
+    def test_login_posts_credentials_with_the_page_state(self):
+        with ReplaySipe(RECORDED) as sipe:
+            _, home = _login(sipe)
+        self.assertFalse(home.has_id(USER_ID))
+        login_page = _recorded_page(0)
+        method, _, form = sipe.received[1]
+        self.assertEqual(method, "POST")
+        self.assertEqual(form[login_page.field_name(USER_ID)], "bench")
+        self.assertEqual(form[login_page.field_name(PASS_ID)], "bench")
+        self.assertEqual(form["__VIEWSTATE"], login_page.fields["__VIEWSTATE"])
+
+    def test_export_saves_the_file(self):
+        bodies = [e["body"] for e in _exchanges() if "attachment" in e["headers"].get("Content-Disposition", "")]
+        with ReplaySipe(RECORDED) as sipe, tempfile.TemporaryDirectory() as tmp:
+            client, home = _login(sipe)
+            for key, body in zip(("ventas_facturas", "compras_gastos"), bodies):
+                out = Path(tmp) / f"{key}.xlsx"
+                client.export(home, scraper.REPORTS[key], START, END, out)
+                self.assertEqual(out.read_bytes(), (RECORDED / body).read_bytes())
+
+        self.assertEqual([r for r in sipe.received if r[0] == "POST" and not r[2]], [])
+        filtrar = [form for _, _, form in sipe.received if any(k.endswith("btnFiltrar") for k in form)]
+        spec = scraper.REPORTS["compras_gastos"]
+        report_page = _recorded_page(5)  # Facturas Gastos, opened from the menu
+        self.assertEqual(filtrar[-1][report_page.field_name(spec.from_input.lstrip("#"))], "01/01/2026")
+        self.assertEqual(filtrar[-1][report_page.field_name(spec.to_input.lstrip("#"))], "31/01/2026")
+
+    def test_export_that_answers_a_page_fails(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            folder = Path(tmp) / "sipe"
+            shutil.copytree(RECORDED, folder)
+            exchanges = _exchanges(folder)
+            for e in exchanges:
+                if "attachment" in e["headers"].get("Content-Disposition", ""):
+                    e["headers"] = {"Content-Type": "text/html; charset=utf-8"}
+                    e["body"] = "00.html"
+            (folder / EXCHANGES).write_text(json.dumps(exchanges), encoding="utf-8")
+
+            with ReplaySipe(folder) as sipe:
+                client, home = _login(sipe)
+                with self.assertRaisesRegex(RuntimeError, "Exportar did not return a file"):
+                    client.export(home, scraper.REPORTS["compras_gastos"], START, END, Path(tmp) / "gastos.xlsx")
+
+    def test_unrecorded_click_is_refused(self):
+        with ReplaySipe(RECORDED) as sipe:
+            client, home = _login(sipe)
+            with self.assertRaises(urllib.error.HTTPError):
+                client.export(home, scraper.REPORTS["sueldos"], START, END, Path("unused.xlsx"))
+
+
+if __name__ == "__main__":
+    unittest.main()
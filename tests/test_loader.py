@@ -0,0 +1,123 @@
+"""
+modules/loader.py: the per-month sums in res/.aggregates against reading
+every row (processor --full), on synthetic exports (benchmarks/synthetic.py).
+"""
+import contextlib
+import io
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import pandas as pd
+from openpyxl import load_workbook
+
+from benchmarks.synthetic import Volume, write_exports
+from modules import loader
+from modules.summary import build_resumen_rollups
+
+VOLUME = Volume(years=2, employees=5, clients=20, providers=15, rows_per_month=30)
+GRANULARITIES = ("monthly", "quarterly")
+
+# the per-month sums add the same amounts in another order than the rows do
+TOLERANCE = {"check_exact": False, "rtol": 1e-12, "atol": 1e-6}
+
+
+def _edit_month(path: Path, header: int, month: int, rows: int = 3, date_col: int = 3, total_col: int = 4) -> None:
+    '''Adds 10.01 to the total of the first `rows` rows of that month of the first year'''
+    wb = load_workbook(path)
+    ws = wb.active
+    first_year = None
+    edited = 0
+    for row in ws.iter_rows(min_row=header + 2):
+        day = row[date_col - 1].value
+        if day is None:
+            continue
+        first_year = first_year or day.year
+        if (day.year, day.month) == (first_year, month) and edited < rows:
+            row[total_col - 1].value += 10.01
+            edited += 1
+    assert edited == rows, edited
+    wb.save(path)
+
+
+class AggregatesTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        tmp = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(tmp.cleanup)
+        cls.exports = Path(tmp.name) / "exports"
+        write_exports(cls.exports, VOLUME)
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.res = Path(tmp.name) / "res"
+        shutil.copytree(self.exports, self.res)
+        self.gastos = self.res / "gastos-sg.xlsx"
+        self.store = self.res / loader.AGGREGATE_DIR_NAME / "gastos-sg"
+        loader.clear_cache()
+        self.addCleanup(loader.clear_cache)
+
+    def build(self, incremental: bool) -> tuple[dict[str, pd.DataFrame], list[str]]:
+        '''Resumen tables, and the "months summed again" lines the loader printed'''
+        loader.clear_cache()
+        out = io.StringIO()
+        with mock.patch.object(loader, "INCREMENTAL", incremental), contextlib.redirect_stdout(out):
+            tables = build_resumen_rollups(self.res, GRANULARITIES)
+        return tables, [line for line in out.getvalue().splitlines() if "summed again" in line]
+
+    def assert_same_tables(self, tables: dict[str, pd.DataFrame], expected: dict[str, pd.DataFrame]) -> None:
+        self.assertEqual(list(tables), list(expected))
+        for g in expected:
+            pd.testing.assert_frame_equal(tables[g], expected[g], **TOLERANCE)
+
+    def test_incremental_matches_full(self):
+        full, _ = self.build(incremental=False)
+        first, summed = self.build(incremental=True)
+        self.assertEqual(len(summed), 8)   # every export summed once
+        again, summed = self.build(incremental=True)
+        self.assertEqual(summed, [])
+
+        self.assert_same_tables(first, full)
+        self.assert_same_tables(again, full)
+
+    def test_edited_month_is_the_only_one_summed_again(self):
+        self.build(incremental=True)
+        months = len(json.loads((self.store / "index.json").read_text())["files"].popitem()[1])
+
+        _edit_month(self.gastos, loader.REPORTS["gastos"]["header"], month=3)
+        tables, summed = self.build(incremental=True)
+
+        self.assertEqual(summed, [f"gastos-sg: 1 of {months} months summed again"])
+        full, _ = self.build(incremental=False)
+        self.assert_same_tables(tables, full)
+
+    def test_parts_of_exports_no_longer_kept_are_removed(self):
+        header = loader.REPORTS["gastos"]["header"]
+
+        def load() -> dict:
+            loader.clear_cache()
+            with contextlib.redirect_stdout(io.StringIO()):
+                loader.load_aggregated("gastos", "sg", self.res)
+            return json.loads((self.store / "index.json").read_text())["files"]
+
+        with mock.patch.object(loader, "AGGREGATE_KEEP_FILES", 2):
+            first = next(iter(load().values()))
+            for month in (3, 4):
+                _edit_month(self.gastos, header, month)
+                kept = load()
+
+        self.assertEqual(len(kept), 2)
+        used = {loader._part_path(self.store, m, h).name for months in kept.values() for m, h in months.items()}
+        self.assertEqual({p.name for p in self.store.glob(f"*.{loader.STAGING_FORMAT}")}, used)
+        # the first export's March is in neither kept export: gone. Its other months are shared
+        march = next(m for m in first if m.endswith("-03"))
+        self.assertFalse(loader._part_path(self.store, march, first[march]).exists())
+        self.assertTrue(all(loader._part_path(self.store, m, h).exists() for m, h in first.items() if m != march))
+
+
+if __name__ == "__main__":
+    unittest.main()
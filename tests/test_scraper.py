@@ -0,0 +1,38 @@
+"""
+scraper.py parts that run without a browser or the site.
+"""
+import json
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+import scraper
+from modules import instrument
+
+
+class WarmBrowserTest(unittest.TestCase):
+    def setUp(self):
+        self.browser = scraper._WarmBrowser()
+        self.addCleanup(self.browser.close)
+
+    def test_stages_nest_under_the_callers_run(self):
+        async def scrape():
+            with instrument.stage("login", tenant="sg"):
+                return threading.current_thread()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            report = Path(tmp) / "run.json"
+            with instrument.run("controller", report):
+                with instrument.stage("scrape", tenant="sg"):
+                    loop_thread = self.browser.run(scrape())
+            (root,) = json.loads(report.read_text(encoding="utf-8"))["stages"]
+
+        self.assertIsNot(loop_thread, threading.current_thread())
+        (scrape_stage,) = root["children"]
+        self.assertEqual(scrape_stage["name"], "scrape")
+        self.assertEqual([s["name"] for s in scrape_stage["children"]], ["login"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+"""
+modules/store.py: the SQLite history database, ingested from exports and read
+back by HistoryQuery.
+"""
+import contextlib
+import io
+import sqlite3
+import tempfile
+import unittest
+from datetime import date
+from pathlib import Path
+from unittest import mock
+
+import pandas as pd
+
+from benchmarks.synthetic import Volume, write_exports
+from modules import loader, store
+from modules.summary import build_resumen_rollups
+
+
+def _facturas(rows: list[tuple]) -> pd.DataFrame:
+    '''A loaded facturas export from (cliente, fecha, total) rows'''
+    return loader.typed_report(pd.DataFrame(rows, columns=loader.REPORTS["facturas"]["columns"]))
+
+
+JANUARY = [("ACME", "2026-01-05", 100.0), ("ACME", "2026-01-05", 100.0), ("Beta", "2026-01-20", 55.5)]
+FEBRUARY = [("ACME", "2026-02-03", 70.0), (None, "2026-02-10", 12.0)]
+
+
+class StoreTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+        self.conn = store.connect(self.dir / "history.sqlite")
+        self.addCleanup(self.conn.close)
+
+    def stored(self) -> list[tuple]:
+        return self.conn.execute("SELECT cliente, fecha, total, dup FROM facturas ORDER BY fecha, cliente, dup").fetchall()
+
+    def test_ingesting_the_same_export_again_changes_nothing(self):
+        export = _facturas(JANUARY + FEBRUARY)
+        self.assertEqual(store.ingest_export(self.conn, "facturas", "sg", export), (5, "2026-01-05", "2026-02-10"))
+        first = self.stored()
+        store.ingest_export(self.conn, "facturas", "sg", export)
+
+        self.assertEqual(self.stored(), first)
+        # the two identical rows are both kept, told apart by dup
+        self.assertEqual(first[:2], [("ACME", "2026-01-05", 100.0, 0), ("ACME", "2026-01-05", 100.0, 1)])
+        self.assertEqual(first[-1], ("", "2026-02-10", 12.0, 0))
+
+    def test_natural_key_refuses_a_second_copy(self):
+        store.ingest_export(self.conn, "facturas", "sg", _facturas(JANUARY))
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.conn.execute("INSERT INTO facturas (tenant, fecha, cliente, total, dup) VALUES ('sg', '2026-01-20', 'Beta', 55.5, 0)")
+
+    def test_export_replaces_what_its_span_held(self):
+        store.ingest_export(self.conn, "facturas", "sg", _facturas(JANUARY + FEBRUARY))
+        store.ingest_export(self.conn, "facturas", "s2", _facturas(FEBRUARY))
+        corrected = [("ACME", "2026-02-03", 75.0)]
+        store.ingest_export(self.conn, "facturas", "sg", _facturas(corrected), (date(2026, 2, 1), date(2026, 2, 28)))
+
+        february = self.conn.execute(
+            "SELECT tenant, cliente, total FROM facturas WHERE fecha >= '2026-02-01' ORDER BY tenant, fecha"
+        ).fetchall()
+        self.assertEqual(february, [("s2", "ACME", 70.0), ("s2", "", 12.0), ("sg", "ACME", 75.0)])
+
+    def test_empty_export_clears_its_span(self):
+        store.ingest_export(self.conn, "facturas", "sg", _facturas(JANUARY + FEBRUARY))
+        empty = _facturas([])
+
+        self.assertEqual(store.ingest_export(self.conn, "facturas", "sg", empty), (0, "", ""))
+        self.assertEqual(len(self.stored()), 5)
+
+        store.ingest_export(self.conn, "facturas", "sg", empty, (date(2026, 2, 1), date(2026, 2, 28)))
+        self.assertEqual({r[1][:7] for r in self.stored()}, {"2026-01"})
+
+
+class HistoryQueryTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        tmp = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(tmp.cleanup)
+        cls.res = Path(tmp.name) / "res"
+        cls.db = Path(tmp.name) / "history.sqlite"
+        write_exports(cls.res, Volume(years=1, employees=5, clients=20, rows_per_month=30))
+        loader.clear_cache()
+        with contextlib.redirect_stdout(io.StringIO()):
+            store.ingest_exports(cls.res, cls.db)
+            store.ingest_exports(cls.res, cls.db)   # twice: still one copy
+
+    def tearDown(self):
+        loader.clear_cache()
+
+    def test_load_gives_the_frames_of_the_exports(self):
+        history = store.HistoryQuery(self.db)
+        for report in loader.REPORTS:
+            for tenant in loader.TENANTS:
+                with self.subTest(report=report, tenant=tenant):
+                    expected = loader.load_report(report, tenant, self.res)
+                    date_col = next(c for c in expected.columns if c in loader.DATE_COLUMNS)
+                    expected = expected[expected[date_col].notna()].reset_index(drop=True)
+                    pd.testing.assert_frame_equal(history.load(report, tenant), expected, check_categorical=False)
+
+    def test_resumen_from_history_matches_res(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            from_res = build_resumen_rollups(self.res, ("monthly", "quarterly"))
+            with mock.patch.object(loader, "HISTORY", store.HistoryQuery(self.db)):
+                from_history = build_resumen_rollups(self.res, ("monthly", "quarterly"))
+        for granularity, table in from_res.items():
+            pd.testing.assert_frame_equal(from_history[granularity], table)
+
+    def test_date_range(self):
+        history = store.HistoryQuery(self.db, start=date(date.today().year, 3, 1), end=date(date.today().year, 3, 31))
+        fechas = history.load("gastos", "sg")["fecha"]
+        self.assertFalse(fechas.empty)
+        self.assertTrue(fechas.dt.month.eq(3).all())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+"""
+modules/summary.py: the single-groupby Resumen against the old per-module
+pivots (join_pivots + add_totals_and_result, kept in benchmarks/bench_summary.py),
+and the coarser tables summed up from finer sums.
+"""
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_summary import SECTIONS, engine, old_chain, records, synthetic
+from benchmarks.synthetic import Volume, write_exports
+from modules import gastos, loader, sueldos
+from modules.summary import build_resumen_rollups, period_sums, rollup_sums, summarize_sums
+
+YEARS = 2
+
+
+def _frames(rows: int = 6000) -> tuple[pd.DataFrame, ...]:
+    return (
+        synthetic(rows, YEARS, gastos.SECTION_ORDER, 1),
+        synthetic(rows // 10, YEARS, sueldos.SECTION_ORDER, 2),
+        synthetic(rows // 2, YEARS, ["stock"], 3),
+        synthetic(rows, YEARS, ["facturacion"], 4),
+    )
+
+
+class EngineTest(unittest.TestCase):
+    def assert_identical(self, new: pd.DataFrame, old: pd.DataFrame) -> None:
+        self.assertEqual(list(new.columns), list(old.columns))
+        self.assertEqual(new["seccion"].tolist(), old["seccion"].tolist())
+        np.testing.assert_array_equal(new.drop(columns="seccion").to_numpy(float), old.drop(columns="seccion").to_numpy(float))
+
+    def test_same_numbers_as_the_module_pivots(self):
+        frames = _frames()
+        for granularity in ("monthly", "weekly", "quarterly", "yearly"):
+            with self.subTest(granularity=granularity):
+                self.assert_identical(engine(*frames, granularity), old_chain(*frames, granularity))
+
+    def test_section_without_rows_is_a_row_of_zeros(self):
+        g, s, st, f = _frames()
+        g = g[g["seccion"] != "alquiler"]
+        table = engine(g, s, st, f)
+        self.assertEqual(table.set_index("seccion").loc["alquiler"].abs().sum(), 0)
+        self.assert_identical(table, old_chain(g, s, st, f))
+
+    def test_finer_sums_rolled_up(self):
+        frames = _frames()
+        for finest, granularity in (("daily", "monthly"), ("daily", "weekly"), ("monthly", "quarterly"), ("monthly", "yearly")):
+            with self.subTest(finest=finest, granularity=granularity):
+                rolled = summarize_sums(rollup_sums(period_sums(records(*frames, finest)), granularity), SECTIONS)
+                expected = old_chain(*frames, granularity)
+                self.assertEqual(rolled["seccion"].tolist(), expected["seccion"].tolist())
+                pd.testing.assert_frame_equal(rolled, expected, check_exact=False, rtol=1e-12, atol=1e-6)
+
+
+class BuildRollupsTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.res = Path(tmp.name)
+        write_exports(self.res, Volume(years=YEARS, employees=5, clients=20, rows_per_month=30))
+        loader.clear_cache()
+        self.addCleanup(loader.clear_cache)
+
+    def test_each_granularity_matches_its_own_build(self):
+        tables = build_resumen_rollups(self.res, ("daily", "monthly", "quarterly"))
+        for granularity in ("monthly", "quarterly"):
+            with self.subTest(granularity=granularity):
+                alone = build_resumen_rollups(self.res, (granularity,))[granularity]
+                pd.testing.assert_frame_equal(tables[granularity], alone, check_exact=False, rtol=1e-12, atol=1e-6)
+
+
+if __name__ == "__main__":
+    unittest.main()